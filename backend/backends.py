@@ -0,0 +1,243 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from dotenv import load_dotenv
+from typing import Any, Callable, Dict, cast
+from structures import TranslatorProtocol
+from logger import main_logger
+from latency import latency_model
+from cassettes import CASSETTE_MODE, cassette_translator
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+ENGINE_CONCURRENCY: int = int(os.getenv('ENGINE_CONCURRENCY', 4))  # Requests in flight per translation engine
+ENGINE_RETRIES: int = int(os.getenv('ENGINE_RETRIES', 3))  # Attempts per chunk before engine is given up
+RETRY_BASE_DELAY = 0.5  # Seconds before first retry, doubled with every attempt
+RETRY_MAX_DELAY = 8.0  # Longest pause between retries in seconds
+BREAKER_THRESHOLD = 5  # Consecutive failures that open circuit
+BREAKER_RESET_TIMEOUT = 30.0  # Seconds circuit stays open before a trial request
+SLOT_POLL_INTERVAL = 0.05  # Seconds between attempts to take a busy engine slot
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling engine while its circuit is open."""
+
+class CircuitBreaker:
+    """Health state of a single translation engine.
+
+    Circuit opens after BREAKER_THRESHOLD consecutive failures and requests
+    fail immediately without reaching the engine. After reset timeout one
+    trial request is let through (half-open state): success closes the
+    circuit, failure opens it again. Batch jobs translate in event loops of
+    their own threads, so state is changed under a lock.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT) -> None:
+        """Constructor for circuit breaker.
+
+        Args:
+            threshold (int): Consecutive failures that open circuit.
+            reset_timeout (float): Seconds before a trial request is allowed.
+        """
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float = 0.0
+        self.trial = False
+        self.counters: Dict[str, int] = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Returns 'closed', 'open' or 'half_open'."""
+        if self.failures < self.threshold:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Checks if request may be sent, letting a single trial through in half-open state."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial:
+                self.trial = True
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def record_success(self) -> None:
+        """Closes circuit after successful request."""
+        with self._lock:
+            self.failures = 0
+            self.trial = False
+            self.counters['successes'] += 1
+
+    def release_trial(self) -> None:
+        """Lets another trial through after a trial request ended without result, e.g. was cancelled."""
+        with self._lock:
+            self.trial = False
+
+    def record_failure(self) -> None:
+        """Counts failure and opens circuit once threshold is reached."""
+        with self._lock:
+            failed_trial = self.trial
+            self.failures += 1
+            self.trial = False
+            self.counters['failures'] += 1
+            if self.failures >= self.threshold:
+                if self.failures == self.threshold or failed_trial:
+                    self.counters['opened'] += 1
+                self.opened_at = time.monotonic()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns state and counters of breaker."""
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self.failures, **self.counters}
+
+class EngineSlots:
+    """Limits concurrent requests to a translation engine across all threads.
+
+    Batch jobs run their own event loops in worker threads, so slots are a
+    thread semaphore instead of an asyncio one bound to a single loop. A busy
+    slot is polled without blocking, so a cancelled wait never holds a slot.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Constructor for engine slots.
+
+        Args:
+            limit (int): Requests in flight at the same time.
+        """
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    async def __aenter__(self) -> None:
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._semaphore.release()
+
+# State of engines is shared by event loops of all threads
+_engines_lock = threading.Lock()
+_engine_slots: Dict[str, EngineSlots] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_queued: Dict[str, int] = {}  # Requests waiting for or holding engine slots
+
+def engine_slots(engine: str) -> EngineSlots:
+    """Returns slots limiting concurrent requests to translation engine."""
+    with _engines_lock:
+        if engine not in _engine_slots:
+            _engine_slots[engine] = EngineSlots(ENGINE_CONCURRENCY)
+        return _engine_slots[engine]
+
+def breaker(engine: str) -> CircuitBreaker:
+    """Returns circuit breaker of translation engine."""
+    with _engines_lock:
+        if engine not in _breakers:
+            _breakers[engine] = CircuitBreaker()
+        return _breakers[engine]
+
+def _add_queued(engine: str, count: int) -> None:
+    """Changes number of requests waiting for or holding engine slots."""
+    with _engines_lock:
+        _queued[engine] = _queued.get(engine, 0) + count
+
+def queue_depth(engine: str) -> int:
+    """Returns number of requests waiting for or being processed by translation engine."""
+    with _engines_lock:
+        return _queued.get(engine, 0)
+
+def engine_health() -> Dict[str, Dict[str, Any]]:
+    """Returns breaker state and counters of every engine used since start."""
+    with _engines_lock:
+        breakers = dict(_breakers)
+    return {engine: engine_breaker.metrics() for engine, engine_breaker in breakers.items()}
+
+def backoff_delay(attempt: int) -> float:
+    """Returns jittered exponential delay before retry, attempt counted from 0."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def engine_class(engine: str) -> Callable[..., Any]:
+    """Returns deep_translator class of translation engine, Google for unknown names.
+
+    With CASSETTE_MODE set the class is wrapped to record requests, or
+    replaced by cassette replay without importing deep_translator.
+    """
+    if CASSETTE_MODE == 'replay':
+        return cassette_translator(engine, None)
+
+    from deep_translator import ( # type: ignore
+        LingueeTranslator,
+        MyMemoryTranslator,
+        GoogleTranslator,
+    )
+
+    # Mapping of engine name to corresponding class
+    TRANSLATOR_ENGINES = {
+        'Linguee': LingueeTranslator,
+        'MyMemory': MyMemoryTranslator,
+        'Google': GoogleTranslator,  # Default engine
+    }
+
+    return cassette_translator(engine, TRANSLATOR_ENGINES.get(engine, GoogleTranslator))
+
+async def translate_chunk(engine: str, engine_source: str, engine_target: str, chunk: str) -> str:
+    """Translates text with engine without blocking event loop.
+
+    Requests to one engine share ENGINE_CONCURRENCY slots, so jobs and
+    languages translated at the same time don't exceed engine rate limits.
+    Failed requests are retried up to ENGINE_RETRIES times with jittered
+    exponential backoff while circuit of engine is closed. Duration of
+    successful live requests is recorded to latency model used for estimates.
+
+    Args:
+        engine (str): Translation engine name.
+        engine_source (str): Engine-specific source language code.
+        engine_target (str): Engine-specific target language code.
+        chunk (str): Text to translate.
+
+    Returns:
+        str: Translated text.
+
+    Raises:
+        CircuitOpenError: If engine is considered unhealthy.
+        Exception: Error of the last attempt.
+    """
+    TranslateEngine = engine_class(engine)
+    engine_breaker = breaker(engine)
+    for attempt in range(ENGINE_RETRIES):
+        if not engine_breaker.allow():
+            raise CircuitOpenError(f'{engine} is unavailable after repeated errors')
+        try:
+            _add_queued(engine, 1)
+            try:
+                async with engine_slots(engine):
+                    engine_instance = TranslateEngine(source=engine_source, target=engine_target)
+                    typed_engine = cast(TranslatorProtocol, engine_instance)
+                    request_start = time.perf_counter()
+                    translated_text = await asyncio.to_thread(typed_engine.translate, chunk)
+                    request_duration = time.perf_counter() - request_start
+            finally:
+                _add_queued(engine, -1)
+        except Exception as e:
+            engine_breaker.record_failure()
+            main_logger.info(f"{engine}: attempt {attempt + 1}/{ENGINE_RETRIES} failed: {str(e)}")
+            if attempt + 1 == ENGINE_RETRIES:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+        except BaseException:
+            # Cancelled request doesn't tell anything about engine health
+            engine_breaker.release_trial()
+            raise
+        else:
+            engine_breaker.record_success()
+            if CASSETTE_MODE != 'replay':  # Replayed latency would skew estimates of live translations
+                latency_model.record('engine', engine, request_duration, len(chunk))
+            return translated_text
+    raise RuntimeError('ENGINE_RETRIES must be positive')
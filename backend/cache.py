@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Tuple
+from storage import blob_store, link_or_copy
+from logger import main_logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+DEBUG = bool(int(os.getenv('DEBUG', '1')))
+RELATIVE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache")
+CACHE_DIR = RELATIVE_CACHE_DIR if DEBUG else os.getenv('CACHE_PATH', RELATIVE_CACHE_DIR)
+CACHE_SIZE: int = int(os.getenv('CACHE_SIZE_MB', 256)) * 1024 * 1024  # MB in bytes
+CACHE_AGE: int = int(os.getenv('CACHE_AGE', 7 * 24 * 3600))  # 1 week in seconds
+
+def file_digest(file_path: str) -> str:
+    """Returns SHA-256 hex digest of file content."""
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(64 * 1024):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+class ResultCache:
+    """Content-addressed cache of operation results.
+
+    Entries are keyed by hashes of input files, operation name and normalized
+    parameters. Every entry is stored as a link to the output blob and a small
+    JSON file with the blob digest and the suffix the operation appended to
+    the source filename, so a hit can be restored under the name the operation
+    would have produced. Entries are evicted by age and, least recently used
+    first, by total size.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int, max_age: int) -> None:
+        """Constructor for result cache.
+
+        Args:
+            cache_dir (str): Directory with cached results.
+            max_size (int): Total size of cached outputs in bytes.
+            max_age (int): Seconds after which entry is considered stale.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[int, float]] = OrderedDict()  # key -> (size, stored at)
+        self._size = 0
+        self._loaded = False
+        self._metrics: Dict[str, int] = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(input_hashes: List[str], operation: str, parameters: Dict[str, Any]) -> str:
+        """Returns cache key for operation applied to inputs.
+
+        Parameters with None values are dropped, so omitted and explicitly
+        empty optional parameters produce the same key.
+        """
+        normalized = {name: value for name, value in parameters.items() if value is not None}
+        payload = json.dumps([input_hashes, operation, normalized], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _output_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.srt')
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _load(self) -> None:
+        """Index entries stored on disk, oldest first."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries: List[Tuple[float, str, int]] = []
+        for filename in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(filename)
+            if ext != '.srt' or not os.path.exists(self._meta_path(key)):
+                continue
+            stat = os.stat(self._output_path(key))
+            entries.append((stat.st_mtime, key, stat.st_size))
+
+        for stored_at, key, size in sorted(entries):
+            self._entries[key] = (size, stored_at)
+            self._size += size
+        self._loaded = True
+
+    def _read_meta(self, key: str) -> Dict[str, Any]:
+        with open(self._meta_path(key), 'r') as file:
+            return json.load(file)
+
+    def _remove(self, key: str) -> None:
+        """Remove entry from index and disk. Must be called with lock held."""
+        size, _ = self._entries.pop(key)
+        self._size -= size
+        digest = self._read_meta(key)['digest'] if os.path.exists(self._meta_path(key)) else None
+        for path in (self._output_path(key), self._meta_path(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+        # Drop blob if cache entry was its last reference
+        if digest:
+            blob_store.release([digest])
+
+    def _evict(self) -> None:
+        """Remove stale entries and least recently used ones above size limit. Must be called with lock held."""
+        now = time.time()
+        for key in [key for key, (_, stored_at) in self._entries.items() if now - stored_at > self.max_age]:
+            self._remove(key)
+            self._metrics['evictions'] += 1
+        while self._size > self.max_size and self._entries:
+            self._remove(next(iter(self._entries)))
+            self._metrics['evictions'] += 1
+
+    def restore(self, key: str, source_file: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """Places cached output next to source file.
+
+        Args:
+            key (str): Cache key.
+            source_file (str): Path to source file of the operation.
+
+        Returns:
+            Tuple[str, str, Dict[str, Any]] or None: Path to restored file, its digest and
+                operation report, None on cache miss.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[1] > self.max_age:
+                if entry is not None:
+                    self._remove(key)
+                    self._metrics['evictions'] += 1
+                self._metrics['misses'] += 1
+                return None
+
+            meta = self._read_meta(key)
+            self._entries.move_to_end(key)
+            self._metrics['hits'] += 1
+
+        source_name = os.path.splitext(source_file)[0]
+        restored_file = f'{source_name}{meta["suffix"]}'
+        link_or_copy(self._output_path(key), restored_file)
+        main_logger.info(f"cache hit: {os.path.basename(restored_file)}")
+
+        digest: str = meta['digest']
+        report: Dict[str, Any] = meta.get('report', {})
+        return restored_file, digest, report
+
+    def store(
+        self,
+        key: str,
+        source_file: str,
+        processed_file: str,
+        digest: str,
+        report: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Adds operation output to cache.
+
+        Args:
+            key (str): Cache key.
+            source_file (str): Path to source file of the operation.
+            processed_file (str): Path to output file of the operation.
+            digest (str): SHA-256 hex digest of output file.
+            report (Dict[str, Any] or None): Details of operation returned with its result. Defaults to None.
+        """
+        source_name = os.path.splitext(source_file)[0]
+        if not processed_file.startswith(source_name):
+            return
+        suffix = processed_file[len(source_name):]
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key in self._entries:
+                self._remove(key)
+
+            link_or_copy(processed_file, self._output_path(key))
+            with open(self._meta_path(key), 'w') as file:
+                json.dump({'suffix': suffix, 'digest': digest, 'report': report or {}}, file)
+
+            size = os.path.getsize(self._output_path(key))
+            self._entries[key] = (size, time.time())
+            self._size += size
+            self._metrics['stores'] += 1
+            self._evict()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns cache counters, number of entries and their total size."""
+        with self._lock:
+            lookups = self._metrics['hits'] + self._metrics['misses']
+            return {
+                **self._metrics,
+                'hit_ratio': self._metrics['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'size': self._size
+            }
+
+result_cache = ResultCache(CACHE_DIR, CACHE_SIZE, CACHE_AGE)
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import asyncio
+import random
+import hashlib
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from logger import main_logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+CASSETTE_MODE: str = os.getenv('CASSETTE_MODE', '')  # '' - live services, 'record' or 'replay'
+CASSETTE_DIR = Path(os.getenv('CASSETTE_PATH', Path(__file__).parent / '../cassettes'))
+CASSETTE_LATENCY: str = os.getenv('CASSETTE_LATENCY', 'recorded')  # 'recorded', 'none' or 'lognormal:<median>:<sigma>'
+CASSETTE_SEED: int = int(os.getenv('CASSETTE_SEED', 0))  # Seed of synthetic latency, the same seed gives the same run
+CASSETTE_MODES = ('record', 'replay')
+
+class CassetteMissError(Exception):
+    """Raised in replay mode for a request that wasn't recorded."""
+
+def _cassette_path(backend: str, model: str) -> Path:
+    """Returns cassette file of backend and engine or model."""
+    safe_model = ''.join(char if char.isalnum() or char in '.-' else '-' for char in model)
+    return CASSETTE_DIR / f'{backend}-{safe_model}.jsonl'
+
+def _request_key(*parts: str) -> str:
+    """Returns hash identifying request by its parameters and text."""
+    return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+class Cassette:
+    """Request and response pairs of a single translation backend.
+
+    Interactions are appended to a JSON lines file as they are recorded,
+    so a recording interrupted by an error keeps everything before it.
+    In replay mode requests are looked up by hash of their parameters and
+    text, repeated requests get their recorded responses in order.
+    """
+
+    def __init__(self, backend: str, model: str) -> None:
+        """Constructor for cassette.
+
+        Args:
+            backend (str): Backend kind, 'engine' or 'duck'.
+            model (str): Engine or model name.
+        """
+        self.path = _cassette_path(backend, model)
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._played: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {'recorded': 0, 'replayed': 0, 'missed': 0}
+
+    def load(self) -> None:
+        """Reads recorded interactions from file."""
+        self._interactions = {}
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(interaction['key'], []).append(interaction)
+
+    def record(self, key: str, request: Dict[str, Any], response: str, seconds: float) -> None:
+        """Appends interaction to cassette file."""
+        interaction = {'key': key, 'request': request, 'response': response, 'seconds': round(seconds, 4)}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(interaction, ensure_ascii=False) + '\n')
+            self.counters['recorded'] += 1
+
+    def play(self, key: str) -> Tuple[str, float]:
+        """Returns recorded response and its duration.
+
+        Raises:
+            CassetteMissError: If request isn't in cassette.
+        """
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                self.counters['missed'] += 1
+                raise CassetteMissError(f'Request {key[:12]} is not recorded in {self.path.name}')
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            self.counters['replayed'] += 1
+        interaction = interactions[played % len(interactions)]
+        return interaction['response'], interaction['seconds']
+
+# Cassettes are loaded once per backend and model
+_cassettes: Dict[Tuple[str, str], Cassette] = {}
+_cassettes_lock = threading.Lock()
+_latency_random = random.Random(CASSETTE_SEED)
+
+def cassette(backend: str, model: str) -> Cassette:
+    """Returns cassette of backend and engine or model, loading it on first use."""
+    with _cassettes_lock:
+        if (backend, model) not in _cassettes:
+            loaded = Cassette(backend, model)
+            if CASSETTE_MODE == 'replay':
+                loaded.load()
+            _cassettes[(backend, model)] = loaded
+        return _cassettes[(backend, model)]
+
+def cassette_metrics() -> Dict[str, Dict[str, int]]:
+    """Returns recorded, replayed and missed requests of every cassette used since start."""
+    with _cassettes_lock:
+        return {f'{backend}:{model}': dict(loaded.counters) for (backend, model), loaded in _cassettes.items()}
+
+def replay_delay(recorded_seconds: float) -> float:
+    """Returns seconds a replayed request takes according to CASSETTE_LATENCY.
+
+    Raises:
+        ValueError: If CASSETTE_LATENCY has unknown format.
+    """
+    if CASSETTE_LATENCY == 'recorded':
+        return recorded_seconds
+    if CASSETTE_LATENCY == 'none':
+        return 0.0
+    kind, _, parameters = CASSETTE_LATENCY.partition(':')
+    if kind == 'lognormal':
+        median, sigma = (float(value) for value in parameters.split(':'))
+        with _cassettes_lock:
+            return median * _latency_random.lognormvariate(0, sigma)
+    raise ValueError(f'Unknown CASSETTE_LATENCY: {CASSETTE_LATENCY}')
+
+class RecordingTranslator:
+    """Translation engine wrapper saving every request to cassette."""
+
+    def __init__(self, engine: str, translator_class: type, source: str, target: str) -> None:
+        """Constructor for recording translator, takes the same source and target as deep_translator engines."""
+        self.engine = engine
+        self.source = source
+        self.target = target
+        self.translator = translator_class(source=source, target=target)
+
+    def translate(self, text: str) -> str:
+        """Translates text with engine and records request, response and duration."""
+        request_start = time.perf_counter()
+        translated_text = self.translator.translate(text)
+        cassette('engine', self.engine).record(
+            _request_key(self.source, self.target, text),
+            {'source': self.source, 'target': self.target, 'text': text},
+            translated_text,
+            time.perf_counter() - request_start
+        )
+        return translated_text
+
+class ReplayTranslator:
+    """Translation engine serving responses from cassette instead of calling the service."""
+
+    def __init__(self, engine: str, source: str, target: str) -> None:
+        """Constructor for replay translator, takes the same source and target as deep_translator engines."""
+        self.engine = engine
+        self.source = source
+        self.target = target
+
+    def translate(self, text: str) -> str:
+        """Returns recorded translation after recorded or synthetic latency.
+
+        Raises:
+            CassetteMissError: If request isn't recorded.
+        """
+        translated_text, seconds = cassette('engine', self.engine).play(_request_key(self.source, self.target, text))
+        time.sleep(replay_delay(seconds))  # Engines are called from worker threads
+        return translated_text
+
+def cassette_translator(engine: str, translator_class: Optional[type]) -> Callable[..., Any]:
+    """Returns factory of translator for CASSETTE_MODE, called like deep_translator classes.
+
+    Args:
+        engine (str): Translation engine name.
+        translator_class (Optional[type]): deep_translator class, not needed for replay.
+
+    Returns:
+        Callable[..., Any]: Factory taking source and target keyword arguments.
+    """
+    if CASSETTE_MODE == 'replay':
+        return lambda source, target: ReplayTranslator(engine, source, target)
+    if CASSETTE_MODE == 'record' and translator_class is not None:
+        return lambda source, target: RecordingTranslator(engine, translator_class, source, target)
+    return translator_class  # type: ignore[return-value]
+
+class DuckClient:
+    """Duck.ai chat client recording or replaying conversations according to CASSETTE_MODE."""
+
+    async def chat(self, prompt: str, model: str, timeout: int = 30) -> str:
+        """Sends prompt to model and returns response.
+
+        Args:
+            prompt (str): Prompt text.
+            model (str): Duck.ai model identifier.
+            timeout (int): Seconds after which response is considered lost. Defaults to 30.
+
+        Returns:
+            str: Model response.
+
+        Raises:
+            CassetteMissError: If prompt isn't recorded in replay mode. Duck.ai has no
+                fallback, so the translation fails.
+        """
+        key = _request_key(model, prompt)
+        if CASSETTE_MODE == 'replay':
+            response, seconds = cassette('duck', model).play(key)
+            await asyncio.sleep(replay_delay(seconds))  # Duck.ai translation runs in event loop
+            return response
+
+        from duckai import DuckAI
+
+        request_start = time.perf_counter()
+        response = await asyncio.to_thread(DuckAI().chat, prompt, model, timeout=timeout)
+        if CASSETTE_MODE == 'record':
+            cassette('duck', model).record(key, {'model': model, 'prompt': prompt}, response, time.perf_counter() - request_start)
+        return response
+
+if CASSETTE_MODE and CASSETTE_MODE not in CASSETTE_MODES:
+    raise ValueError(f'Unknown CASSETTE_MODE: {CASSETTE_MODE}, supported modes: {list(CASSETTE_MODES)}')
+if CASSETTE_MODE:
+    main_logger.info(f"translation backends in {CASSETTE_MODE} mode, cassettes in {CASSETTE_DIR}")
@@ -0,0 +1,41 @@
+import os
+from dotenv import load_dotenv
+from typing import List, Optional
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None  # Brotli is optional, gzip is used without it
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+COMPRESSION_MIN_SIZE: int = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # Smaller responses are sent as is
+GZIP_LEVEL = 6  # Balance between ratio and CPU time per response
+BROTLI_QUALITY = 5  # Ratio close to gzip level 9 at a fraction of its CPU time
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Returns encodings from Accept-Encoding header that aren't refused with q=0."""
+    encodings = []
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        if name and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            encodings.append(name.strip().lower())
+    return encodings
+
+def negotiate_brotli(accept_encoding: Optional[str], size: int) -> bool:
+    """Checks if response of given size should be compressed with Brotli.
+
+    Args:
+        accept_encoding (Optional[str]): Accept-Encoding request header.
+        size (int): Size of uncompressed response body in bytes.
+
+    Returns:
+        bool: True if Brotli is installed, accepted by client and worth using.
+    """
+    return brotli is not None and size >= COMPRESSION_MIN_SIZE and 'br' in accepted_encodings(accept_encoding)
+
+def brotli_compress(data: bytes) -> bytes:
+    """Compresses text data with Brotli."""
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
@@ -0,0 +1,163 @@
+import os
+import orjson
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from structures import SubtitleCue, SubtitleData
+from subedit import SubEdit
+from timeline import TimeIndex
+from outputs import output_buffer
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+DOCUMENT_CACHE_SIZE: int = int(os.getenv('DOCUMENT_CACHE_SIZE', 32))  # Parsed files kept in memory
+DOCUMENT_PAYLOADS = 64  # Serialized responses kept per document
+
+class Document:
+    """Parsed subtitle file prepared for range queries.
+
+    Cues are kept in index order for pagination and in a TimeIndex for
+    time windows.
+    """
+
+    def __init__(self, data: SubtitleData) -> None:
+        """Constructor for parsed document.
+
+        Args:
+            data (SubtitleData): Parsed subtitles and metadata of a single file.
+        """
+        self.data = data
+        subtitles = data['subtitles']
+        self.indices: List[int] = sorted(subtitles)
+        self.time_index = TimeIndex(subtitles)
+
+        self._payloads: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._payloads_lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        """Number of cues in document."""
+        return len(self.indices)
+
+    def cue(self, index: int) -> SubtitleCue:
+        """Returns cue with its index."""
+        entry = self.data['subtitles'][index]
+        return {'index': index, 'start': entry['start'], 'end': entry['end'], 'text': entry['text']}
+
+    def page(self, offset: int, limit: int) -> List[SubtitleCue]:
+        """Returns cues by their position in index order.
+
+        Args:
+            offset (int): Position of first cue.
+            limit (int): Maximum number of cues.
+
+        Returns:
+            List[SubtitleCue]: Cues in index order.
+        """
+        return [self.cue(index) for index in self.indices[offset:offset + limit]]
+
+    def window(self, start_ms: Optional[int], end_ms: Optional[int], offset: int, limit: int) -> Tuple[int, List[SubtitleCue]]:
+        """Returns cues visible between two moments of time.
+
+        Args:
+            start_ms (Optional[int]): Beginning of window, None for the start of file.
+            end_ms (Optional[int]): Inclusive end of window, None for the end of file.
+            offset (int): Number of matching cues to skip.
+            limit (int): Maximum number of cues.
+
+        Returns:
+            Tuple[int, List[SubtitleCue]]: Number of matching cues and requested cues in start time order.
+        """
+        indices = self.time_index.visible_between(start_ms, end_ms)
+        return len(indices), [self.cue(index) for index in indices[offset:offset + limit]]
+
+    def payload(self, key: Hashable, build: Callable[[], Dict[str, Any]]) -> bytes:
+        """Returns JSON response body, serializing it only on first request.
+
+        Document is immutable, so response built for the same key is always
+        the same and repeated requests are served without encoding.
+
+        Args:
+            key (Hashable): Identifies response, e.g. endpoint and page.
+            build (Callable[[], Dict[str, Any]]): Builds response content.
+
+        Returns:
+            bytes: Serialized JSON.
+        """
+        with self._payloads_lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+
+        payload = orjson.dumps(build())
+        with self._payloads_lock:
+            self._payloads[key] = payload
+            while len(self._payloads) > DOCUMENT_PAYLOADS:
+                self._payloads.popitem(last=False)
+        return payload
+
+class DocumentCache:
+    """Bounded cache of parsed subtitle files.
+
+    Documents are keyed by path and revalidated with a single `stat` call, so
+    preview requests don't parse a file and detect its encoding and language
+    again while it is unchanged. Least recently used documents are dropped
+    first.
+    """
+
+    def __init__(self, max_documents: int) -> None:
+        """Constructor for document cache.
+
+        Args:
+            max_documents (int): Number of documents kept in memory.
+        """
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._documents: OrderedDict[str, Tuple[Tuple[int, int, int], Document]] = OrderedDict()
+        self._metrics: Dict[str, int] = {'hits': 0, 'misses': 0}
+
+    def get(self, file_path: str) -> Document:
+        """Returns parsed document, parsing file if it is not cached or was modified.
+
+        Args:
+            file_path (str): Path to subtitle file.
+
+        Returns:
+            Document: Parsed document.
+
+        Raises:
+            FileNotFoundError: If file doesn't exist.
+        """
+        # Output of a previous operation may still be in write queue
+        output_buffer.wait(file_path)
+        stat = os.stat(file_path)
+        version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+        with self._lock:
+            cached = self._documents.get(file_path)
+            if cached is not None and cached[0] == version:
+                self._documents.move_to_end(file_path)
+                self._metrics['hits'] += 1
+                return cached[1]
+            self._metrics['misses'] += 1
+
+        subedit = SubEdit([file_path])
+        document = Document(subedit.subtitles_data[file_path])
+
+        with self._lock:
+            self._documents[file_path] = (version, document)
+            self._documents.move_to_end(file_path)
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return document
+
+    def metrics(self) -> Dict[str, Any]:
+        """Returns cache counters and number of cached documents."""
+        with self._lock:
+            return {**self._metrics, 'documents': len(self._documents)}
+
+document_cache = DocumentCache(DOCUMENT_CACHE_SIZE)
@@ -0,0 +1,136 @@
+import math
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from stats import StatisticsManager
+
+# Constants
+LATENCY_BUCKETS = tuple(0.05 * 2 ** (i / 2) for i in range(24))  # Upper bounds from 0.05 to ~145 seconds
+EWMA_ALPHA = 0.2  # Weight of the latest request in moving averages
+DEFAULT_SPREAD = 1.5  # Ratio of 90th to 50th percentile before enough requests are recorded
+MIN_HISTOGRAM_REQUESTS = 20  # Requests needed to trust percentiles of histogram
+
+class LatencyModel:
+    """Learned latency of translation backends.
+
+    Every request is recorded per backend and model in two ways. Counters
+    of requests, total seconds, total size (characters or tokens) and a
+    log-spaced latency histogram are added to StatisticsManager, so they
+    are persisted and shared by worker processes. Exponentially weighted
+    moving averages of seconds per request and per unit of size are kept in
+    memory and follow recent upstream slowdowns faster.
+    """
+
+    def __init__(self) -> None:
+        """Constructor for latency model."""
+        self._lock = threading.Lock()
+        self._averages: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    @staticmethod
+    def _counter(backend: str, model: str, name: str) -> str:
+        """Returns name of persisted counter."""
+        return f'latency:{backend}:{model}:{name}'
+
+    def record(self, backend: str, model: str, seconds: float, size: int) -> None:
+        """Records duration of a single request.
+
+        Args:
+            backend (str): Backend kind, e.g. 'engine' or 'duck'.
+            model (str): Engine or model name.
+            seconds (float): Request duration.
+            size (int): Request size in characters or tokens.
+        """
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        StatisticsManager.increment(self._counter(backend, model, 'requests'))
+        StatisticsManager.increment(self._counter(backend, model, 'seconds'), seconds)
+        StatisticsManager.increment(self._counter(backend, model, 'size'), size)
+        StatisticsManager.increment(self._counter(backend, model, f'bucket{bucket}'))
+
+        per_unit = seconds / max(size, 1)
+        with self._lock:
+            averages = self._averages.get((backend, model))
+            if averages is None:
+                self._averages[(backend, model)] = {'request': seconds, 'unit': per_unit}
+            else:
+                averages['request'] += EWMA_ALPHA * (seconds - averages['request'])
+                averages['unit'] += EWMA_ALPHA * (per_unit - averages['unit'])
+
+    def histogram(self, backend: str, model: str) -> List[float]:
+        """Returns request counts of latency buckets, the last one counts requests above all bounds."""
+        return [StatisticsManager.get(self._counter(backend, model, f'bucket{bucket}')) for bucket in range(len(LATENCY_BUCKETS) + 1)]
+
+    def percentile(self, backend: str, model: str, q: float) -> Optional[float]:
+        """Returns upper bound of latency bucket containing percentile q from 0 to 1, None without data."""
+        counts = self.histogram(backend, model)
+        total = sum(counts)
+        if total < MIN_HISTOGRAM_REQUESTS:
+            return None
+
+        cumulative = 0.0
+        for bucket, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= q * total:
+                return LATENCY_BUCKETS[bucket] if bucket < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1] * math.sqrt(2)
+        return LATENCY_BUCKETS[-1]
+
+    def seconds_per_unit(self, backend: str, model: str) -> Optional[float]:
+        """Returns recent seconds per character or token, persisted average if process has no requests yet."""
+        with self._lock:
+            averages = self._averages.get((backend, model))
+            if averages is not None:
+                return averages['unit']
+
+        size = StatisticsManager.get(self._counter(backend, model, 'size'))
+        return StatisticsManager.get(self._counter(backend, model, 'seconds')) / size if size else None
+
+    def estimate(
+        self,
+        backend: str,
+        model: str,
+        sizes: Sequence[int],
+        default_seconds_per_unit: float,
+        concurrency: int = 1,
+        queued: int = 0,
+        wait: float = 0.0
+    ) -> Dict[str, int]:
+        """Estimates duration of a job split into requests.
+
+        Requests run in waves of `concurrency` after requests already queued
+        for the same backend. Median estimate comes from learned seconds per
+        unit of size, 90th percentile is scaled by spread of the latency
+        histogram.
+
+        Args:
+            backend (str): Backend kind, e.g. 'engine' or 'duck'.
+            model (str): Engine or model name.
+            sizes (Sequence[int]): Size of every request in characters or tokens.
+            default_seconds_per_unit (float): Used until backend has recorded requests.
+            concurrency (int): Requests sent at the same time. Defaults to 1.
+            queued (int): Requests of other jobs waiting for the backend. Defaults to 0.
+            wait (float): Rate-limit pause after every request in seconds. Defaults to 0.
+
+        Returns:
+            Dict[str, int]: 'eta' and 'eta_p90' in seconds.
+        """
+        if not sizes:
+            return {'eta': 0, 'eta_p90': 0}
+
+        per_unit = self.seconds_per_unit(backend, model) or default_seconds_per_unit
+        durations = [per_unit * size for size in sizes]
+        mean_duration = sum(durations) / len(durations)
+
+        # Queued requests delay start, own requests are spread over concurrent slots
+        busy = (sum(durations) + queued * mean_duration) / max(1, concurrency)
+        waits = wait * math.ceil(len(sizes) / max(1, concurrency))
+
+        median, high = self.percentile(backend, model, 0.5), self.percentile(backend, model, 0.9)
+        spread = high / median if median and high else DEFAULT_SPREAD
+
+        return {'eta': math.ceil(busy + waits), 'eta_p90': math.ceil(busy * spread + waits)}
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Returns moving averages of every backend and model seen by this process."""
+        with self._lock:
+            return {f'{backend}:{model}': dict(averages) for (backend, model), averages in self._averages.items()}
+
+latency_model = LatencyModel()
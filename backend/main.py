@@ -1,20 +1,41 @@
 import os
-import time
 import json
 import shutil
 import uuid
+import hashlib
+import tempfile
+import zipfile
 import threading
 import asyncio
 import props
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from pathlib import Path
 from typing import Dict, Any, AsyncGenerator, Optional, List, Coroutine
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 from contextlib import asynccontextmanager
-from structures import StatusRequest, ShowRequest, ShiftRequest, AlignRequest, CleanRequest, EngineRequest, DuckRequest, StatisticsData
+from structures import SessionId, StatusRequest, ShowRequest, CuesRequest, TimeRange, TransformRequest, ShiftRequest, AlignRequest, CleanRequest, ValidateRequest, MatchRequest, EngineRequest, DuckRequest, OperationSpec, PipelineRequest
 from subedit import SubEdit
+from stats import StatisticsManager
+from registry import engines_config, duck_config
+from cache import ResultCache, result_cache, file_digest
+from storage import USER_FILES_DIR, blob_store
+from sessions import session_index
+from outputs import output_buffer
+from documents import document_cache
+from matching import match_cues
+from validation import FIX_MODES
+from backends import engine_health
+from latency import latency_model
+from throttle import throttle_metrics
+from cassettes import CASSETTE_MODE, cassette_metrics
+from compression import COMPRESSION_MIN_SIZE, GZIP_LEVEL, negotiate_brotli, brotli_compress
 from logger import main_logger
 
 # Load environment variables from .env file
@@ -22,13 +43,18 @@ load_dotenv()
 
 # Constants
 DEBUG = bool(int(os.getenv('DEBUG', '1')))
-RELATIVE_USER_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "user_files")
 FRONTEND_URL: str = "http://localhost:5173" if DEBUG else os.getenv('FRONTEND_URL', "http://localhost:5173")
-USER_FILES_DIR = RELATIVE_USER_FILES_DIR if DEBUG else os.getenv('USER_FILES_PATH', RELATIVE_USER_FILES_DIR)
-SESSION_LIFETIME = 3600  # 1 hour in seconds
-MAX_FILE_SIZE = 1 * 1024 * 1024  # 1 MB in bytes
+MAX_FILE_SIZE_MB: int = int(os.getenv('MAX_FILE_SIZE_MB', 1))
+MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024  # MB in bytes
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read from upload stream at once
+MAX_BATCH_FILES = 50  # Files processed in one batch request
+MULTIPART_OVERHEAD = 64 * 1024  # Bytes of form fields and part headers allowed besides files
+BATCH_WORKERS: int = int(os.getenv('BATCH_WORKERS', os.cpu_count() or 4))
 ALLOWED_EXTENSIONS = {".srt"}  # Allowed file extensions
 
+# Worker pool shared by batch requests
+BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+
 # Ensure user_files directory exists
 if not os.path.exists(USER_FILES_DIR):
     os.makedirs(USER_FILES_DIR)
@@ -36,41 +62,63 @@ if not os.path.exists(USER_FILES_DIR):
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Lifespan event handler for FastAPI (startup/shutdown)."""
-    cleanup_thread = threading.Thread(target=run_cleanup, daemon=True)
+    StatisticsManager.load()
+
+    # Parse and validate shared configs so errors surface on startup
+    engines_config.get()
+    duck_config.get()
+
+    statistics_thread = threading.Thread(target=StatisticsManager.run_writer, daemon=True)
+    statistics_thread.start()
+    session_index.load()
+    cleanup_thread = threading.Thread(target=session_index.run_cleanup, daemon=True)
     cleanup_thread.start()
     yield
 
+    # Persist counters accumulated since last flush
+    StatisticsManager.flush()
+
+    # Write outputs still waiting in buffer
+    output_buffer.flush()
+
     # Cancel any running tasks when shutting down
     session_ids: List[str] = TaskManager.get_all_session_ids()
     for session_id in session_ids:
         TaskManager.cancel_tasks(session_id)
 
-def cleanup_old_sessions() -> None:
-    """Delete session folders older than SESSION_LIFETIME.
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
-    Scans the user_files directory and removes any session folders
-    that have not been modified within the SESSION_LIFETIME period.
-    """
-    now = time.time()
-    for session_id in os.listdir(USER_FILES_DIR):
-        session_path = os.path.join(USER_FILES_DIR, session_id)
-        if os.path.isdir(session_path):
-            last_modified = os.path.getmtime(session_path)
-            if now - last_modified > SESSION_LIFETIME:
-                shutil.rmtree(session_path)
-                main_logger.info(f"session_id={session_id}")
-
-def run_cleanup() -> None:
-    """Run cleanup function every SESSION_LIFETIME.
-
-    This function is intended to be run in a separate thread to
-    periodically clean up old session directories.
+class RequestSizeLimitMiddleware:
+    """Rejects uploads by Content-Length before their body is received and spooled.
+
+    Plain ASGI middleware, responses of other requests pass through unchanged.
     """
-    while True:
-        cleanup_old_sessions()
-        time.sleep(SESSION_LIFETIME)
 
-app = FastAPI(lifespan=lifespan)
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]) -> None:
+        """Constructor for request size limit middleware.
+
+        Args:
+            app (ASGIApp): Wrapped application.
+            limits (Dict[str, int]): Largest request body in bytes by path.
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is not None:
+            content_length = Headers(scope=scope).get("content-length", "")
+            if content_length.isdigit() and int(content_length) > limit:
+                response = ORJSONResponse(status_code=413, content={"detail": f"Request exceeds limit of {limit // (1024 * 1024)} MB"})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+# Largest request bodies of upload endpoints, added before CORS so rejections get CORS headers as well
+app.add_middleware(RequestSizeLimitMiddleware, limits={
+    "/upload": MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    "/batch": MAX_FILE_SIZE * MAX_BATCH_FILES + MULTIPART_OVERHEAD,
+})
 
 # Cross-Origin Resource Sharing
 app.add_middleware(
@@ -79,10 +127,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "X-Requested-With", "Accept", "Origin", "Authorization"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "ETag"],
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 
+# Compress large JSON responses and downloads not already compressed with Brotli
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
 # Service endpoints
 @app.get("/ping")
 def ping():
@@ -92,21 +143,16 @@ def ping():
 @app.get("/statistics")
 def statistics():
     """Send stats."""
-    # Check if statistics file exists
-    props.check_statistics()
-
-    # Load the existing data from the JSON file
-    statistics_file = Path(__file__).parent / '../shared/statistics.json'
-    with open(statistics_file, 'r') as file:
-        data: StatisticsData = json.load(file)
-
-    count_uploaded = data['files_processed']['upload']
-    count_downloaded = data['files_processed']['download']
-    count_total = data['files_processed']['total']
-    count_shifted = data['files_processed']['shift']
-    count_aligned = data['files_processed']['align']
-    count_cleaned = data['files_processed']['clean']
-    count_translated = data['files_processed']['translate']
+    # Read counters from memory
+    count_uploaded = int(StatisticsManager.get('upload'))
+    count_downloaded = int(StatisticsManager.get('download'))
+    count_total = int(StatisticsManager.get('total'))
+    count_shifted = int(StatisticsManager.get('shift'))
+    count_aligned = int(StatisticsManager.get('align'))
+    count_cleaned = int(StatisticsManager.get('clean'))
+    count_transformed = int(StatisticsManager.get('transform'))
+    count_validated = int(StatisticsManager.get('validate'))
+    count_translated = int(StatisticsManager.get('translate'))
 
     main_logger.info("sent")
 
@@ -117,9 +163,23 @@ def statistics():
         "shifted": count_shifted,
         "aligned": count_aligned,
         "cleaned": count_cleaned,
+        "transformed": count_transformed,
+        "validated": count_validated,
         "translated": count_translated,
     }
 
+@app.get("/metrics")
+def metrics():
+    """Send internal performance counters."""
+    return {
+        "result_cache": result_cache.metrics(),
+        "document_cache": document_cache.metrics(),
+        "engines": engine_health(),
+        "latency": latency_model.metrics(),
+        "throttle": throttle_metrics(),
+        "cassettes": cassette_metrics(),
+    }
+
 @app.post("/frontend-error")
 async def frontend_error(error: str):
     main_logger.info(error)
@@ -138,12 +198,59 @@ async def get_session() -> Dict[str, str]:
     session_id = str(uuid.uuid4())
     session_path = os.path.join(USER_FILES_DIR, session_id)
     os.makedirs(session_path, exist_ok=True)
+    session_index.touch(session_id)
     main_logger.info(f"session_id={session_id}")
     return {"session_id": session_id}
 
+async def save_upload(file: UploadFile, file_location: str, max_size: int = MAX_FILE_SIZE) -> str:
+    """Copy uploaded file to disk in fixed-size chunks and check its size.
+
+    Starlette has already spooled the request body when the endpoint runs,
+    oversized requests are rejected earlier by `RequestSizeLimitMiddleware` if they
+    report Content-Length. This check covers the rest, e.g. chunked requests
+    or one file of a batch above the per-file limit. The file is written to a
+    temporary file in the destination directory and moved into place only
+    after it was copied completely, so a partial file never replaces an
+    existing one.
+
+    Args:
+        file (UploadFile): The uploaded file.
+        file_location (str): Destination path.
+        max_size (int): Size limit in bytes. Defaults to MAX_FILE_SIZE.
+
+    Returns:
+        str: SHA-256 hex digest of file content.
+
+    Raises:
+        HTTPException: If file size exceeds the limit.
+    """
+    size_error = HTTPException(status_code=400, detail=f"File exceeds limit of {max_size // (1024 * 1024)} MB")
+
+    # Size of spooled file is known before copying
+    if file.size is not None and file.size > max_size:
+        raise size_error
+
+    file_hash = hashlib.sha256()
+    file_size = 0
+    buffer = tempfile.NamedTemporaryFile(dir=os.path.dirname(file_location), prefix='.upload-', delete=False)
+    try:
+        with buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise size_error
+                file_hash.update(chunk)
+                buffer.write(chunk)
+        os.replace(buffer.name, file_location)
+    except BaseException:
+        os.unlink(buffer.name)
+        raise
+
+    return file_hash.hexdigest()
+
 @app.post("/upload")
 async def upload_file(
-    session_id: str = Form(...),
+    session_id: SessionId = Form(...),
     file: UploadFile = File(...)
 ) -> Dict[str, Any]:
     """Upload and validate subtitle file.
@@ -175,59 +282,110 @@ async def upload_file(
     assert isinstance(safe_filename, str)
     file_location = os.path.join(session_path, safe_filename)
 
-    # Read file content to check size
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File exceeds limit of 1 MB")
+    # Stream file to disk while checking its size
+    file_hash = await save_upload(file, file_location)
 
-    # Save file
-    with open(file_location, "wb") as buffer:
-        buffer.write(contents)
+    # Share content with identical uploads from other sessions
+    await run_in_threadpool(blob_store.add_file, file_location, file_hash)
+    await run_in_threadpool(session_index.add_file, session_id, file_location)
 
-    main_logger.info(f"session_id={session_id}, filename={file.filename}")
+    main_logger.info(f"session_id={session_id}, filename={file.filename}, sha256={file_hash}")
 
-    # Update statistics file
-    props.update_statitics('upload')
+    # Update statistics counters
+    StatisticsManager.record('upload')
 
     return {
         "session_id": session_id,
         "filename": safe_filename,
         "file_path": file_location,
+        "sha256": file_hash,
         "message": "File uploaded successfully"
     }
 
 @app.get("/download")
-async def download_file(session_id: str, filename: str) -> FileResponse:
+async def download_file(
+    session_id: SessionId,
+    filename: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+) -> Response:
     """Download a processed file.
 
+    Fresh outputs are served from memory before they reach the disk. Every
+    response carries a weak ETag with the SHA-256 digest of file content,
+    the same for all encodings, so clients repeating a download with
+    If-None-Match get 304 Not Modified.
+    Files are compressed with Brotli when it is installed and accepted by
+    client, otherwise GZipMiddleware compresses them.
+
     Args:
         session_id (str): The session ID for the current user.
         filename (str): The name of the file to download.
+        if_none_match (Optional[str]): ETag of the copy the client already has.
+        accept_encoding (Optional[str]): Encodings supported by client.
 
     Returns:
-        FileResponse: The requested file as a downloadable response.
+        Response: The requested file as a downloadable response.
 
     Raises:
         HTTPException: If the requested file is not found.
     """
     file_path = os.path.join(USER_FILES_DIR, session_id, filename)
+    session_index.touch(session_id)
 
-    # Update statistics file
-    props.update_statitics('download')
+    # Update statistics counters
+    StatisticsManager.record('download')
 
-    if not os.path.exists(file_path):
+    buffered = output_buffer.get(file_path)
+    if buffered is None and not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     main_logger.info(f"session_id={session_id}, filename={filename}")
-    return FileResponse(file_path, filename=filename, media_type="application/octet-stream")
+
+    content = buffered[0] if buffered else None
+    digest = buffered[1] if buffered else blob_store.digest_of(file_path)
+    size = len(content) if content is not None else os.path.getsize(file_path)
+    use_brotli = negotiate_brotli(accept_encoding, size)
+
+    # Weak ETag is valid for every encoding, GZipMiddleware may compress response after it is set
+    headers: Dict[str, str] = {}
+    if use_brotli or 'gzip' not in (accept_encoding or '') or size < COMPRESSION_MIN_SIZE:
+        headers["Vary"] = "Accept-Encoding"  # Otherwise added by GZipMiddleware
+    if digest:
+        headers["ETag"] = f'W/"{digest}"'
+        client_tags = [tag.strip().removeprefix('W/') for tag in (if_none_match or '').split(',')]
+        if f'"{digest}"' in client_tags or '*' in client_tags:
+            return Response(status_code=304, headers={**headers, "Vary": "Accept-Encoding"})
+
+    if use_brotli:
+        content = await run_in_threadpool(brotli_compress, content if content is not None else output_buffer.read(file_path))
+        headers["Content-Encoding"] = "br"
+
+    if content is not None:
+        quoted_filename = quote(filename)
+        headers["Content-Disposition"] = (
+            f"attachment; filename*=utf-8''{quoted_filename}" if quoted_filename != filename
+            else f'attachment; filename="{filename}"'
+        )
+        return Response(content, media_type="application/octet-stream", headers=headers)
+    return FileResponse(file_path, filename=filename, media_type="application/octet-stream", headers=headers)
 
 @app.post("/task-status")
 async def check_task_status(request: StatusRequest) -> Dict[str, Any]:
     """Check if a processed file exists from a background task."""
     session_path = os.path.join(USER_FILES_DIR, request.session_id)
+    session_index.touch(request.session_id)
 
     # Get tasks for this session
     tasks = TaskManager.get_tasks(request.session_id)
 
+    # Output of finished task may still be only in memory
+    result = TaskManager.get_result(request.session_id, request.filename)
+    if result:
+        return {
+            "status": "completed",
+            **result
+        }
+
     # Check for possible processed filenames
     source_name = os.path.splitext(request.filename)[0]
     possible_files = [
@@ -235,34 +393,37 @@ async def check_task_status(request: StatusRequest) -> Dict[str, Any]:
         if f.startswith(source_name) and f != request.filename
     ]
 
-    if possible_files:
+    if tasks:
+        # Tasks are still running, files on disk may be parts of their output
+        return {
+            "status": "processing",
+            "tasks_count": len(tasks)
+        }
+    elif possible_files:
         # Return the most recently modified file
         latest_file = max(possible_files, key=lambda f: os.path.getmtime(os.path.join(session_path, f)))
         return {
             "status": "completed",
             "processed_filename": latest_file
         }
-    elif tasks:
-        # Tasks are still running
-        return {
-            "status": "processing",
-            "tasks_count": len(tasks)
-        }
     else:
         return {
             "status": "unknown"  # No tasks found and no output files
         }
 
 @app.post("/info")
-async def show_subtitles(request: ShowRequest) -> Dict[str, Any]:
+async def show_subtitles(request: ShowRequest) -> Response:
     """Retrieve information about a subtitle file.
 
+    Cues themselves are not included, they are fetched page by page from /cues.
+    Response body is serialized once per parsed document and translation estimates.
+
     Args:
         request (ShowRequest): Request containing session ID and filename.
 
     Returns:
-        Dict[str, Any]: Dictionary containing file information, subtitles preview,
-                       and metadata like encoding and language.
+        Response: JSON with file information, number of subtitles
+                  and metadata like encoding and language.
 
     Raises:
         HTTPException: If an error occurs during processing.
@@ -270,50 +431,125 @@ async def show_subtitles(request: ShowRequest) -> Dict[str, Any]:
     try:
         # Load the session and file
         session_id, filename = request.session_id, request.filename
+        session_index.touch(session_id)
 
-        # Initialize SubEdit object
+        # Parse file or reuse parsed document
         file_path = os.path.join(USER_FILES_DIR, session_id, filename)
-        subedit = SubEdit([file_path])
+        document = await run_in_threadpool(document_cache.get, file_path)
 
-        # Apply shifting
-        subedit.pass_info()
+        # Return response with metadata
+        subtitles_data = document.data
 
-        # Return response with preview and metadata
-        subtitles_data = subedit.subtitles_data[subedit.source_file]
+        # Estimates follow learned latency and throttle, so they are computed for every request
+        engine_eta, duck_eta = await run_in_threadpool(lambda: (
+            props.calculate_engine_translation_eta(subtitles_data),
+            props.calculate_duck_translation_eta(subtitles_data)
+        ))
 
-        return {
+        payload = document.payload(('info', engine_eta, duck_eta), lambda: {
             "session_id": session_id,
             "filename": filename,
             "message": "Subtitles info passed",
-            "preview": subtitles_data['subtitles'],
+            "count": document.count,
             "encoding": subtitles_data['metadata']['encoding'],
             "confidence": subtitles_data['metadata']['confidence'],
             "language": subtitles_data['metadata']['language'],
-            "engine_eta": subtitles_data['engine_eta'],
-            "duck_eta": subtitles_data['duck_eta'],
-        }
+            "engine_eta": engine_eta,
+            "duck_eta": duck_eta,
+        })
+        return Response(payload, media_type="application/json")
 
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/cues")
+async def show_cues(request: CuesRequest) -> Response:
+    """Retrieve a page of subtitles.
+
+    Subtitles are paged in index order, or in start time order if a time
+    window is set with start_ms and/or end_ms. Equal start_ms and end_ms
+    return subtitles shown at that moment. Serialized pages are kept with
+    parsed document and reused by following requests.
+
+    Args:
+        request (CuesRequest): Request containing session ID, filename, page and optional time window.
+
+    Returns:
+        Response: JSON with requested subtitles and number of matching subtitles.
+
+    Raises:
+        HTTPException: If file is not found or an error occurs during processing.
+    """
+    try:
+        # Load the session and file
+        session_id, filename = request.session_id, request.filename
+        session_index.touch(session_id)
+
+        # Parse file or reuse parsed document
+        file_path = os.path.join(USER_FILES_DIR, session_id, filename)
+        document = await run_in_threadpool(document_cache.get, file_path)
+
+        def build_page() -> Dict[str, Any]:
+            if request.start_ms is None and request.end_ms is None:
+                total = document.count
+                cues = document.page(request.offset, request.limit)
+            else:
+                total, cues = document.window(request.start_ms, request.end_ms, request.offset, request.limit)
+
+            return {
+                "session_id": session_id,
+                "filename": filename,
+                "offset": request.offset,
+                "total": total,
+                "cues": cues,
+            }
+
+        page_key = ('cues', request.offset, request.limit, request.start_ms, request.end_ms)
+        return Response(document.payload(page_key, build_page), media_type="application/json")
+
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def task_inputs(subedit: SubEdit) -> List[str]:
+    """Returns paths to files read by operation of SubEdit object."""
+    return [subedit.source_file] + ([subedit.example_file] if subedit.example_file else [])
+
 class TaskManager:
     """Manage background tasks using asyncio."""
 
     # Specify the type of _tasks dictionary
     _tasks: Dict[str, List[asyncio.Task[Any]]] = {}
+    _results: Dict[str, Dict[str, Dict[str, Any]]] = {}  # session -> source filename -> result
 
     @classmethod
-    def create_task(cls, session_id: str, coroutine: Coroutine[Any, Any, Any]) -> asyncio.Task[Any]:
-        """Create and track a new background task."""
+    def create_task(
+        cls,
+        session_id: str,
+        coroutine: Coroutine[Any, Any, Any],
+        input_files: Optional[List[str]] = None
+    ) -> asyncio.Task[Any]:
+        """Create and track a new background task.
+
+        Input files are protected from session quota eviction until task is done.
+        """
         task: asyncio.Task[Any] = asyncio.create_task(coroutine)
         if session_id not in cls._tasks:
             cls._tasks[session_id] = []
         cls._tasks[session_id].append(task)
+        pinned_files = input_files or []
+        session_index.pin(session_id, pinned_files)
+
+        def task_done(finished: asyncio.Task[Any]) -> None:
+            session_index.unpin(session_id, pinned_files)
+            if finished in cls._tasks.get(session_id, []):
+                cls._tasks[session_id].remove(finished)
 
         # Set up callback to remove task when done
-        task.add_done_callback(
-            lambda t: cls._tasks[session_id].remove(t) if t in cls._tasks.get(session_id, []) else None
-        )
+        task.add_done_callback(task_done)
         return task
 
     @classmethod
@@ -329,6 +565,36 @@ class TaskManager:
             if not task.done():
                 task.cancel()
         cls._tasks[session_id] = []
+        cls._results.pop(session_id, None)
+
+    @classmethod
+    def set_result(
+        cls,
+        session_id: str,
+        source_filename: str,
+        processed_filename: str,
+        report: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Remember latest output produced from source file and report of its operation."""
+        result: Dict[str, Any] = {"processed_filename": processed_filename}
+        if report:
+            result["report"] = report
+        cls._results.setdefault(session_id, {})[source_filename] = result
+
+    @classmethod
+    def set_failure(cls, session_id: str, source_filename: str, error: str) -> None:
+        """Remember that processing of source file failed, so status polling can stop."""
+        cls._results.setdefault(session_id, {})[source_filename] = {"status": "failed", "error": error}
+
+    @classmethod
+    def discard_result(cls, session_id: str, source_filename: str) -> None:
+        """Forget output of source file before it is processed again."""
+        cls._results.get(session_id, {}).pop(source_filename, None)
+
+    @classmethod
+    def get_result(cls, session_id: str, source_filename: str) -> Optional[Dict[str, Any]]:
+        """Get latest output produced from source file, None if there is none yet."""
+        return cls._results.get(session_id, {}).get(source_filename)
 
     # Add this method to the TaskManager class:
     @classmethod
@@ -336,6 +602,99 @@ class TaskManager:
         """Get all session IDs that have active tasks."""
         return list(cls._tasks.keys())
 
+async def perform_cached_operation(
+    subedit: SubEdit,
+    operation: str,
+    parameters: Dict[str, Any],
+    publish: bool = True
+) -> None:
+    """Run operation unless result for the same input and parameters is cached.
+
+    Args:
+        subedit (SubEdit): SubEdit object with parsed input files.
+        operation (str): Operation name from SubEdit.OPERATIONS.
+        parameters (Dict[str, Any]): Keyword arguments for operation method.
+        publish (bool): Report output as result of source file in /task-status. Defaults to True,
+            False for parts of a job that reports its result itself.
+    """
+    session_id = os.path.basename(os.path.dirname(subedit.source_file))
+    source_file = subedit.source_file
+    source_filename = os.path.basename(source_file)
+    if publish:
+        TaskManager.discard_result(session_id, source_filename)
+
+    cache_key: Optional[str] = None
+    try:
+        # Cassette runs record or benchmark translation backends, cached results would skip them
+        if not CASSETTE_MODE:
+            # Uploaded files are stored by digest, hash only files outside of blob store
+            input_hashes: List[str] = []
+            for file_path in task_inputs(subedit):
+                digest = blob_store.digest_of(file_path)
+                input_hashes.append(digest if digest is not None else await run_in_threadpool(file_digest, file_path))
+            cache_key = ResultCache.make_key(input_hashes, operation, parameters)
+
+            restored = await run_in_threadpool(result_cache.restore, cache_key, source_file)
+            if restored:
+                restored_file, restored_digest, subedit.report = restored
+                await run_in_threadpool(blob_store.add_file, restored_file, restored_digest)
+                await run_in_threadpool(session_index.add_file, session_id, restored_file)
+                subedit.processed_file = os.path.basename(restored_file)
+                StatisticsManager.record('translate' if operation == 'duck' else operation)
+                if publish:
+                    TaskManager.set_result(session_id, source_filename, subedit.processed_file, subedit.report)
+                return
+
+        processed_file = await subedit.run_operation(operation, parameters)
+    except Exception as e:
+        if publish:
+            TaskManager.set_failure(session_id, source_filename, str(e))
+        raise
+
+    await publish_output(subedit, source_file, processed_file, publish, cache_key)
+
+async def publish_output(
+    subedit: SubEdit,
+    source_file: str,
+    processed_file: str,
+    publish: bool = True,
+    cache_key: Optional[str] = None
+) -> None:
+    """Publish operation output and share it once it is written to disk.
+
+    Args:
+        subedit (SubEdit): SubEdit object that produced output.
+        source_file (str): Path to file the job was started for.
+        processed_file (str): Path to output.
+        publish (bool): Report output as result of source file in /task-status. Defaults to True.
+        cache_key (str or None): Key of output in result cache, None if it isn't cached. Defaults to None.
+    """
+    session_id = os.path.basename(os.path.dirname(source_file))
+    source_filename = os.path.basename(source_file)
+
+    def store_output(file_path: str, digest: str) -> None:
+        """Share output and cache it once it is written to disk."""
+        try:
+            blob_store.add_file(file_path, digest)
+            session_index.add_file(session_id, file_path)
+            if cache_key is not None:
+                result_cache.store(cache_key, source_file, file_path, digest, subedit.report)
+        except Exception as e:
+            # Callback may run in writer thread, failure is published for status polling
+            if publish:
+                TaskManager.set_failure(session_id, source_filename, str(e))
+            raise
+
+    def publish_failure(file_path: str, error: Exception) -> None:
+        """Replace published result of output that couldn't be written to disk."""
+        if publish:
+            TaskManager.set_failure(session_id, source_filename, f'Output was not written: {error}')
+
+    # Output is served from memory until writer stores it, result is published first so storing failure replaces it
+    if publish:
+        TaskManager.set_result(session_id, source_filename, os.path.basename(processed_file), subedit.report)
+    await run_in_threadpool(output_buffer.when_written, processed_file, store_output, publish_failure)
+
 @app.post("/shift")
 async def shift_subtitles(request: ShiftRequest) -> Dict[str, Any]:
     """Shift the timing of subtitles by a specified delay."""
@@ -344,12 +703,14 @@ async def shift_subtitles(request: ShiftRequest) -> Dict[str, Any]:
             f"session_id={request.session_id}, "
             f"filename={request.source_filename}, "
             f"delay={request.delay}, "
-            f"items={request.items}"
+            f"items={request.items}, "
+            f"time_range={request.time_range}"
         )
 
         # Load the session and file
         session_id, source_filename = request.session_id, request.source_filename
-        shift_delay, shift_items = request.delay, request.items
+        session_index.touch(session_id)
+        shift_delay, shift_items, time_range = request.delay, request.items, request.time_range
 
         # Initialize SubEdit object
         file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
@@ -358,7 +719,8 @@ async def shift_subtitles(request: ShiftRequest) -> Dict[str, Any]:
         # Create task using asyncio
         TaskManager.create_task(
             session_id,
-            perform_shift_task(subedit, shift_delay, shift_items, session_id, source_filename)
+            perform_shift_task(subedit, shift_delay, shift_items, time_range, session_id, source_filename),
+            task_inputs(subedit)
         )
 
         # Return immediate response with status
@@ -376,12 +738,13 @@ async def perform_shift_task(
     subedit: SubEdit,
     delay: int,
     items: Optional[List[int]],
+    time_range: Optional[TimeRange],
     session_id: str,
     source_filename: str
 ) -> None:
     """Perform the subtitle shifting task in the background."""
     try:
-        subedit.shift_timing(delay=delay, items=items)
+        await perform_cached_operation(subedit, 'shift', {'delay': delay, 'items': items, 'time_range': time_range})
     except Exception as e:
         main_logger.info(f"error: {str(e)}")
 
@@ -396,11 +759,17 @@ async def align_subtitles(request: AlignRequest) -> Dict[str, Any]:
             f"source_slice={request.source_slice}, "
             f"example_slice={request.example_slice}, "
             f"trim_start={request.trim_start}, "
-            f"trim_end={request.trim_end}"
+            f"trim_end={request.trim_end}, "
+            f"source_range={request.source_range}, "
+            f"example_range={request.example_range}, "
+            f"anchors={request.anchors}, "
+            f"auto_sync={request.auto_sync}, "
+            f"match_text={request.match_text}"
         )
 
         # Load the session and file
         session_id, source_filename = request.session_id, request.source_filename
+        session_index.touch(session_id)
         source_slice, example_slice = request.source_slice, request.example_slice
         trim_start, trim_end = request.trim_start, request.trim_end
 
@@ -419,7 +788,19 @@ async def align_subtitles(request: AlignRequest) -> Dict[str, Any]:
         # Create task using asyncio
         TaskManager.create_task(
             session_id,
-            perform_align_task(subedit, source_slice, example_slice, trim_start, trim_end)
+            perform_align_task(
+                subedit,
+                source_slice,
+                example_slice,
+                trim_start,
+                trim_end,
+                request.source_range,
+                request.example_range,
+                request.anchors,
+                request.auto_sync,
+                request.match_text
+            ),
+            task_inputs(subedit)
         )
 
         # Return immediate response with status
@@ -438,14 +819,80 @@ async def perform_align_task(
     source_slice: Optional[List[int]],
     example_slice: Optional[List[int]],
     trim_start: bool,
-    trim_end: bool
+    trim_end: bool,
+    source_range: Optional[TimeRange] = None,
+    example_range: Optional[TimeRange] = None,
+    anchors: Optional[List[List[int]]] = None,
+    auto_sync: bool = False,
+    match_text: bool = False
 ) -> None:
     """Perform the subtitle alignment task in the background."""
     try:
-        subedit.align_timing(source_slice=source_slice, example_slice=example_slice, trim_start=trim_start, trim_end=trim_end)
+        await perform_cached_operation(subedit, 'align', {
+            'source_slice': source_slice,
+            'example_slice': example_slice,
+            'trim_start': trim_start,
+            'trim_end': trim_end,
+            'source_range': source_range,
+            'example_range': example_range,
+            'anchors': anchors,
+            'auto_sync': auto_sync,
+            'match_text': match_text
+        })
     except Exception as e:
         main_logger.info(f"error: {str(e)}")
 
+@app.post("/match")
+async def match_subtitles(request: MatchRequest) -> Dict[str, Any]:
+    """Find corresponding subtitles of two files by their text.
+
+    Matched pairs can be passed to /align as anchors, or alignment can
+    match them itself with match_text.
+
+    Args:
+        request (MatchRequest): Request containing session ID, source and example filenames and minimal similarity.
+
+    Returns:
+        Dict[str, Any]: Matched source and example indices with their text similarity.
+
+    Raises:
+        HTTPException: If file is not found or an error occurs during processing.
+    """
+    try:
+        main_logger.info(
+            f"session_id={request.session_id}, "
+            f"filename={request.source_filename}, "
+            f"example_filename={request.example_filename}, "
+            f"min_similarity={request.min_similarity}"
+        )
+
+        # Load the session and files
+        session_id = request.session_id
+        session_index.touch(session_id)
+        source = await run_in_threadpool(document_cache.get, os.path.join(USER_FILES_DIR, session_id, request.source_filename))
+        example = await run_in_threadpool(document_cache.get, os.path.join(USER_FILES_DIR, session_id, request.example_filename))
+
+        # Match cues outside of event loop
+        matches = await run_in_threadpool(
+            match_cues,
+            source.data['subtitles'],
+            example.data['subtitles'],
+            min_similarity=request.min_similarity
+        )
+
+        return {
+            "session_id": session_id,
+            "source_filename": request.source_filename,
+            "example_filename": request.example_filename,
+            "matches": matches,
+            "anchors": [[match["source"], match["example"]] for match in matches],
+        }
+
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/clean")
 async def clean_subtitles(request: CleanRequest) -> Dict[str, Any]:
     """Clean markup from subtitles based on specified options."""
@@ -458,11 +905,14 @@ async def clean_subtitles(request: CleanRequest) -> Dict[str, Any]:
             f"underline={request.underline}, "
             f"strikethrough={request.strikethrough}, "
             f"color={request.color}"
-            f"font={request.font}"
+            f"font={request.font}, "
+            f"items={request.items}, "
+            f"time_range={request.time_range}"
         )
 
         # Load the session and file
         session_id, source_filename = request.session_id, request.source_filename
+        session_index.touch(session_id)
         file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
 
         # Initialize SubEdit object
@@ -478,8 +928,11 @@ async def clean_subtitles(request: CleanRequest) -> Dict[str, Any]:
                 request.underline,
                 request.strikethrough,
                 request.color,
-                request.font
-            )
+                request.font,
+                request.items,
+                request.time_range
+            ),
+            task_inputs(subedit)
         )
 
         # Return immediate response with status
@@ -500,19 +953,137 @@ async def perform_clean_task(
     underline: bool,
     strikethrough: bool,
     color: bool,
-    font: bool
+    font: bool,
+    items: Optional[List[int]] = None,
+    time_range: Optional[TimeRange] = None
 ) -> None:
     """Perform the markup cleaning task in the background."""
     try:
         # Apply markup cleaning in the background
-        subedit.clean_markup(
-            bold=bold,
-            italic=italic,
-            underline=underline,
-            strikethrough=strikethrough,
-            color=color,
-            font=font
+        await perform_cached_operation(subedit, 'clean', {
+            'bold': bold,
+            'italic': italic,
+            'underline': underline,
+            'strikethrough': strikethrough,
+            'color': color,
+            'font': font,
+            'items': items,
+            'time_range': time_range
+        })
+    except Exception as e:
+        main_logger.info(f"error: {str(e)}")
+
+@app.post("/transform")
+async def transform_subtitles(request: TransformRequest) -> Dict[str, Any]:
+    """Convert framerate, scale and shift subtitles timing in one pass."""
+    try:
+        main_logger.info(
+            f"session_id={request.session_id}, "
+            f"filename={request.source_filename}, "
+            f"offset={request.offset}, "
+            f"scale={request.scale}, "
+            f"anchor={request.anchor}, "
+            f"source_fps={request.source_fps}, "
+            f"target_fps={request.target_fps}, "
+            f"items={request.items}, "
+            f"time_range={request.time_range}"
+        )
+
+        # Load the session and file
+        session_id, source_filename = request.session_id, request.source_filename
+        session_index.touch(session_id)
+        file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
+
+        # Validate framerates before starting background task
+        if (request.source_fps is None) != (request.target_fps is None):
+            raise ValueError("source_fps and target_fps must be set together")
+
+        # Initialize SubEdit object
+        subedit = SubEdit([file_path])
+
+        # Create task using asyncio
+        TaskManager.create_task(
+            session_id,
+            perform_transform_task(subedit, request),
+            task_inputs(subedit)
         )
+
+        # Return immediate response with status
+        return {
+            "session_id": session_id,
+            "source_filename": source_filename,
+            "message": "Timing transform started in the background",
+            "status": "processing"
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def perform_transform_task(subedit: SubEdit, request: TransformRequest) -> None:
+    """Perform the timing transform task in the background."""
+    try:
+        await perform_cached_operation(subedit, 'transform', {
+            'offset': request.offset,
+            'scale': request.scale,
+            'anchor': request.anchor,
+            'source_fps': request.source_fps,
+            'target_fps': request.target_fps,
+            'items': request.items,
+            'time_range': request.time_range
+        })
+    except Exception as e:
+        main_logger.info(f"error: {str(e)}")
+
+@app.post("/validate")
+async def validate_subtitles(request: ValidateRequest) -> Dict[str, Any]:
+    """Check subtitles timing and optionally fix overlaps, durations and numbering."""
+    try:
+        main_logger.info(
+            f"session_id={request.session_id}, "
+            f"filename={request.source_filename}, "
+            f"min_gap_ms={request.min_gap_ms}, "
+            f"fix={request.fix}"
+        )
+
+        # Load the session and file
+        session_id, source_filename = request.session_id, request.source_filename
+        session_index.touch(session_id)
+        file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
+
+        # Validate fix modes before starting background task
+        unknown_modes = set(request.fix) - set(FIX_MODES)
+        if unknown_modes:
+            raise ValueError(f"Unknown fix modes: {sorted(unknown_modes)}")
+
+        # Initialize SubEdit object
+        subedit = SubEdit([file_path])
+
+        # Create task using asyncio
+        TaskManager.create_task(
+            session_id,
+            perform_validate_task(subedit, request.min_gap_ms, request.fix),
+            task_inputs(subedit)
+        )
+
+        # Return immediate response with status
+        return {
+            "session_id": session_id,
+            "source_filename": source_filename,
+            "message": "Timing validation started in the background",
+            "status": "processing"
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def perform_validate_task(subedit: SubEdit, min_gap_ms: int, fix: List[str]) -> None:
+    """Perform the timing validation task in the background."""
+    try:
+        await perform_cached_operation(subedit, 'validate', {'min_gap_ms': min_gap_ms, 'fix': fix})
     except Exception as e:
         main_logger.info(f"error: {str(e)}")
 
@@ -524,39 +1095,72 @@ async def engine_translate_subtitles(request: EngineRequest) -> Dict[str, Any]:
             f"session_id={request.session_id}, "
             f"filename={request.source_filename}, "
             f"target_language={request.target_language}, "
+            f"target_languages={request.target_languages}, "
             f"original_language={request.original_language}, "
             f"engine={request.engine}, "
             f"clean_markup={request.clean_markup}, "
+            f"failover={request.failover}"
         )
 
         # Load the session and file
         session_id, source_filename = request.session_id, request.source_filename
+        session_index.touch(session_id)
 
         # Initialize SubEdit object
         file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
         subedit = SubEdit([file_path])
 
-        # Create task using asyncio
-        TaskManager.create_task(
-            session_id,
-            perform_engine_task(
+        # Validate engine and languages before starting background task
+        target_languages = request.target_languages or ([request.target_language] if request.target_language else [])
+        if not target_languages:
+            raise ValueError("target_language or target_languages is required")
+        original_language = request.original_language or subedit.subtitles_data[subedit.source_file]['metadata']['language']
+        for target_language in target_languages:
+            _, _, engine_limit = engines_config.get().resolve(request.engine, original_language, target_language)
+
+        # Estimate duration from learned engine latency and requests already waiting for it
+        estimate = props.estimate_engine_translation(
+            subedit.subtitles_data[subedit.source_file],
+            engine=request.engine,
+            engine_limit=engine_limit,
+            languages=len(set(target_languages))
+        )
+
+        # Create task using asyncio, several languages share one parsed and prepared file
+        if request.target_languages:
+            task = perform_engine_fanout_task(
                 subedit=subedit,
                 source_filename=source_filename,
-                target_language=request.target_language,
-                original_language=request.original_language,
+                target_languages=list(dict.fromkeys(request.target_languages)),
+                original_language=original_language,
                 engine=request.engine,
-                clean_markup=request.clean_markup
+                clean_markup=request.clean_markup,
+                failover=request.failover
             )
-        )
+        else:
+            task = perform_engine_task(
+                subedit=subedit,
+                source_filename=source_filename,
+                target_language=target_languages[0],
+                original_language=original_language,
+                engine=request.engine,
+                clean_markup=request.clean_markup,
+                failover=request.failover
+            )
+        TaskManager.create_task(session_id, task, task_inputs(subedit))
 
         # Return immediate response with status
         return {
             "session_id": session_id,
             "source_filename": source_filename,
             "message": "Engine translation started in the background",
-            "status": "processing"
+            "status": "processing",
+            "engine_eta": estimate['eta'],
+            "engine_eta_p90": estimate['eta_p90']
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -566,17 +1170,88 @@ async def perform_engine_task(
     target_language: str,
     original_language: Optional[str],
     engine: str,
-    clean_markup: bool
+    clean_markup: bool,
+    failover: bool = True
 ) -> None:
     """Perform the engine translation task in the background."""
     try:
-        await subedit.engine_translate(
-            target_language=target_language,
-            original_language=original_language,
-            engine=engine,
-            clean_markup=clean_markup
+        await perform_cached_operation(subedit, 'translate', {
+            'target_language': target_language,
+            'original_language': original_language,
+            'engine': engine,
+            'clean_markup': clean_markup,
+            'failover': failover
+        })
+
+    except asyncio.TimeoutError:
+        main_logger.info("timed out")
+    except Exception as e:
+        main_logger.info(f"error: {str(e)}")
+
+def create_translation_archive(archive_path: str, output_paths: List[str]) -> None:
+    """Pack translations of one file into zip archive, reading fresh outputs from memory."""
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for output_path in output_paths:
+            archive.writestr(os.path.basename(output_path), output_buffer.read(output_path))
+
+async def perform_engine_fanout_task(
+    subedit: SubEdit,
+    source_filename: str,
+    target_languages: List[str],
+    original_language: Optional[str],
+    engine: str,
+    clean_markup: bool,
+    failover: bool = True
+) -> None:
+    """Translate one file into several languages in the background.
+
+    Every language runs in a fork of the same SubEdit, so the file is parsed,
+    cleaned and chunked once, and languages are translated concurrently
+    within engine limits. Each translation is cached separately. Result of
+    the job is a zip archive with all translations, the report lists output
+    or error of every language.
+    """
+    try:
+        session_id = os.path.basename(os.path.dirname(subedit.source_file))
+        TaskManager.discard_result(session_id, source_filename)
+
+        forks = [subedit.fork() for _ in target_languages]
+        outcomes = await asyncio.gather(
+            *(
+                perform_cached_operation(fork, 'translate', {
+                    'target_language': target_language,
+                    'original_language': original_language,
+                    'engine': engine,
+                    'clean_markup': clean_markup,
+                    'failover': failover
+                }, publish=False)
+                for fork, target_language in zip(forks, target_languages)
+            ),
+            return_exceptions=True
         )
 
+        outputs: Dict[str, str] = {}
+        errors: Dict[str, str] = {}
+        for fork, target_language, outcome in zip(forks, target_languages, outcomes):
+            if isinstance(outcome, BaseException):
+                main_logger.info(f"error: {target_language}: {str(outcome)}")
+                errors[target_language] = str(outcome)
+            else:
+                outputs[target_language] = fork.processed_file
+        if not outputs:
+            TaskManager.set_failure(session_id, source_filename, f"Translation failed for all languages: {errors}")
+            return
+
+        # Pack translations into one archive
+        source_name = os.path.splitext(source_filename)[0]
+        archive_filename = f"{source_name}-translated-to-{'-'.join(outputs)}-with-{props.sanitize_filename(engine)}.zip"
+        archive_path = os.path.join(USER_FILES_DIR, session_id, archive_filename)
+        output_paths = [os.path.join(USER_FILES_DIR, session_id, filename) for filename in outputs.values()]
+        await run_in_threadpool(create_translation_archive, archive_path, output_paths)
+        await run_in_threadpool(session_index.add_file, session_id, archive_path)
+
+        TaskManager.set_result(session_id, source_filename, archive_filename, {"outputs": outputs, "errors": errors})
+
     except asyncio.TimeoutError:
         main_logger.info("timed out")
     except Exception as e:
@@ -601,11 +1276,26 @@ if DEBUG:
 
             # Load the session and file information
             session_id, source_filename = request.session_id, request.source_filename
+            session_index.touch(session_id)
             file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
 
             # Initialize SubEdit object
             subedit = SubEdit([file_path])
 
+            # Validate model and languages before starting background task
+            translate_from, translate_to, _, model_tokens = duck_config.get().resolve(request.model_name, request.original_language, request.target_language)
+
+            # Estimate duration from learned model latency
+            estimate = props.estimate_duck_translation(
+                subedit.subtitles_data[subedit.source_file],
+                translate_from,
+                translate_to,
+                model_name=request.model_name,
+                model_limit=model_tokens,
+                model_throttle=request.model_throttle,
+                request_timeout=request.request_timeout
+            )
+
             # Create task using asyncio
             TaskManager.create_task(
                 session_id,
@@ -617,7 +1307,8 @@ if DEBUG:
                     request.model_throttle,
                     request.request_timeout,
                     request.response_timeout
-                )
+                ),
+                task_inputs(subedit)
             )
 
             # Return immediate response with status
@@ -625,9 +1316,13 @@ if DEBUG:
                 "session_id": session_id,
                 "source_filename": source_filename,
                 "message": f"Duck Translation to {request.target_language} started in the background",
-                "status": "processing"
+                "status": "processing",
+                "duck_eta": estimate['eta'],
+                "duck_eta_p90": estimate['eta_p90']
             }
 
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -636,25 +1331,263 @@ if DEBUG:
         target_language: str,
         original_language: str,
         model_name: str,
-        model_throttle: float,
+        model_throttle: Optional[float],
         request_timeout: int,
         response_timeout: int
     ) -> None:
         """Perform the duck translation task in the background."""
         try:
-            await subedit.duck_translate(
-                target_language=target_language,
-                original_language=original_language,
-                model_name=model_name,
-                model_throttle=model_throttle,
-                request_timeout=request_timeout,
-                response_timeout=response_timeout
-            )
+            await perform_cached_operation(subedit, 'duck', {
+                'target_language': target_language,
+                'original_language': original_language,
+                'model_name': model_name,
+                'model_throttle': model_throttle,
+                'request_timeout': request_timeout,
+                'response_timeout': response_timeout
+            })
 
         except asyncio.TimeoutError:
             main_logger.info("timed out")
         except Exception as e:
             main_logger.info(f"error: {str(e)}")
 
+@app.post("/pipeline")
+async def pipeline_subtitles(request: PipelineRequest) -> Dict[str, Any]:
+    """Apply several operations to subtitles in one background task."""
+    try:
+        main_logger.info(
+            f"session_id={request.session_id}, "
+            f"filename={request.source_filename}, "
+            f"stages={[stage.operation for stage in request.stages]}, "
+            f"keep_intermediate={request.keep_intermediate}"
+        )
+
+        # Load the session and file
+        session_id, source_filename = request.session_id, request.source_filename
+        session_index.touch(session_id)
+        file_path = os.path.join(USER_FILES_DIR, session_id, source_filename)
+
+        # Validate every stage before starting background task
+        for stage in request.stages:
+            SubEdit.check_operation(stage.operation, stage.parameters)
+
+        # Initialize SubEdit object
+        subedit = SubEdit([file_path])
+
+        # Create task using asyncio
+        TaskManager.create_task(
+            session_id,
+            perform_pipeline_task(subedit, request.stages, request.keep_intermediate),
+            task_inputs(subedit)
+        )
+
+        # Return immediate response with status
+        return {
+            "session_id": session_id,
+            "source_filename": source_filename,
+            "message": f"Pipeline of {len(request.stages)} operations started in the background",
+            "status": "processing"
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def perform_pipeline_task(
+    subedit: SubEdit,
+    stages: List[OperationSpec],
+    keep_intermediate: bool
+) -> None:
+    """Perform the operations pipeline in the background."""
+    source_file = subedit.source_file
+    try:
+        TaskManager.discard_result(os.path.basename(os.path.dirname(source_file)), os.path.basename(source_file))
+        processed_file = await subedit.run_pipeline(stages, keep_intermediate=keep_intermediate)
+        main_logger.info(f"stage_timings={subedit.stage_timings}")
+
+        # Pipeline moves source_file of subedit along stages, result belongs to the original one
+        await publish_output(subedit, source_file, processed_file)
+    except asyncio.TimeoutError:
+        main_logger.info("timed out")
+    except Exception as e:
+        main_logger.info(f"error: {str(e)}")
+        TaskManager.set_failure(os.path.basename(os.path.dirname(source_file)), os.path.basename(source_file), str(e))
+
+def unique_location(directory: str, filename: str) -> str:
+    """Returns path of filename in directory, numbered if a file with the same name already exists."""
+    name, ext = os.path.splitext(filename)
+    file_location = os.path.join(directory, filename)
+    number = 1
+    while os.path.exists(file_location):
+        number += 1
+        file_location = os.path.join(directory, f"{name}-{number}{ext}")
+    return file_location
+
+def extract_archive(archive_path: str, destination: str) -> List[str]:
+    """Extract subtitle files from zip archive.
+
+    Only files with allowed extensions are extracted, directories inside the
+    archive are flattened, filenames are sanitized and numbered when they repeat.
+
+    Args:
+        archive_path (str): Path to zip archive.
+        destination (str): Directory to extract files to.
+
+    Returns:
+        List[str]: Paths to extracted files.
+
+    Raises:
+        HTTPException: If archive is invalid or its content exceeds the limits.
+    """
+    extracted_files: List[str] = []
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                member_name = os.path.basename(member.filename)
+                if member.is_dir() or os.path.splitext(member_name)[1].lower() not in ALLOWED_EXTENSIONS:
+                    continue
+                if member.file_size > MAX_FILE_SIZE:
+                    raise HTTPException(status_code=400, detail=f"{member_name} exceeds limit of {MAX_FILE_SIZE_MB} MB")
+                if len(extracted_files) >= MAX_BATCH_FILES:
+                    raise HTTPException(status_code=400, detail=f"Batch exceeds limit of {MAX_BATCH_FILES} files")
+
+                file_location = unique_location(destination, props.sanitize_filename(member_name))
+                with archive.open(member) as source, open(file_location, 'wb') as target:
+                    shutil.copyfileobj(source, target, UPLOAD_CHUNK_SIZE)
+                extracted_files.append(file_location)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+
+    return extracted_files
+
+def process_batch_file(file_path: str, spec: OperationSpec) -> str:
+    """Apply batch operation to a single file in a worker thread.
+
+    Args:
+        file_path (str): Path to subtitle file.
+        spec (OperationSpec): Operation and its parameters.
+
+    Returns:
+        str: Path to processed file.
+    """
+    subedit = SubEdit([file_path])
+    return asyncio.run(subedit.run_operation(spec.operation, spec.parameters))
+
+def create_batch_archive(archive_path: str, results: List[Dict[str, Any]]) -> None:
+    """Pack processed files and batch report into zip archive.
+
+    Args:
+        archive_path (str): Path to zip archive.
+        results (List[Dict[str, Any]]): Processing result for every file in batch.
+    """
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            if result['processed_filename']:
+                # Read fresh outputs from memory instead of waiting for writer
+                archive.writestr(result['processed_filename'], output_buffer.read(result.pop('processed_path')))
+        archive.writestr('batch-report.json', json.dumps(results, indent=4))
+
+@app.post("/batch")
+async def batch_process(
+    session_id: SessionId = Form(...),
+    operation: str = Form(...),
+    files: List[UploadFile] = File(...)
+) -> FileResponse:
+    """Apply one operation to several subtitle files at once.
+
+    Files are processed in parallel by BATCH_EXECUTOR and returned together
+    in a single zip archive with a report of every file.
+
+    Args:
+        session_id (str): The session ID for the current user.
+        operation (str): JSON encoded OperationSpec, e.g. {"operation": "shift", "parameters": {"delay": 1000}}.
+        files (List[UploadFile]): Subtitle files or zip archives with subtitle files.
+
+    Returns:
+        FileResponse: Zip archive with processed files.
+
+    Raises:
+        HTTPException: If operation, files or archives are invalid.
+    """
+    try:
+        spec = OperationSpec.model_validate_json(operation)
+        SubEdit.check_operation(spec.operation, spec.parameters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    main_logger.info(
+        f"session_id={session_id}, "
+        f"files={len(files)}, "
+        f"operation={spec.operation}, "
+        f"parameters={spec.parameters}"
+    )
+
+    # Store batch files separately from files uploaded one by one
+    batch_id = uuid.uuid4().hex[:8]
+    batch_path = os.path.join(USER_FILES_DIR, session_id, f"batch-{batch_id}")
+    os.makedirs(batch_path, exist_ok=True)
+
+    # Save uploaded files and extract archives
+    file_paths: List[str] = []
+    for file in files:
+        safe_filename = props.sanitize_filename(str(file.filename or ""))
+        ext = os.path.splitext(safe_filename)[1].lower()
+        file_location = unique_location(batch_path, safe_filename)
+
+        if ext in ALLOWED_EXTENSIONS:
+            await save_upload(file, file_location)
+            file_paths.append(file_location)
+        elif ext == ".zip":
+            await save_upload(file, file_location, MAX_FILE_SIZE * MAX_BATCH_FILES)
+            file_paths.extend(await run_in_threadpool(extract_archive, file_location, batch_path))
+            os.remove(file_location)
+        else:
+            raise HTTPException(status_code=400, detail="Only SubRip .srt files and .zip archives are allowed")
+
+        if len(file_paths) > MAX_BATCH_FILES:
+            raise HTTPException(status_code=400, detail=f"Batch exceeds limit of {MAX_BATCH_FILES} files")
+        StatisticsManager.record('upload')
+
+    if not file_paths:
+        raise HTTPException(status_code=400, detail="No subtitle files found")
+
+    # Process files in parallel
+    loop = asyncio.get_running_loop()
+    outcomes = await asyncio.gather(
+        *(loop.run_in_executor(BATCH_EXECUTOR, process_batch_file, file_path, spec) for file_path in file_paths),
+        return_exceptions=True
+    )
+
+    results: List[Dict[str, Any]] = []
+    for file_path, outcome in zip(file_paths, outcomes):
+        if isinstance(outcome, BaseException):
+            main_logger.info(f"error: {os.path.basename(file_path)}: {str(outcome)}")
+            results.append({"filename": os.path.basename(file_path), "processed_filename": None, "error": str(outcome)})
+        else:
+            results.append({
+                "filename": os.path.basename(file_path),
+                "processed_filename": os.path.basename(outcome),
+                "processed_path": outcome,
+                "error": None
+            })
+
+    # Pack results into one archive
+    archive_filename = f"batch-{batch_id}-{spec.operation}.zip"
+    archive_path = os.path.join(USER_FILES_DIR, session_id, archive_filename)
+    processed_paths = [result['processed_path'] for result in results if result['processed_filename']]
+    await run_in_threadpool(create_batch_archive, archive_path, results)
+
+    # Account batch directory only after all outputs are on disk
+    for processed_path in processed_paths:
+        await run_in_threadpool(output_buffer.wait, processed_path)
+    await run_in_threadpool(session_index.add_file, session_id, batch_path)
+    await run_in_threadpool(session_index.add_file, session_id, archive_path)
+
+    StatisticsManager.record('download')
+
+    return FileResponse(archive_path, filename=archive_filename, media_type="application/zip")
+
 if __name__ == '__main__':
-    run_cleanup()
+    session_index.load()
+    session_index.run_cleanup()
@@ -0,0 +1,90 @@
+import re
+import functools
+from collections import Counter
+from typing import Dict, FrozenSet, List, Tuple
+
+# Markup tags, the same as `<.*?>` without crossing lines
+TAG_PATTERN = re.compile(r'<(/?)[ \t]*([a-zA-Z]*)([^>\n]*)>')
+ATTRIBUTE_PATTERN = re.compile(r'([a-zA-Z-]+)\s*=\s*("[^"]*"|\'[^\']*\'|[^\s"\']+)')
+
+# Tags removed by clean_markup flags, color and face flags remove attributes of <font>
+SIMPLE_TAGS = frozenset({'b', 'i', 'u', 's'})
+
+class MarkupCleaner:
+    """Removes selected markup tags from subtitle text in a single pass.
+
+    Text is tokenized with one compiled pattern and every tag is kept or
+    dropped by its name. Opening <font> tags lose only selected attributes
+    and are dropped when no attributes are left, closing </font> tags
+    follow their opening tag, so removing colors doesn't break font faces.
+    """
+
+    def __init__(self, tags: FrozenSet[str]) -> None:
+        """Constructor for markup cleaner.
+
+        Args:
+            tags (FrozenSet[str]): Tags and font attributes to remove, empty set removes all markup.
+        """
+        self.tags = tags
+        self.remove_all = not tags
+
+    def clean(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """Removes selected tags from text.
+
+        Args:
+            text (str): Subtitle text.
+
+        Returns:
+            Tuple[str, Dict[str, int]]: Cleaned text and number of removed tags by name.
+        """
+        if '<' not in text:
+            return text, {}
+
+        removed: Counter = Counter()
+        fonts: List[bool] = []  # Flags of open <font> tags, True if tag was dropped
+
+        def replace(match: re.Match) -> str:
+            closing, name, attributes = match.group(1), match.group(2).lower(), match.group(3)
+            if self.remove_all:
+                removed[name or 'other'] += 1
+                return ''
+
+            if name in SIMPLE_TAGS:
+                if name in self.tags:
+                    removed[name] += 1
+                    return ''
+                return match.group(0)
+
+            if name != 'font':
+                return match.group(0)
+
+            if closing:
+                # Unpaired closing tag is kept as is
+                if fonts and fonts.pop():
+                    return ''
+                return match.group(0)
+
+            # Drop selected attributes and the whole tag if nothing is left
+            kept = []
+            for attribute in ATTRIBUTE_PATTERN.finditer(attributes):
+                attribute_name = attribute.group(1).lower()
+                if attribute_name in self.tags:
+                    removed[attribute_name] += 1
+                else:
+                    kept.append(attribute.group(0))
+            if len(kept) == len(ATTRIBUTE_PATTERN.findall(attributes)):
+                fonts.append(False)
+                return match.group(0)
+            fonts.append(not kept)
+            return f'<font {" ".join(kept)}>' if kept else ''
+
+        return TAG_PATTERN.sub(replace, text), dict(removed)
+
+@functools.lru_cache(maxsize=None)
+def markup_cleaner(tags: FrozenSet[str] = frozenset()) -> MarkupCleaner:
+    """Returns cleaner for set of tags, one per combination of clean_markup flags."""
+    return MarkupCleaner(tags)
+
+def strip_markup(text: str) -> str:
+    """Returns text with all markup tags removed."""
+    return markup_cleaner().clean(text)[0]
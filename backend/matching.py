@@ -0,0 +1,212 @@
+import re
+import math
+import props
+import bisect
+from typing import Dict, List, Optional, Tuple
+from structures import CueMatch, SubtitleEntry
+
+# Constants
+MATCH_BAND = 32  # Cues a match may drift from diagonal of a gap between anchors
+MATCH_MIN_SIMILARITY = 0.5  # Lowest word overlap of matched cues
+
+# Markup tags, ASS override blocks and punctuation are ignored by matching
+MARKUP_PATTERN = re.compile(r'<[^>]*>|\{\\[^}]*\}')
+WORD_PATTERN = re.compile(r'\w+')
+
+def normalize_text(text: str) -> str:
+    """Returns lowercase subtitle text without markup, punctuation and extra whitespace."""
+    return ' '.join(WORD_PATTERN.findall(MARKUP_PATTERN.sub(' ', text).lower()))
+
+def similarity(source_words: frozenset, example_words: frozenset) -> float:
+    """Returns Jaccard similarity of two word sets."""
+    if not source_words or not example_words:
+        return 0.0
+    common = len(source_words & example_words)
+    return common / (len(source_words) + len(example_words) - common)
+
+def unique_anchors(source_texts: List[str], example_texts: List[str]) -> List[Tuple[int, int]]:
+    """Pairs cues whose text occurs exactly once in both files, keeping the longest ordered chain.
+
+    Args:
+        source_texts (List[str]): Normalized source texts in time order.
+        example_texts (List[str]): Normalized example texts in time order.
+
+    Returns:
+        List[Tuple[int, int]]: Positions of paired cues, increasing in both files.
+    """
+    # Count text hashes, repeated lines like "Yes." can't be paired reliably
+    source_positions: Dict[str, Optional[int]] = {}
+    for position, text in enumerate(source_texts):
+        if text:
+            source_positions[text] = None if text in source_positions else position
+    example_positions: Dict[str, Optional[int]] = {}
+    for position, text in enumerate(example_texts):
+        if text:
+            example_positions[text] = None if text in example_positions else position
+
+    pairs: List[Tuple[int, int]] = []
+    for text, source_position in source_positions.items():
+        example_position = example_positions.get(text)
+        if source_position is not None and example_position is not None:
+            pairs.append((source_position, example_position))
+    pairs.sort()
+
+    # Longest increasing subsequence of example positions drops moved or crossing pairs
+    tails: List[int] = []  # Smallest example position ending chain of each length
+    tail_pairs: List[int] = []  # Index of pair ending chain of each length
+    previous: List[int] = [-1] * len(pairs)
+    for pair_index, (_, example_position) in enumerate(pairs):
+        length = bisect.bisect_left(tails, example_position)
+        if length == len(tails):
+            tails.append(example_position)
+            tail_pairs.append(pair_index)
+        else:
+            tails[length] = example_position
+            tail_pairs[length] = pair_index
+        previous[pair_index] = tail_pairs[length - 1] if length else -1
+
+    chain: List[Tuple[int, int]] = []
+    pair_index = tail_pairs[-1] if tail_pairs else -1
+    while pair_index != -1:
+        chain.append(pairs[pair_index])
+        pair_index = previous[pair_index]
+    return chain[::-1]
+
+def align_gap(
+    source_words: List[frozenset],
+    example_words: List[frozenset],
+    source_span: Tuple[int, int],
+    example_span: Tuple[int, int],
+    band: int,
+    min_similarity: float
+) -> List[Tuple[int, int, float]]:
+    """Aligns cues between two anchors with banded dynamic programming.
+
+    Cells farther than band from the diagonal of the gap are skipped, so
+    cost is O((rows + columns) * band) instead of O(rows * columns). Score of an alignment is the sum of
+    similarities of its matched cues.
+
+    Args:
+        source_words (List[frozenset]): Word sets of source cues.
+        example_words (List[frozenset]): Word sets of example cues.
+        source_span (Tuple[int, int]): First and past-the-last source position of gap.
+        example_span (Tuple[int, int]): First and past-the-last example position of gap.
+        band (int): Half-width of band around diagonal.
+        min_similarity (float): Lowest similarity of matched cues.
+
+    Returns:
+        List[Tuple[int, int, float]]: Source position, example position and similarity of matched cues.
+    """
+    source_first, source_last = source_span
+    example_first, example_last = example_span
+    rows, columns = source_last - source_first, example_last - example_first
+    if rows == 0 or columns == 0:
+        return []
+
+    # Band of fixed width follows diagonal of the gap, a row covers the diagonal from
+    # the previous row to the next one, so a cue may match anywhere on its diagonal step
+    ratio = columns / rows
+
+    def column_range(row: int) -> Tuple[int, int]:
+        return max(0, math.floor((row - 1) * ratio) - band), min(columns, math.ceil((row + 1) * ratio) + band)
+
+    # Sparse DP: score[(row, column)] is best score of first row and column cues
+    score: Dict[Tuple[int, int], float] = {}
+    step: Dict[Tuple[int, int], int] = {}  # 0 - match, 1 - skip source, 2 - skip example
+
+    def get(row: int, column: int) -> float:
+        return 0.0 if row == 0 or column == 0 else score.get((row, column), float('-inf'))
+
+    for row in range(1, rows + 1):
+        low, high = column_range(row)
+        for column in range(max(1, low), high + 1):
+            best, best_step = get(row - 1, column), 1
+            if get(row, column - 1) > best:
+                best, best_step = get(row, column - 1), 2
+            value = similarity(source_words[source_first + row - 1], example_words[example_first + column - 1])
+            if value >= min_similarity and get(row - 1, column - 1) + value > best:
+                best, best_step = get(row - 1, column - 1) + value, 0
+            score[(row, column)] = best
+            step[(row, column)] = best_step
+
+    # Trace back from the best cell of the last row
+    low, high = column_range(rows)
+    row, column = rows, max(range(max(1, low), high + 1), key=lambda column: get(rows, column))
+    matches: List[Tuple[int, int, float]] = []
+    while row > 0 and column > 0 and (row, column) in step:
+        if step[(row, column)] == 0:
+            source_position, example_position = source_first + row - 1, example_first + column - 1
+            matches.append((source_position, example_position, similarity(source_words[source_position], example_words[example_position])))
+            row, column = row - 1, column - 1
+        elif step[(row, column)] == 1:
+            row -= 1
+        else:
+            column -= 1
+    return matches[::-1]
+
+def match_cues(
+    source_subtitles: Dict[int, SubtitleEntry],
+    example_subtitles: Dict[int, SubtitleEntry],
+    band: int = MATCH_BAND,
+    min_similarity: float = MATCH_MIN_SIMILARITY
+) -> List[CueMatch]:
+    """Finds corresponding cues of two files with the same text by their content.
+
+    Cues with text unique to both files are paired first by hash and the
+    longest ordered chain of these pairs is kept. Gaps between them are
+    aligned by word similarity with banded dynamic programming, so typical
+    files are matched in near-linear time.
+
+    Args:
+        source_subtitles (Dict[int, SubtitleEntry]): Source subtitles keyed by index.
+        example_subtitles (Dict[int, SubtitleEntry]): Example subtitles keyed by index.
+        band (int): Half-width of DP band in cues. Defaults to MATCH_BAND.
+        min_similarity (float): Lowest word overlap of matched cues. Defaults to MATCH_MIN_SIMILARITY.
+
+    Returns:
+        List[CueMatch]: Matched cues ordered by source index.
+    """
+    source_indices = sorted(source_subtitles)
+    example_indices = sorted(example_subtitles)
+    source_texts = [normalize_text(source_subtitles[index]['text']) for index in source_indices]
+    example_texts = [normalize_text(example_subtitles[index]['text']) for index in example_indices]
+    source_words = [frozenset(text.split()) for text in source_texts]
+    example_words = [frozenset(text.split()) for text in example_texts]
+
+    # Exact unique pairs split files into gaps aligned separately
+    anchors = unique_anchors(source_texts, example_texts)
+    matches: List[Tuple[int, int, float]] = []
+    previous_source, previous_example = 0, 0
+    for source_position, example_position in anchors + [(len(source_texts), len(example_texts))]:
+        matches.extend(align_gap(
+            source_words,
+            example_words,
+            (previous_source, source_position),
+            (previous_example, example_position),
+            band,
+            min_similarity
+        ))
+        if source_position < len(source_texts):
+            matches.append((source_position, example_position, 1.0))
+        previous_source, previous_example = source_position + 1, example_position + 1
+
+    return [
+        {'source': source_indices[source_position], 'example': example_indices[example_position], 'similarity': round(value, 3)}
+        for source_position, example_position, value in matches
+    ]
+
+def anchor_pairs(
+    matches: List[CueMatch],
+    source_subtitles: Dict[int, SubtitleEntry],
+    example_subtitles: Dict[int, SubtitleEntry]
+) -> List[List[int]]:
+    """Returns matched cues usable as alignment anchors, with start times strictly increasing in both files."""
+    anchors: List[List[int]] = []
+    last_source = last_example = -1
+    for match in matches:
+        source_start = props.timecode_to_ms(source_subtitles[match['source']]['start'])
+        example_start = props.timecode_to_ms(example_subtitles[match['example']]['start'])
+        if source_start > last_source and example_start > last_example:
+            anchors.append([match['source'], match['example']])
+            last_source, last_example = source_start, example_start
+    return anchors
@@ -0,0 +1,202 @@
+import os
+import queue
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from typing import Callable, Dict, List, Optional, Tuple
+from logger import main_logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+OUTPUT_BUFFER_SIZE: int = int(os.getenv('OUTPUT_BUFFER_MB', 64)) * 1024 * 1024  # MB in bytes
+
+WrittenCallback = Callable[[str, str], None]
+FailedCallback = Callable[[str, Exception], None]
+
+class OutputWriteError(Exception):
+    """Raised for an output that couldn't be written to disk."""
+
+class OutputBuffer:
+    """Bounded in-memory cache of serialized operation outputs.
+
+    Outputs are served from memory right after they are produced, while a
+    single background writer stores them on disk. Entries are evicted least
+    recently used first once they are written and the buffer exceeds its
+    size limit, after that outputs are read from disk. An output that can't
+    be written is dropped and its error is kept until the path is put again.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Constructor for output buffer.
+
+        Args:
+            max_size (int): Total size of buffered outputs in bytes.
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[bytes, str]] = OrderedDict()  # path -> (data, digest)
+        self._size = 0
+        self._pending: Dict[str, List[Tuple[WrittenCallback, Optional[FailedCallback]]]] = {}  # path -> callbacks run after write
+        self._failed: Dict[str, Exception] = {}  # path -> error of its last write
+        self._written: Dict[str, threading.Event] = {}
+        self._queue: queue.Queue[Tuple[str, bytes, str]] = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def put(self, file_path: str, data: bytes) -> str:
+        """Buffers output and schedules its write to disk.
+
+        Args:
+            file_path (str): Destination path.
+            data (bytes): Serialized output.
+
+        Returns:
+            str: SHA-256 hex digest of output used as its ETag.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self.run_writer, daemon=True)
+                self._writer.start()
+
+            if file_path in self._entries:
+                self._size -= len(self._entries.pop(file_path)[0])
+            self._entries[file_path] = (data, digest)
+            self._size += len(data)
+            self._pending.setdefault(file_path, [])
+            self._failed.pop(file_path, None)
+            self._written.setdefault(file_path, threading.Event()).clear()
+            self._evict()
+
+        self._queue.put((file_path, data, digest))
+        return digest
+
+    def get(self, file_path: str) -> Optional[Tuple[bytes, str]]:
+        """Returns buffered output and its digest, None if output isn't buffered."""
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None:
+                self._entries.move_to_end(file_path)
+            return entry
+
+    def read(self, file_path: str) -> bytes:
+        """Returns output from memory or from disk."""
+        entry = self.get(file_path)
+        if entry is not None:
+            return entry[0]
+        with open(file_path, 'rb') as file:
+            return file.read()
+
+    def when_written(self, file_path: str, callback: WrittenCallback, on_failure: Optional[FailedCallback] = None) -> None:
+        """Runs callback with path and digest once output is on disk.
+
+        Callback runs immediately if output is already written, otherwise in
+        the writer thread right after the write. If the write fails, on_failure
+        runs with path and error instead.
+
+        Raises:
+            OutputWriteError: If output has already failed and on_failure isn't set.
+        """
+        with self._lock:
+            if file_path in self._pending:
+                self._pending[file_path].append((callback, on_failure))
+                return
+            entry = self._entries.get(file_path)
+            error = self._failed.get(file_path)
+
+        if error is not None:
+            if on_failure is None:
+                raise OutputWriteError(f'Output {os.path.basename(file_path)} was not written: {error}') from error
+            on_failure(file_path, error)
+            return
+
+        if entry is not None:
+            digest = entry[1]
+        else:
+            with open(file_path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+        callback(file_path, digest)
+
+    def wait(self, file_path: str, timeout: Optional[float] = None) -> None:
+        """Blocks until buffered output is written to disk.
+
+        Raises:
+            OutputWriteError: If output couldn't be written.
+        """
+        with self._lock:
+            event = self._written.get(file_path)
+        if event is not None:
+            event.wait(timeout)
+        with self._lock:
+            error = self._failed.get(file_path)
+        if error is not None:
+            raise OutputWriteError(f'Output {os.path.basename(file_path)} was not written: {error}') from error
+
+    def flush(self) -> None:
+        """Blocks until every scheduled output is written to disk."""
+        self._queue.join()
+
+    def _evict(self) -> None:
+        """Drop least recently used written outputs above size limit. Must be called with lock held."""
+        for file_path in list(self._entries):
+            if self._size <= self.max_size:
+                break
+            if file_path not in self._pending:
+                self._size -= len(self._entries.pop(file_path)[0])
+
+    def _write(self, file_path: str, data: bytes) -> None:
+        """Writes output to temporary file and replaces destination at once."""
+        with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(file_path), prefix='.output-', delete=False) as file:
+            file.write(data)
+        os.replace(file.name, file_path)
+
+    def _finish(self, file_path: str, digest: str, error: Optional[Exception]) -> Optional[List[Tuple[WrittenCallback, Optional[FailedCallback]]]]:
+        """Marks output as written or failed and returns its callbacks, None if a newer output is queued."""
+        with self._lock:
+            # Newer output for the same path is still waiting in queue
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[1] != digest:
+                return None
+            callbacks = self._pending.pop(file_path, [])
+            if error is not None:
+                # Output that isn't on disk isn't served from memory either
+                self._failed[file_path] = error
+                if entry is not None:
+                    self._size -= len(self._entries.pop(file_path)[0])
+            event = self._written.pop(file_path, None)
+            if event is not None:
+                event.set()
+            self._evict()
+            return callbacks
+
+    def run_writer(self) -> None:
+        """Write scheduled outputs to disk one by one.
+
+        This function is intended to be run in a separate thread and is the
+        only place outputs are written.
+        """
+        while True:
+            file_path, data, digest = self._queue.get()
+            try:
+                error: Optional[Exception] = None
+                try:
+                    self._write(file_path, data)
+                except Exception as e:
+                    main_logger.info(f"error: {os.path.basename(file_path)} was not written: {str(e)}")
+                    error = e
+
+                for callback, on_failure in self._finish(file_path, digest, error) or []:
+                    try:
+                        if error is None:
+                            callback(file_path, digest)
+                        elif on_failure is not None:
+                            on_failure(file_path, error)
+                    except Exception as e:
+                        main_logger.info(f"error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+output_buffer = OutputBuffer(OUTPUT_BUFFER_SIZE)
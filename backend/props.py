@@ -1,14 +1,14 @@
-import os
 import re
-import time
 import math
-import json
 import chardet
 import langdetect # type: ignore
-from typing import List
-from pathlib import Path
-from structures import SubtitleMetadata, SubtitleData, StatisticsData
-from logger import main_logger
+from typing import Dict, List, Optional, Tuple
+from structures import SubtitleMetadata, SubtitleData, SubtitleEntry, TimeRange
+from stats import StatisticsManager
+from markup import strip_markup
+from latency import latency_model
+from throttle import learned_throttle
+from backends import ENGINE_CONCURRENCY, queue_depth
 
 def sanitize_filename(filename_to_sanitize: str) -> str:
     safe_filename = re.sub(r'[^a-zA-Z0-9.-]', '-', filename_to_sanitize)
@@ -24,16 +24,26 @@ def extract_metadata(file_path: str) -> SubtitleMetadata:
         SubtitleMetadata: Metadata containing encoding information and confidence level.
     """
     with open(file_path, 'rb') as file:
-        raw_data = file.read()
-        raw_metadata = chardet.detect(raw_data)
+        return detect_metadata(file.read())
 
-        extracted_metadata: SubtitleMetadata = {
-            'encoding': str(raw_metadata['encoding']),
-            'confidence': float(raw_metadata['confidence']),
-            'language': ''
-        }
+def detect_metadata(raw_data: bytes) -> SubtitleMetadata:
+    """Detects encoding of subtitles content and returns metadata.
 
-        return extracted_metadata
+    Args:
+        raw_data (bytes): Raw content of subtitles file.
+
+    Returns:
+        SubtitleMetadata: Metadata containing encoding information and confidence level.
+    """
+    raw_metadata = chardet.detect(raw_data)
+
+    extracted_metadata: SubtitleMetadata = {
+        'encoding': str(raw_metadata['encoding']),
+        'confidence': float(raw_metadata['confidence']),
+        'language': ''
+    }
+
+    return extracted_metadata
 
 def detect_language(subtitle_data: SubtitleData) -> str:
     """Detects language of subtitles file.
@@ -63,7 +73,7 @@ def remove_all_markup(subtitle_data: SubtitleData) -> list[str]:
     subtitles_to_clean = subtitle_data['subtitles']
     for index in sorted(subtitles_to_clean.keys()):
         old_subtitle = subtitles_to_clean[index]
-        new_subtitle = re.sub(r'<.*?>', '', old_subtitle['text'])
+        new_subtitle = strip_markup(old_subtitle['text'])
         cleaned_subtitles.append(new_subtitle)
 
     return cleaned_subtitles
@@ -145,6 +155,28 @@ def calculate_prompts_count(prompt_task: str, injected_subtitles: str, model_lim
 
     return prompts_count
 
+def fit_prompt_length(prompt_task: str, cleaned_subtitles: list[str], start: int, tokens_limit: float) -> int:
+    """Calculates how many subtitles from start fit into a prompt of tokens_limit tokens.
+
+    Args:
+        prompt_task (str): The task instruction prompt.
+        cleaned_subtitles (list[str]): List of subtitle texts without markup.
+        start (int): Position of the first subtitle of prompt.
+        tokens_limit (float): Token limit of the prompt.
+
+    Returns:
+        int: Number of subtitles for prompt, at least one.
+    """
+    budget = tokens_limit - estimate_token_count(prompt_task) - estimate_token_count(' Your response MUST contain exactly 0 lines.')
+    prompt_length = 0
+    for position in range(start, len(cleaned_subtitles)):
+        budget -= estimate_token_count(inject_prompt_symbols([cleaned_subtitles[position]], position + 1)) + 1
+        if budget < 0 and prompt_length:
+            break
+        prompt_length += 1
+
+    return max(prompt_length, 1)
+
 def calculate_prompt_length(prompts_count: int, cleaned_subtitles: list[str]) -> int:
     """Calculates how many subtitles should be included in each prompt.
 
@@ -159,85 +191,146 @@ def calculate_prompt_length(prompts_count: int, cleaned_subtitles: list[str]) ->
 
     return prompt_length
 
-def update_estimated_response_time(new_response_time: float) -> None:
-    """Updates the estimated average response time for translation requests.
-
-    This function reads the existing translation statistics from a JSON file, updates the average response duration
-    based on the new response time provided, and writes the updated statistics back to the JSON file. It increments
-    the total count of responses and updates the total duration of responses.
+def plan_chunks(lines: List[str], engine_limit: float) -> List[Tuple[int, int]]:
+    """Splits lines into chunks of at most engine_limit characters joined with blank lines.
 
     Args:
-        new_response_time (float): The response time for the latest translation request, in seconds.
+        lines (List[str]): Lines to translate.
+        engine_limit (float): Engine character limit per request.
 
     Returns:
-        None: This function does not return a value. It modifies the statistics stored in the JSON file.
+        List[Tuple[int, int]]: First and past-the-last line of every chunk, a line longer than limit is sent alone.
     """
-    current_timestamp = time.time()
-
-    # Load the existing data from the JSON file
-    statistics_file = Path(__file__).parent / '../shared/statistics.json'
-    with open(statistics_file, 'r') as file:
-        data = json.load(file)
-
-    total_count_of_responses = data['duck_statistics']['total_count_of_responses']
-    average_response_duration = data['duck_statistics']['average_response_duration']
+    chunks: List[Tuple[int, int]] = []
+    chunk_start, chunk_length = 0, 0
+    for index, line in enumerate(lines):
+        line_length = len(line) + 2  # add 2 for the "\n\n" that will be inserted
+        if index > chunk_start and chunk_length + line_length > engine_limit:
+            chunks.append((chunk_start, index))
+            chunk_start, chunk_length = index, 0
+        chunk_length += line_length
+    if chunk_start < len(lines):
+        chunks.append((chunk_start, len(lines)))
+    return chunks
+
+def estimate_duck_translation(
+    subtitle_data: SubtitleData,
+    translate_from: str = 'Chinese Simplified',
+    translate_to: str = 'Chinese Traditional',
+    model_name: str = 'gpt-4o-mini',
+    model_limit: float = 2048,
+    model_throttle: Optional[float] = None,
+    request_timeout: int = 15
+) -> Dict[str, int]:
+    """Estimates the time required to translate all prompts from learned latency of the model.
 
-    # Calculate the updated average response duration
-    updated_average_response_duration = (average_response_duration * total_count_of_responses + new_response_time) / (total_count_of_responses + 1)
+    Prompts are sent one by one with request_timeout pause after each of them. Response time
+    per token is learned from previous translations with the same model, see `latency.LatencyModel`,
+    until then the average Duck.ai response duration is assumed for a full prompt.
 
-    # Update the data structure with the new average
-    data['last_update'] = current_timestamp
-    data['duck_statistics']['average_response_duration'] = updated_average_response_duration
-    data['duck_statistics']['total_count_of_responses'] += 1  # Increment the count of responses
-    data['duck_statistics']['total_responses_duration'] += new_response_time  # Update the total duration
+    Args:
+        subtitle_data (SubtitleData): Dictionary containing subtitle data, including the text to be translated.
+        translate_from (str, optional): The source language name. Defaults to 'Chinese Simplified'.
+        translate_to (str, optional): The target language name. Defaults to 'Chinese Traditional'.
+        model_name (str, optional): Translator LLM. Defaults to 'gpt-4o-mini'.
+        model_limit (float, optional): The token limit of the model. Defaults to 2048.
+        model_throttle (float, optional): A throttle factor to adjust the model limit. Defaults to throttle
+            learned for the model, see `throttle.ThrottleController`.
+        request_timeout (int, optional): Timeout per request in seconds. Defaults to 15.
 
-    # Write the updated data back to the JSON file
-    with open(statistics_file, 'w') as file:
-        json.dump(data, file, indent=4)
+    Returns:
+        Dict[str, int]: Median ('eta') and 90th percentile ('eta_p90') estimates in seconds.
+    """
+    tokens_limit = model_limit * (learned_throttle(model_name) if model_throttle is None else model_throttle)
+    cleaned_subtitles = remove_all_markup(subtitle_data)
+    prompt_task = construct_prompt_task(translate_from, translate_to)
+    injected_subtitles = inject_prompt_symbols(cleaned_subtitles)
+    prompts_count = calculate_prompts_count(prompt_task, injected_subtitles, tokens_limit)
+
+    # Every prompt repeats the task and carries an equal share of subtitles
+    prompt_tokens = estimate_token_count(prompt_task) + estimate_token_count(injected_subtitles) / max(prompts_count, 1)
+    return latency_model.estimate(
+        'duck',
+        model_name,
+        [math.ceil(prompt_tokens)] * prompts_count,
+        default_seconds_per_unit=StatisticsManager.average_duck_response() / tokens_limit,
+        wait=request_timeout
+    )
 
 def calculate_duck_translation_eta(
     subtitle_data: SubtitleData,
     translate_from: str = 'Chinese Simplified',
     translate_to: str = 'Chinese Traditional',
     model_limit: float = 2048,
-    model_throttle: float = 0.5,
+    model_throttle: Optional[float] = None,
     request_timeout: int = 15
 ) -> int:
     """Estimates the time required to translate all prompts based on subtitle data and model parameters.
 
-    This function calculates the estimated time in seconds needed to translate subtitles from one language to another.
-    It takes into account the average response duration from previous translations, the number of prompts to be processed,
-    and the model's token limit.
+    This function calculates the estimated time in seconds needed to translate subtitles from one language to another
+    with the default model, see `estimate_duck_translation`.
 
     Args:
         subtitle_data (SubtitleData): Dictionary containing subtitle data, including the text to be translated.
         translate_from (str, optional): The source language name. Defaults to 'Chinese Simplified'.
         translate_to (str, optional): The target language name. Defaults to 'Chinese Traditional'.
         model_limit (float, optional): The token limit of the model. Defaults to 2048.
-        model_throttle (float, optional): A throttle factor to adjust the model limit. Defaults to 0.5.
+        model_throttle (float, optional): A throttle factor to adjust the model limit. Defaults to learned throttle.
         request_timeout (int, optional): Timeout per request in seconds. Defaults to 15.
 
     Returns:
         int: Estimated time in seconds for the complete translation of all prompts.
     """
-    with open(Path(__file__).parent / '../shared/statistics.json', 'r') as file:
-        data: StatisticsData = json.load(file)
-        average_response_duration: float = data['duck_statistics']['average_response_duration']
+    return estimate_duck_translation(
+        subtitle_data,
+        translate_from,
+        translate_to,
+        model_limit=model_limit,
+        model_throttle=model_throttle,
+        request_timeout=request_timeout
+    )['eta']
+
+def estimate_engine_translation(
+    subtitle_data: SubtitleData,
+    engine: str = 'Google',
+    engine_limit: float = 5000,
+    languages: int = 1,
+    request_timeout: int = 2
+) -> Dict[str, int]:
+    """Estimates the time required to translate subtitles from learned latency of the engine.
 
-    cleaned_subtitles = remove_all_markup(subtitle_data)
-    prompt_task = construct_prompt_task(translate_from, translate_to)
-    injected_subtitles = inject_prompt_symbols(cleaned_subtitles)
-    prompts_count = calculate_prompts_count(prompt_task, injected_subtitles, model_limit * model_throttle)
-    translation_eta = prompts_count * (request_timeout + int(average_response_duration))
+    Chunks are planned the same way as for translation and sent in waves of
+    ENGINE_CONCURRENCY requests after requests of other jobs already waiting
+    for the engine.
+
+    Args:
+        subtitle_data (SubtitleData): Dictionary containing subtitle data, including the text to be translated.
+        engine (str, optional): Translation engine name. Defaults to 'Google'.
+        engine_limit (float, optional): The character limit of the engine. Defaults to 5000 (Google).
+        languages (int, optional): Number of target languages. Defaults to 1.
+        request_timeout (int, optional): Seconds per request of engine_limit characters until engine
+            latency is learned. Defaults to 2.
 
-    return translation_eta
+    Returns:
+        Dict[str, int]: Median ('eta') and 90th percentile ('eta_p90') estimates in seconds.
+    """
+    lines = list(dict.fromkeys(line for line in process_newlines(remove_all_markup(subtitle_data)) if line))
+    sizes = [len('\n\n'.join(lines[start:end])) for start, end in plan_chunks(lines, engine_limit)]
+    return latency_model.estimate(
+        'engine',
+        engine,
+        sizes * languages,
+        default_seconds_per_unit=request_timeout / engine_limit,
+        concurrency=ENGINE_CONCURRENCY,
+        queued=queue_depth(engine)
+    )
 
 def calculate_engine_translation_eta(
     subtitle_data: SubtitleData,
     engine_limit: float = 5000,
     request_timeout: int = 2
 ) -> int:
-    """Estimates the time required to translate all subtitles based on subtitle data and engine parameters.
+    """Estimates the time required to translate all subtitles with the default engine, see `estimate_engine_translation`.
 
     Args:
         subtitle_data (SubtitleData): Dictionary containing subtitle data, including the text to be translated.
@@ -247,12 +340,7 @@ def calculate_engine_translation_eta(
     Returns:
         int: Estimated time in seconds for the complete translation of all subtitles.
     """
-    cleaned_subtitles = remove_all_markup(subtitle_data)
-    subtitles_length = len('\n\n'.join(cleaned_subtitles))
-    chunk_count =  subtitles_length / engine_limit
-    translation_eta = math.ceil(chunk_count * request_timeout)
-
-    return translation_eta
+    return estimate_engine_translation(subtitle_data, engine_limit=engine_limit, request_timeout=request_timeout)['eta']
 
 def process_newlines(subtitles: List[str]) -> List[str]:
     """
@@ -287,78 +375,78 @@ def process_newlines(subtitles: List[str]) -> List[str]:
 
     return result
 
-def check_statistics() -> None:
-    """Checks if statistics file exists and creates it if needed."""
-    current_timestamp = time.time()
-
-    # Load the existing data from the JSON file
-    statistics_file = Path(__file__).parent / '../shared/statistics.json'
-    default_statistics = {
-        "last_update": current_timestamp,
-        "files_processed": {
-            "shift": 0,
-            "align": 0,
-            "clean": 0,
-            "translate": 0,
-            "upload": 0,
-            "download": 0,
-            "total": 0
-        },
-        # Duck statistics are pre-filled for more prescice measurements
-        "duck_statistics": {
-            "total_count_of_responses": 1,
-            "total_responses_duration": 1669.9005346091487,
-            "average_response_duration": 10.154964839442117
-        }
-    }
+def timecode_to_ms(timecode: str) -> int:
+    """
+    Converts SubRip time code into milliseconds.
+
+    Args:
+        timecode (str): Time code in HH:MM:SS,mmm format.
 
-    # Check if the file exists
-    if not os.path.exists(statistics_file):
-        # If it does not exist, create the file and write the default content
-        with open(statistics_file, 'w') as file:
-            json.dump(default_statistics, file, indent=4)
-        main_logger.info(f"{statistics_file} created with default content.")
-        return  # Exit the function after creating the file
+    Returns:
+        int: Milliseconds from the start of video.
+    """
+    hours, minutes, seconds = timecode.strip().replace('.', ',').split(':')
+    seconds, _, milliseconds = seconds.partition(',')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(milliseconds.ljust(3, '0')[:3])
+
+def parse_time_range(time_range: Optional[TimeRange]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Converts time range from request into milliseconds.
+
+    Args:
+        time_range (List): Beginning and end of range, each as milliseconds,
+            HH:MM:SS,mmm time code or None for an open end.
+
+    Returns:
+        Tuple[Optional[int], Optional[int]]: Beginning and end in milliseconds.
+
+    Raises:
+        ValueError: If range doesn't have exactly 2 items or its beginning is after its end.
+    """
+    if time_range is None or len(time_range) != 2:
+        raise ValueError(f'time range must be a list with 2 items ({len(time_range) if time_range is not None else None} provided).')
+
+    start_ms, end_ms = (
+        None if value is None else value if isinstance(value, int) else timecode_to_ms(value)
+        for value in time_range
+    )
+    if start_ms is not None and end_ms is not None and start_ms > end_ms:
+        raise ValueError(f'time range must start before it ends ({start_ms} > {end_ms} ms).')
 
-def update_statitics(command: str = 'init') -> None:
-    """Updates the statistics based on procesed commands.
+    return start_ms, end_ms
+
+def time_range_label(start_ms: Optional[int], end_ms: Optional[int]) -> str:
+    """
+    Describes time range for processed filenames, e.g. "-from-1000-ms-to-5000-ms".
+    """
+    label = ''
+    if start_ms is not None:
+        label += f'-from-{start_ms}-ms'
+    if end_ms is not None:
+        label += f'-to-{end_ms}-ms'
+    return label
+
+def serialize_subtitles(subtitles: Dict[int, SubtitleEntry]) -> bytes:
+    """
+    Serializes subtitles into SubRip format in a single pass.
+
+    Cue parts are collected into one list and joined once, so output is
+    built without intermediate strings per cue. Indices are sorted only if
+    cues are not already in order.
 
     Args:
-        new_response_time (float): The response time for the latest translation request, in seconds.
+        subtitles (Dict[int, SubtitleEntry]): Subtitles keyed by index.
 
     Returns:
-        None: This function does not return a value. It modifies the statistics stored in the JSON file.
+        bytes: SubRip text encoded in UTF-8.
     """
-    current_timestamp = time.time()
-    statistics_file = Path(__file__).parent / '../shared/statistics.json'
-
-    # Check if the file exists
-    if command == 'init':
-        check_statistics()
-    else:
-        # If the file exists, read the data
-        with open(statistics_file, 'r') as file:
-            data = json.load(file)
-
-        # Update data based on command
-        data['last_update'] = current_timestamp
-        if command =='shift':
-            data['files_processed']['shift'] += 1
-            data['files_processed']['total'] += 1
-        if command =='align':
-            data['files_processed']['align'] += 1
-            data['files_processed']['total'] += 1
-        if command =='clean':
-            data['files_processed']['clean'] += 1
-            data['files_processed']['total'] += 1
-        if command =='translate':
-            data['files_processed']['translate'] += 1
-            data['files_processed']['total'] += 1
-        if command =='upload':
-            data['files_processed']['upload'] += 1
-        if command =='download':
-            data['files_processed']['download'] += 1
-
-        # Write the updated data back to the JSON file
-        with open(statistics_file, 'w') as file:
-            json.dump(data, file, indent=4)
+    indices = list(subtitles)
+    if any(previous > current for previous, current in zip(indices, indices[1:])):
+        indices.sort()
+
+    parts: List[str] = []
+    for index in indices:
+        entry = subtitles[index]
+        parts += (str(index), '\n', entry['start'], ' --> ', entry['end'], '\n', entry['text'], '\n\n')  # Empty line after each cue
+
+    return ''.join(parts).encode('utf-8')
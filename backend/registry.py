@@ -0,0 +1,49 @@
+import os
+import threading
+from pathlib import Path
+from typing import Generic, Optional, Type, TypeVar
+from pydantic import BaseModel
+from structures import EnginesData, DuckData
+from logger import main_logger
+
+ConfigModel = TypeVar('ConfigModel', bound=BaseModel)
+
+class SharedConfig(Generic[ConfigModel]):
+    """JSON file from shared directory parsed into a validated model.
+
+    The file is parsed on first access and again only when its modification
+    time changes, so lookups on the translation path don't touch the disk
+    beyond a single `stat` call.
+    """
+
+    def __init__(self, file_path: Path, model: Type[ConfigModel]) -> None:
+        """Constructor for shared config.
+
+        Args:
+            file_path (Path): Path to JSON file.
+            model (Type[BaseModel]): Model used to validate file content.
+        """
+        self.file_path = file_path
+        self.model = model
+        self._lock = threading.Lock()
+        self._mtime: Optional[int] = None
+        self._data: Optional[ConfigModel] = None
+
+    def get(self) -> ConfigModel:
+        """Returns parsed config, reloading it if the file was modified.
+
+        Raises:
+            ValueError: If file content doesn't match the model.
+        """
+        mtime = os.stat(self.file_path).st_mtime_ns
+        if self._data is None or mtime != self._mtime:
+            with self._lock:
+                if self._data is None or mtime != self._mtime:
+                    with open(self.file_path, 'rb') as file:
+                        self._data = self.model.model_validate_json(file.read())
+                    self._mtime = mtime
+                    main_logger.info(f"{self.file_path.name} loaded")
+        return self._data
+
+engines_config: SharedConfig[EnginesData] = SharedConfig(Path(__file__).parent / '../shared/engines.json', EnginesData)
+duck_config: SharedConfig[DuckData] = SharedConfig(Path(__file__).parent / '../shared/duck.json', DuckData)
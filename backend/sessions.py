@@ -0,0 +1,239 @@
+import os
+import time
+import heapq
+import shutil
+import threading
+from dotenv import load_dotenv
+from typing import Dict, Iterable, List, Tuple
+from storage import USER_FILES_DIR, blob_store
+from logger import main_logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+SESSION_LIFETIME = 3600  # 1 hour in seconds
+SESSION_QUOTA: int = int(os.getenv('SESSION_QUOTA_MB', 50)) * 1024 * 1024  # MB in bytes
+STORAGE_QUOTA: int = int(os.getenv('STORAGE_QUOTA_MB', 2048)) * 1024 * 1024  # MB in bytes
+CLEANUP_INTERVAL = 60  # Longest pause between expiry checks in seconds
+
+def entry_size(path: str) -> int:
+    """Returns size of file or total size of files in directory."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, filename))
+        for root, _, filenames in os.walk(path)
+        for filename in filenames
+    )
+
+class SessionIndex:
+    """Track session access times and disk usage without scanning user files.
+
+    Sessions are kept in a min-heap ordered by last access. Stale heap items
+    are skipped lazily: an item is valid only while its time matches the
+    session's last access. The cleanup thread sleeps until the next session
+    expires, or until it is woken because the storage quota is exceeded.
+    Quotas are enforced by removing least recently used sessions globally and
+    least recently modified files within a session, except files pinned by
+    running or queued tasks. Sessions with pinned files are in use, so they
+    don't expire and aren't removed for storage quota until their tasks end.
+    Only existing session directories directly under user files are indexed
+    or deleted.
+    """
+
+    def __init__(self, user_files_dir: str) -> None:
+        """Constructor for session index.
+
+        Args:
+            user_files_dir (str): Directory with session directories.
+        """
+        self.user_files_dir = user_files_dir
+        self._condition = threading.Condition()
+        self._last_access: Dict[str, float] = {}
+        self._files: Dict[str, Dict[str, Tuple[int, float]]] = {}  # session -> filename -> (size, modified at)
+        self._sizes: Dict[str, int] = {}
+        self._total_size = 0
+        self._heap: List[Tuple[float, str]] = []
+        self._pinned: Dict[str, Dict[str, int]] = {}  # session -> filename -> tasks using it
+
+    def load(self) -> None:
+        """Index existing sessions once at startup."""
+        with self._condition:
+            for session_id in os.listdir(self.user_files_dir):
+                # Skip blob store and other service directories
+                session_path = os.path.join(self.user_files_dir, session_id)
+                if session_id.startswith('.') or not os.path.isdir(session_path):
+                    continue
+
+                self._last_access[session_id] = os.path.getmtime(session_path)
+                heapq.heappush(self._heap, (self._last_access[session_id], session_id))
+                self._files[session_id] = {}
+                self._sizes[session_id] = 0
+                for filename in os.listdir(session_path):
+                    if not filename.startswith('.'):
+                        self._set_file(session_id, filename)
+
+    def _set_file(self, session_id: str, filename: str) -> None:
+        """Update size of session file. Must be called with lock held."""
+        file_path = os.path.join(self.user_files_dir, session_id, filename)
+        old_size, _ = self._files[session_id].pop(filename, (0, 0))
+        new_size = entry_size(file_path) if os.path.exists(file_path) else 0
+        if os.path.exists(file_path):
+            self._files[session_id][filename] = (new_size, time.time())
+        self._sizes[session_id] += new_size - old_size
+        self._total_size += new_size - old_size
+
+    def _is_session_path(self, path: str) -> bool:
+        """Checks that path is a session directory directly under user files, not a service directory."""
+        real_path = os.path.realpath(path)
+        return (
+            os.path.dirname(real_path) == os.path.realpath(self.user_files_dir)
+            and not os.path.basename(real_path).startswith('.')
+        )
+
+    def _is_removable(self, path: str) -> bool:
+        """Checks that path is a session directory or a file at the top level of one."""
+        if self._is_session_path(path):
+            return True
+        return not os.path.basename(path).startswith('.') and self._is_session_path(os.path.dirname(path))
+
+    def touch(self, session_id: str) -> None:
+        """Mark session as accessed now, sessions without directory are ignored."""
+        session_path = os.path.join(self.user_files_dir, session_id)
+        if not self._is_session_path(session_path) or not os.path.isdir(session_path):
+            return
+        with self._condition:
+            now = time.time()
+            if session_id not in self._last_access:
+                self._files[session_id] = {}
+                self._sizes[session_id] = 0
+            self._last_access[session_id] = now
+            heapq.heappush(self._heap, (now, session_id))
+
+    def add_file(self, session_id: str, file_path: str) -> None:
+        """Account new or replaced session file and enforce quotas.
+
+        Args:
+            session_id (str): The session ID.
+            file_path (str): File or directory at the top level of session directory.
+        """
+        self.touch(session_id)
+        filename = os.path.basename(file_path)
+        removed_files: List[str] = []
+        with self._condition:
+            if session_id not in self._files:
+                return
+            self._set_file(session_id, filename)
+
+            # Remove least recently modified files of session above its quota
+            if self._sizes[session_id] > SESSION_QUOTA:
+                for old_filename, _ in sorted(self._files[session_id].items(), key=lambda item: item[1][1]):
+                    if self._sizes[session_id] <= SESSION_QUOTA:
+                        break
+                    if old_filename == filename or self._pinned.get(session_id, {}).get(old_filename):
+                        continue
+                    size, _ = self._files[session_id].pop(old_filename)
+                    self._sizes[session_id] -= size
+                    self._total_size -= size
+                    removed_files.append(old_filename)
+
+            if self._total_size > STORAGE_QUOTA:
+                self._condition.notify()
+
+        for old_filename in removed_files:
+            self._remove_path(os.path.join(self.user_files_dir, session_id, old_filename))
+
+    def pin(self, session_id: str, file_paths: Iterable[str]) -> None:
+        """Protect files read by a task from quota eviction until they are unpinned."""
+        with self._condition:
+            pinned = self._pinned.setdefault(session_id, {})
+            for file_path in file_paths:
+                filename = os.path.basename(file_path)
+                pinned[filename] = pinned.get(filename, 0) + 1
+
+    def unpin(self, session_id: str, file_paths: Iterable[str]) -> None:
+        """Allow eviction of files pinned by a finished task, session lifetime starts again."""
+        with self._condition:
+            pinned = self._pinned.get(session_id, {})
+            for file_path in file_paths:
+                filename = os.path.basename(file_path)
+                pinned[filename] = pinned.get(filename, 0) - 1
+                if pinned[filename] <= 0:
+                    del pinned[filename]
+            if not pinned:
+                self._pinned.pop(session_id, None)
+        self.touch(session_id)
+
+    def _remove_path(self, path: str) -> None:
+        """Delete session file or directory and release its blobs."""
+        if not self._is_removable(path):
+            main_logger.info(f"refused to remove path={path}")
+            return
+
+        if os.path.isdir(path):
+            digests = blob_store.session_digests(path)
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            digest = blob_store.digest_of(path)
+            digests = [digest] if digest else []
+            if os.path.exists(path):
+                os.remove(path)
+            blob_store.forget(path)
+        blob_store.release(digests)
+        main_logger.info(f"path={os.path.relpath(path, self.user_files_dir)}")
+
+    def _pop_session(self) -> str:
+        """Remove least recently used session from index. Must be called with lock held."""
+        while self._heap:
+            accessed_at, session_id = heapq.heappop(self._heap)
+            if self._last_access.get(session_id) == accessed_at:
+                del self._last_access[session_id]
+                del self._files[session_id]
+                self._total_size -= self._sizes.pop(session_id)
+                return session_id
+        return ''
+
+    def _collect(self) -> List[str]:
+        """Remove expired and over-quota sessions from index. Must be called with lock held."""
+        now = time.time()
+        sessions: List[str] = []
+        while self._heap:
+            accessed_at, session_id = self._heap[0]
+            if self._last_access.get(session_id) != accessed_at:
+                heapq.heappop(self._heap)  # Stale item, session was accessed later
+            elif now - accessed_at <= SESSION_LIFETIME and self._total_size <= STORAGE_QUOTA:
+                break
+            elif self._pinned.get(session_id):
+                if accessed_at == now:
+                    break  # Every remaining session is in use
+                # Session of running task is deferred as if accessed now
+                heapq.heapreplace(self._heap, (now, session_id))
+                self._last_access[session_id] = now
+            else:
+                sessions.append(self._pop_session())
+        return sessions
+
+    def _next_expiry(self) -> float:
+        """Seconds until the earliest session expires. Must be called with lock held."""
+        if not self._heap:
+            return CLEANUP_INTERVAL
+        return min(CLEANUP_INTERVAL, max(0.0, self._heap[0][0] + SESSION_LIFETIME - time.time()))
+
+    def run_cleanup(self) -> None:
+        """Delete sessions when they expire or storage quota is exceeded.
+
+        This function is intended to be run in a separate thread. Sessions are
+        deleted outside of the lock, so requests are never blocked by disk I/O.
+        """
+        while True:
+            with self._condition:
+                sessions = self._collect()
+                if not sessions:
+                    self._condition.wait(timeout=self._next_expiry())
+                    continue
+
+            for session_id in sessions:
+                self._remove_path(os.path.join(self.user_files_dir, session_id))
+
+session_index = SessionIndex(USER_FILES_DIR)
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, cast
+from structures import StatisticsData
+from logger import main_logger
+
+# Constants
+STATISTICS_DB = Path(__file__).parent / '../shared/statistics.db'
+LEGACY_STATISTICS_FILE = Path(__file__).parent / '../shared/statistics.json'
+FLUSH_INTERVAL = 30  # Seconds between flushes of pending counters
+
+# Commands counted as processed files
+PROCESSING_COMMANDS = {'shift', 'align', 'clean', 'transform', 'validate', 'translate'}
+
+# Duck statistics are pre-filled for more prescice measurements
+DEFAULT_COUNTERS: Dict[str, float] = {
+    'shift': 0,
+    'align': 0,
+    'clean': 0,
+    'translate': 0,
+    'upload': 0,
+    'download': 0,
+    'total': 0,
+    'duck_responses': 1,
+    'duck_responses_duration': 10.154964839442117,
+}
+
+class StatisticsManager:
+    """Keep statistics counters in memory and persist them with a single writer.
+
+    Requests only increment in-memory counters under a lock. Accumulated deltas
+    are added to the SQLite store by `flush`, which is called periodically from
+    the writer thread, so several worker processes can share one database
+    without losing updates.
+    """
+
+    _lock = threading.Lock()
+    _loaded: bool = False
+    _persisted: Dict[str, float] = {}
+    _pending: Dict[str, float] = {}
+
+    @classmethod
+    def _connect(cls) -> sqlite3.Connection:
+        """Open statistics database and create counters table if needed."""
+        connection = sqlite3.connect(STATISTICS_DB, timeout=10)
+        connection.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL)')
+        return connection
+
+    @classmethod
+    def _read_defaults(cls) -> Dict[str, float]:
+        """Returns initial counters, migrated from legacy statistics.json if it exists."""
+        counters = DEFAULT_COUNTERS.copy()
+        if not LEGACY_STATISTICS_FILE.exists():
+            return counters
+
+        with open(LEGACY_STATISTICS_FILE, 'r') as file:
+            data: StatisticsData = json.load(file)
+
+        files_processed = cast(Dict[str, int], data['files_processed'])
+        for name, value in files_processed.items():
+            counters[name] = value
+        counters['duck_responses'] = data['duck_statistics']['total_count_of_responses']
+        counters['duck_responses_duration'] = (
+            data['duck_statistics']['average_response_duration'] * data['duck_statistics']['total_count_of_responses']
+        )
+        main_logger.info(f"{LEGACY_STATISTICS_FILE} migrated to {STATISTICS_DB}")
+
+        return counters
+
+    @classmethod
+    def load(cls) -> None:
+        """Loads persisted counters into memory, seeding the database on first run."""
+        with cls._connect() as connection:
+            rows = connection.execute('SELECT name, value FROM counters').fetchall()
+            if not rows:
+                rows = list(cls._read_defaults().items())
+                connection.executemany('INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)', rows)
+        connection.close()
+
+        with cls._lock:
+            cls._persisted = {name: value for name, value in rows}
+            cls._loaded = True
+
+    @classmethod
+    def _ensure_loaded(cls) -> None:
+        if not cls._loaded:
+            cls.load()
+
+    @classmethod
+    def increment(cls, name: str, amount: float = 1) -> None:
+        """Adds amount to the in-memory counter."""
+        cls._ensure_loaded()
+        with cls._lock:
+            cls._pending[name] = cls._pending.get(name, 0) + amount
+
+    @classmethod
+    def record(cls, command: str) -> None:
+        """Updates counters based on processed command.
+
+        Args:
+            command (str): One of processing commands, 'upload' or 'download'.
+        """
+        cls.increment(command)
+        if command in PROCESSING_COMMANDS:
+            cls.increment('total')
+
+    @classmethod
+    def record_duck_response(cls, response_time: float) -> None:
+        """Adds response time of a Duck.ai request to the running average."""
+        cls.increment('duck_responses')
+        cls.increment('duck_responses_duration', response_time)
+
+    @classmethod
+    def get(cls, name: str) -> float:
+        """Returns current value of a counter including not yet flushed deltas."""
+        cls._ensure_loaded()
+        with cls._lock:
+            return cls._persisted.get(name, 0) + cls._pending.get(name, 0)
+
+    @classmethod
+    def average_duck_response(cls) -> float:
+        """Returns average Duck.ai response duration in seconds."""
+        responses = cls.get('duck_responses')
+        return cls.get('duck_responses_duration') / responses if responses else DEFAULT_COUNTERS['duck_responses_duration']
+
+    @classmethod
+    def flush(cls) -> None:
+        """Adds pending deltas to the database and refreshes persisted counters."""
+        cls._ensure_loaded()
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+
+        try:
+            with cls._connect() as connection:
+                connection.executemany(
+                    'INSERT INTO counters (name, value) VALUES (?, ?) '
+                    'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+                    list(pending.items())
+                )
+                rows = connection.execute('SELECT name, value FROM counters').fetchall()
+            connection.close()
+        except sqlite3.Error as e:
+            # Return deltas to pending counters so they are written on next flush
+            with cls._lock:
+                for name, value in pending.items():
+                    cls._pending[name] = cls._pending.get(name, 0) + value
+            main_logger.info(f"error: {str(e)}")
+            return
+
+        with cls._lock:
+            cls._persisted = {name: value for name, value in rows}
+
+    @classmethod
+    def run_writer(cls) -> None:
+        """Flush counters every FLUSH_INTERVAL.
+
+        This function is intended to be run in a separate thread and is the
+        only place counters are written during normal operation.
+        """
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            cls.flush()
@@ -0,0 +1,154 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from dotenv import load_dotenv
+from typing import Dict, Iterable, List, Optional
+from logger import main_logger
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Constants
+DEBUG = bool(int(os.getenv('DEBUG', '1')))
+RELATIVE_USER_FILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "user_files")
+USER_FILES_DIR = RELATIVE_USER_FILES_DIR if DEBUG else os.getenv('USER_FILES_PATH', RELATIVE_USER_FILES_DIR)
+BLOBS_DIR = os.path.join(USER_FILES_DIR, ".blobs")  # Inside user_files to allow hardlinks
+MANIFEST_FILENAME = ".manifest.json"
+
+def link_or_copy(source: str, destination: str) -> None:
+    """Atomically places hardlink to source at destination, copying if linking isn't possible.
+
+    Destination is always replaced by a new directory entry, never written
+    in place, because it may be a hardlink shared with a blob or cache entry.
+
+    Args:
+        source (str): Existing file.
+        destination (str): Path to create or replace.
+    """
+    # Already linked, replacing a file with itself would leave the temporary link behind
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        return
+
+    directory = os.path.dirname(destination)
+    temporary_path = tempfile.mktemp(dir=directory, prefix='.link-')
+    try:
+        try:
+            os.link(source, temporary_path)
+        except OSError:
+            # Different file systems or links not supported, copy to a fresh file
+            with tempfile.NamedTemporaryFile(dir=directory, prefix='.copy-', delete=False) as file:
+                temporary_path = file.name
+            shutil.copyfile(source, temporary_path)
+        os.replace(temporary_path, destination)
+    finally:
+        if os.path.lexists(temporary_path):
+            os.unlink(temporary_path)
+
+class BlobStore:
+    """Content-addressed storage for session files.
+
+    Every distinct file content is stored once, named by its SHA-256 digest.
+    Session directories contain hardlinks to blobs and a manifest mapping
+    their filenames to digests. The link count of a blob is its reference
+    count: a blob whose only remaining link is the one in the store is no
+    longer used by any session or cache entry and can be deleted.
+    """
+
+    def __init__(self, blobs_dir: str) -> None:
+        """Constructor for blob store.
+
+        Args:
+            blobs_dir (str): Directory with blobs, must be on the same file system as session directories.
+        """
+        self.blobs_dir = blobs_dir
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+    def blob_path(self, digest: str) -> str:
+        """Returns path to blob with digest."""
+        return os.path.join(self.blobs_dir, digest[:2], digest)
+
+    def _read_manifest(self, directory: str) -> Dict[str, str]:
+        manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path, 'r') as file:
+            return json.load(file)
+
+    def _write_manifest(self, directory: str, manifest: Dict[str, str]) -> None:
+        with tempfile.NamedTemporaryFile('w', dir=directory, prefix='.manifest-', delete=False) as file:
+            json.dump(manifest, file)
+        os.replace(file.name, os.path.join(directory, MANIFEST_FILENAME))
+
+    def add_file(self, file_path: str, digest: str) -> None:
+        """Replaces file with link to blob of the same content.
+
+        If blob doesn't exist yet, the file itself becomes the blob.
+
+        Args:
+            file_path (str): File inside a session directory.
+            digest (str): SHA-256 hex digest of file content.
+        """
+        blob_path = self.blob_path(digest)
+        with self._lock:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            if os.path.exists(blob_path):
+                link_or_copy(blob_path, file_path)
+            else:
+                link_or_copy(file_path, blob_path)
+
+            directory = os.path.dirname(file_path)
+            manifest = self._read_manifest(directory)
+            manifest[os.path.basename(file_path)] = digest
+            self._write_manifest(directory, manifest)
+
+    def digest_of(self, file_path: str) -> Optional[str]:
+        """Returns digest of file if it is still linked to its blob.
+
+        Args:
+            file_path (str): File inside a session directory.
+
+        Returns:
+            str or None: SHA-256 hex digest, None if file isn't stored as blob.
+        """
+        digest = self._read_manifest(os.path.dirname(file_path)).get(os.path.basename(file_path))
+        if digest is None:
+            return None
+        try:
+            if os.path.samefile(file_path, self.blob_path(digest)):
+                return digest
+        except OSError:
+            pass
+        return None
+
+    def forget(self, file_path: str) -> None:
+        """Removes deleted session file from manifest of its directory."""
+        directory = os.path.dirname(file_path)
+        with self._lock:
+            manifest = self._read_manifest(directory)
+            if manifest.pop(os.path.basename(file_path), None) is not None:
+                self._write_manifest(directory, manifest)
+
+    def session_digests(self, session_path: str) -> List[str]:
+        """Returns digests of blobs referenced by session directory."""
+        return list(set(self._read_manifest(session_path).values()))
+
+    def release(self, digests: Iterable[str]) -> None:
+        """Deletes blobs that are no longer linked from anywhere else.
+
+        Args:
+            digests (Iterable[str]): Digests of blobs which lost a reference.
+        """
+        with self._lock:
+            for digest in digests:
+                blob_path = self.blob_path(digest)
+                try:
+                    if os.stat(blob_path).st_nlink <= 1:
+                        os.remove(blob_path)
+                        main_logger.info(f"blob={digest}")
+                except FileNotFoundError:
+                    continue
+
+blob_store = BlobStore(BLOBS_DIR)
@@ -1,5 +1,6 @@
-from typing import TypedDict, Dict, Optional, List, Protocol
-from pydantic import BaseModel
+import uuid
+from typing import TypedDict, Annotated, Any, Dict, Optional, List, Protocol, Tuple, Union
+from pydantic import AfterValidator, BaseModel, Field, PositiveFloat, PositiveInt, model_validator
 
 # Structures of subtitles data
 class SubtitleMetadata(TypedDict):
@@ -12,6 +13,20 @@ class SubtitleEntry(TypedDict):
     end: str
     text: str
 
+class SubtitleCue(SubtitleEntry):
+    index: int
+
+class TimelineFinding(TypedDict, total=False):
+    type: str
+    index: int
+    previous: int
+    value_ms: int
+
+class CueMatch(TypedDict):
+    source: int
+    example: int
+    similarity: float
+
 class SubtitleData(TypedDict):
     metadata: SubtitleMetadata
     subtitles: Dict[int, SubtitleEntry]
@@ -20,35 +35,76 @@ class SubtitleData(TypedDict):
 
 SubtitlesDataDict = Dict[str, SubtitleData]
 
+# Beginning and end of time range as milliseconds or HH:MM:SS,mmm, None for an open end
+TimeRange = List[Optional[Union[int, str]]]
+
 class TranslatorProtocol(Protocol):
     def translate(self, text: str) -> str: ...
 
 # Structures of API requests
+def check_session_id(session_id: str) -> str:
+    """Accepts only session IDs in the form issued by /get-session, so they can't point outside user files."""
+    try:
+        valid = str(uuid.UUID(session_id)) == session_id
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError('Invalid session ID')
+    return session_id
+
+SessionId = Annotated[str, AfterValidator(check_session_id)]
+
 class StatusRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     filename: str
 
 class ShowRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     filename: str
 
+class CuesRequest(BaseModel):
+    session_id: SessionId
+    filename: str
+    offset: int = Field(0, ge=0)
+    limit: int = Field(100, ge=1, le=1000)
+    start_ms: Optional[int] = Field(None, ge=0)
+    end_ms: Optional[int] = Field(None, ge=0)
+
 class ShiftRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     source_filename: str
     delay: int
     items: Optional[List[int]] = None
+    time_range: Optional[TimeRange] = None
 
 class AlignRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     source_filename: str
     example_filename: Optional[str] = None
     source_slice: Optional[List[int]] = None
     example_slice: Optional[List[int]] = None
     trim_start: bool = True
     trim_end: bool = True
+    source_range: Optional[TimeRange] = None
+    example_range: Optional[TimeRange] = None
+    anchors: Optional[List[List[int]]] = None
+    auto_sync: bool = False
+    match_text: bool = False
+
+class MatchRequest(BaseModel):
+    session_id: SessionId
+    source_filename: str
+    example_filename: str
+    min_similarity: float = Field(0.5, gt=0, le=1)
+
+class ValidateRequest(BaseModel):
+    session_id: SessionId
+    source_filename: str
+    min_gap_ms: int = Field(0, ge=0)
+    fix: List[str] = []
 
 class CleanRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     source_filename: str
     bold: bool = False
     italic: bool = False
@@ -56,34 +112,72 @@ class CleanRequest(BaseModel):
     strikethrough: bool = False
     color: bool = False
     font: bool = False
+    items: Optional[List[int]] = None
+    time_range: Optional[TimeRange] = None
+
+class TransformRequest(BaseModel):
+    session_id: SessionId
+    source_filename: str
+    offset: int = 0
+    scale: float = Field(1.0, gt=0)
+    anchor: Union[int, str] = 0
+    source_fps: Optional[float] = Field(None, gt=0)
+    target_fps: Optional[float] = Field(None, gt=0)
+    items: Optional[List[int]] = None
+    time_range: Optional[TimeRange] = None
 
 class EngineRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     source_filename: str
-    target_language: str
+    target_language: Optional[str] = None
+    target_languages: Optional[List[str]] = Field(None, min_length=1)
     original_language: Optional[str]
     engine: str
     clean_markup: bool
+    failover: bool = True
 
 class DuckRequest(BaseModel):
-    session_id: str
+    session_id: SessionId
     source_filename: str
     target_language: str
     original_language: str
     model_name: str
-    model_throttle: float
+    model_throttle: Optional[float] = None  # Adapted to responses of model when not set
     request_timeout: int = 10
     response_timeout: int = 45
 
+class OperationSpec(BaseModel):
+    operation: str
+    parameters: Dict[str, Any] = {}
+
+class PipelineRequest(BaseModel):
+    session_id: SessionId
+    source_filename: str
+    stages: List[OperationSpec] = Field(min_length=1)
+    keep_intermediate: bool = False
+
 # duck.json
-class ModelInfo(TypedDict):
+class ModelInfo(BaseModel):
     name: str
-    tokens: float
+    tokens: PositiveFloat
 
-class DuckData(TypedDict):
+class DuckData(BaseModel):
     codes: Dict[str, str]
     models: Dict[str, ModelInfo]
 
+    def language_name(self, code: str) -> str:
+        """Returns language name for langdetect code."""
+        if code not in self.codes:
+            raise ValueError(f'Unsupported language code: {code}')
+        return self.codes[code]
+
+    def resolve(self, model_name: str, original_language: str, target_language: str) -> Tuple[str, str, str, float]:
+        """Returns source and target language names, model identifier and tokens limit."""
+        if model_name not in self.models:
+            raise ValueError(f'Unsupported model: {model_name}')
+        model = self.models[model_name]
+        return self.language_name(original_language), self.language_name(target_language), model.name, model.tokens
+
 # statistics.json
 class FilesProcessed(TypedDict):
     shift: int
@@ -105,5 +199,48 @@ class StatisticsData(TypedDict):
     duck_statistics: DuckStats
 
 # engines.json
-class LanguagesData(TypedDict):
+class EngineInfo(BaseModel):
+    limit: PositiveInt
+    languages: Dict[str, str]
+    fallback: Optional[str] = None  # Engine used for remaining chunks if this one fails
+
+class EnginesData(BaseModel):
     codes: Dict[str, str]
+    engines: Dict[str, EngineInfo]
+
+    @model_validator(mode='after')
+    def check_languages(self) -> 'EnginesData':
+        """Checks that every engine language is listed in codes."""
+        names = set(self.codes.values())
+        for engine, info in self.engines.items():
+            unknown = set(info.languages) - names
+            if unknown:
+                raise ValueError(f'Engine {engine} has unknown languages: {sorted(unknown)}')
+            if info.fallback is not None and info.fallback not in self.engines:
+                raise ValueError(f'Engine {engine} has unknown fallback: {info.fallback}')
+        return self
+
+    def failover_chain(self, engine: str) -> List[str]:
+        """Returns engine followed by its fallbacks, every engine once."""
+        chain: List[str] = []
+        current: Optional[str] = engine
+        while current is not None and current in self.engines and current not in chain:
+            chain.append(current)
+            current = self.engines[current].fallback
+        return chain
+
+    def resolve(self, engine: str, original_language: str, target_language: str) -> Tuple[str, str, int]:
+        """Returns engine-specific source and target codes and engine character limit."""
+        if engine not in self.engines:
+            raise ValueError(f'Unsupported engine: {engine}')
+        info = self.engines[engine]
+
+        engine_codes: List[str] = []
+        for code in (original_language, target_language):
+            if code not in self.codes:
+                raise ValueError(f'Unsupported language code: {code}')
+            if self.codes[code] not in info.languages:
+                raise ValueError(f'{self.codes[code]} is not supported by {engine}')
+            engine_codes.append(info.languages[self.codes[code]])
+
+        return engine_codes[0], engine_codes[1], info.limit
@@ -1,20 +1,48 @@
+import io
 import os
 import re
+import copy
 import time
-import json
 import props
 import asyncio
-from pathlib import Path
+import inspect
+import functools
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from typing import cast, List, Dict, Union, Optional
-from structures import SubtitleMetadata, SubtitleEntry, SubtitlesDataDict, TranslatorProtocol, DuckData
+from typing import Any, Callable, List, Dict, Tuple, Union, Optional
+from structures import SubtitleMetadata, SubtitleEntry, SubtitlesDataDict, OperationSpec, TimeRange
+from registry import engines_config, duck_config
+from stats import StatisticsManager
+from outputs import output_buffer
+from timeline import TimeIndex, Timeline, segment_drift, estimate_sync
+from matching import match_cues, anchor_pairs
+from markup import markup_cleaner
+from validation import validate_timeline, summarize_findings, fix_timeline
+from backends import translate_chunk
+from cassettes import CASSETTE_MODE, DuckClient
+from latency import latency_model
+from throttle import ThrottleController, MISMATCH_RETRIES, THROTTLE_INITIAL
 from logger import main_logger
 
 load_dotenv()
 DEBUG = bool(int(os.getenv('DEBUG', '1')))
 
 class SubEdit:
+    # Operations available by name for batch processing and pipelines
+    OPERATIONS: Dict[str, str] = {
+        'shift': 'shift_timing',
+        'align': 'align_timing',
+        'clean': 'clean_markup',
+        'transform': 'transform_timing',
+        'validate': 'validate_timing',
+        'translate': 'engine_translate',
+    }
+
+    # Parameters that can't be set by name because they point to files
+    RESERVED_PARAMETERS = {'file_path'}
+
+    # Operations that need example file besides source file
+    EXAMPLE_OPERATIONS = {'align'}
+
     def __init__(self, file_list: List[str]) -> None:
         """Constructor for dictionary with subtitles and files metadata
 
@@ -26,9 +54,10 @@ class SubEdit:
         self.source_file: str = file_list[0]
         self.example_file: Optional[str] = file_list[1] if len(file_list) == 2 else None
         self.processed_file:str = ''
-
-        # Create statistics file if file doesn't exists
-        props.update_statitics()
+        self.stage_timings: List[Dict[str, Any]] = []
+        self._time_indices: Dict[str, TimeIndex] = {}
+        self.report: Dict[str, Any] = {}  # Details of last operation returned with its result
+        self._translation_inputs: Dict[Any, Any] = {}  # Prepared lines and chunk plans shared by forks
 
         # Fill self.subtitles_data
         if len(file_list) <= 2:
@@ -43,8 +72,11 @@ class SubEdit:
         Args:
             file_path (str): String with relative path to file.
         """
+        # Output of a previous operation is read from memory while it waits in write queue
+        raw_data = output_buffer.read(file_path)
+
         # Extract file metadata
-        extracted_metadata = props.extract_metadata(file_path)
+        extracted_metadata = props.detect_metadata(raw_data)
         self.subtitles_data[file_path] = {
             'metadata': extracted_metadata,
             'subtitles': {},
@@ -52,9 +84,9 @@ class SubEdit:
             'duck_eta': 0
         }
 
-        # Open subtitles file using encoding from metadata
+        # Decode subtitles using encoding from metadata, newlines translated as by open()
         file_metadata = self.subtitles_data[file_path]['metadata']
-        with open(file_path, 'r', encoding=file_metadata['encoding']) as file:
+        with io.StringIO(raw_data.decode(file_metadata['encoding']), newline=None) as file:
             raw_subtitles = file.readlines()
             parsed_subtitles: Dict[int, SubtitleEntry] = {}
 
@@ -102,19 +134,48 @@ class SubEdit:
     def _create_file(self, file_path: str) -> None:
         """Writes subtitles into .srt file in UTF-8 encoding.
 
+        The file is written asynchronously, use `output_buffer.read` or
+        `output_buffer.wait` to access it right after creation.
+
         Args:
             file_path (str): String with relative path to file.
         """
-        subtitles_data = self.subtitles_data[file_path]['subtitles']
-        subtitle_indices = sorted(subtitles_data.keys())  # Sort indices numerically
+        # Intermediate pipeline results stay in memory
+        if self._internal_call:
+            return
+
+        serialized_subtitles = props.serialize_subtitles(self.subtitles_data[file_path]['subtitles'])
+
+        # Report timing problems of every output, findings are listed only by validate_timing
+        if 'validation' not in self.report:
+            summary = summarize_findings(validate_timeline(self.subtitles_data[file_path]['subtitles']))
+            self.report['validation'] = {'valid': summary['valid'], 'counts': summary['counts']}
+
+        # Output is served from memory until background writer stores it on disk
+        output_buffer.put(file_path, serialized_subtitles)
+
+    def time_index(self, file_path: Optional[str] = None) -> TimeIndex:
+        """Returns index of subtitles by start time, building it on first use.
+
+        Args:
+            file_path (str or None): String with relative path to file. Defaults to None (source file).
+        """
+        file_path = file_path or self.source_file
+        if file_path not in self._time_indices:
+            self._time_indices[file_path] = TimeIndex(self.subtitles_data[file_path]['subtitles'])
+        return self._time_indices[file_path]
 
-        with open(file_path, 'w', encoding='utf-8') as file:
-            for index in subtitle_indices:
-                file.write(
-                    f'{index}\n'
-                    f'{subtitles_data[index]["start"]} --> {subtitles_data[index]["end"]}\n'
-                    f'{subtitles_data[index]["text"]}\n\n' # Add empty line at the end
-                )
+    def _indices_in_time_range(self, file_path: str, time_range: TimeRange) -> List[int]:
+        """Returns sorted indices of subtitles starting within time range.
+
+        Raises:
+            ValueError: If range is invalid or no subtitle starts within it.
+        """
+        start_ms, end_ms = props.parse_time_range(time_range)
+        indices = sorted(self.time_index(file_path).starting_between(start_ms, end_ms))
+        if not indices:
+            raise ValueError(f'No subtitles start within time range {time_range}.')
+        return indices
 
     def pass_info(self, data: Optional[Union[SubtitlesDataDict, SubtitleMetadata, SubtitleEntry]] = None, show: bool = False, indent: int = 4) -> None:
         """Prints subtitles data to terminal.
@@ -136,18 +197,30 @@ class SubEdit:
                 else:
                     print('  ' * indent + f'{key}: {value}')
 
-    def shift_timing(self, delay: int, items: Optional[List[int]] = None) -> None:
+    def shift_timing(
+        self,
+        delay: int,
+        items: Optional[List[int]] = None,
+        time_range: Optional[TimeRange] = None
+    ) -> None:
         """Shifts subtitles by user-defined milliseconds.
 
         Args:
             delay (int): Milliseconds to delay.
             items (list[int]): List of subtitles numbers. Defaults to None (all subtitles are shifted).
+            time_range (list or None): Beginning and end of time range as milliseconds or HH:MM:SS,mmm,
+                None for an open end. Only subtitles starting within range are shifted. Defaults to None.
         """
         parsed_subtitles = self.subtitles_data[self.source_file]['subtitles']
 
         # Set filename for processed subtitles
         source_name, source_ext = os.path.splitext(self.source_file)
-        if items is None:
+        if items is not None and time_range is not None:
+            raise ValueError('items and time_range parameters can\'t be used together.')
+        elif time_range is not None:
+            subtitle_indices = self._indices_in_time_range(self.source_file, time_range)
+            self.shifted_file = f'{source_name}-shifted-by-{delay}-ms{props.time_range_label(*props.parse_time_range(time_range))}{source_ext}'
+        elif items is None:
             self.shifted_file = f'{source_name}-shifted-by-{delay}-ms{source_ext}'
             subtitle_indices = sorted(parsed_subtitles.keys())
         elif type(items) is list and len(items) == 2:
@@ -164,44 +237,111 @@ class SubEdit:
             'duck_eta': 0
         }
         shifted_subtitles = self.subtitles_data[self.shifted_file]['subtitles']
-        shifted_subtitles.update(parsed_subtitles)
+        shifted_subtitles.update({index: subtitle.copy() for index, subtitle in parsed_subtitles.items()})
 
-        # Update processed file dictionary with shifted timing
-        time_format = '%H:%M:%S,%f'
-        for index in subtitle_indices:
-            subtitle = parsed_subtitles[index]
+        # Update processed file dictionary with shifted timing, times before zero are clamped
+        timeline = Timeline(shifted_subtitles)
+        timeline.offset(delay, timeline.select(subtitle_indices))
+        timeline.write(shifted_subtitles)
+
+        # Create output subtitle file and store path for reference
+        self._create_file(self.shifted_file)
+        self.processed_file = os.path.basename(self.shifted_file)
+
+        # Update statistics counters
+        StatisticsManager.record('shift')
 
-            # Parse original timing
-            original_start = datetime.strptime(subtitle['start'], time_format)
-            original_end = datetime.strptime(subtitle['end'], time_format)
+    def transform_timing(
+        self,
+        offset: int = 0,
+        scale: float = 1.0,
+        anchor: Union[int, str] = 0,
+        source_fps: Optional[float] = None,
+        target_fps: Optional[float] = None,
+        items: Optional[List[int]] = None,
+        time_range: Optional[TimeRange] = None
+    ) -> None:
+        """Applies framerate conversion, scaling and offset to subtitles timing in one pass.
 
-            # Calculate delay
-            delay_start = original_start + timedelta(milliseconds=delay)
-            delay_end = original_end + timedelta(milliseconds=delay)
+        Every selected time t becomes anchor + (t * source_fps / target_fps - anchor) * scale + offset,
+        times before zero are clamped.
 
-            # Format new timing
-            new_start = delay_start.strftime(time_format)[:-3]
-            new_end = delay_end.strftime(time_format)[:-3]
+        Args:
+            offset (int): Milliseconds to delay. Defaults to 0.
+            scale (float): Scaling factor. Defaults to 1.0.
+            anchor (int or str): Time that is not moved by scaling, as milliseconds or HH:MM:SS,mmm. Defaults to 0.
+            source_fps (float or None): Framerate of video subtitles were made for. Defaults to None (no conversion).
+            target_fps (float or None): Framerate of video to retime subtitles for. Defaults to None (no conversion).
+            items (list[int]): Indices of first and last subtitle to transform. Defaults to None (all subtitles are transformed).
+            time_range (list or None): Beginning and end of time range as milliseconds or HH:MM:SS,mmm,
+                None for an open end. Only subtitles starting within range are transformed. Defaults to None.
+        """
+        parsed_subtitles = self.subtitles_data[self.source_file]['subtitles']
+        if scale <= 0:
+            raise ValueError(f'scale parameter must be positive ({scale} provided).')
+        if (source_fps is None) != (target_fps is None):
+            raise ValueError('source_fps and target_fps parameters must be used together.')
+        if source_fps is not None and target_fps is not None and (source_fps <= 0 or target_fps <= 0):
+            raise ValueError(f'Framerates must be positive ({source_fps} and {target_fps} provided).')
+        anchor_ms = anchor if isinstance(anchor, int) else props.timecode_to_ms(anchor)
+
+        # Set filename for processed subtitles and select subtitles to transform
+        source_name, source_ext = os.path.splitext(self.source_file)
+        filename_modifier = ''
+        filename_modifier += f'-fps-{source_fps:g}-to-{target_fps:g}' if source_fps and target_fps else ''
+        filename_modifier += f'-scaled-by-{scale:g}' if scale != 1.0 else ''
+        filename_modifier += f'-shifted-by-{offset}-ms' if offset else ''
+        if items is not None and time_range is not None:
+            raise ValueError('items and time_range parameters can\'t be used together.')
+        elif time_range is not None:
+            subtitle_indices: Optional[List[int]] = self._indices_in_time_range(self.source_file, time_range)
+            filename_modifier += props.time_range_label(*props.parse_time_range(time_range))
+        elif items is not None:
+            if len(items) != 2:
+                raise ValueError(f'items parameter must be a list with 2 items ({len(items)} provided).')
+            subtitle_indices = list(range(items[0], items[1] + 1))
+            filename_modifier += f'-from-{items[0]}-to-{items[1]}'
+        else:
+            subtitle_indices = None
+        self.transformed_file = f'{source_name}-transformed{filename_modifier}{source_ext}'
 
-            shifted_subtitles[index].update({
-                'start': new_start,
-                'end': new_end,
-                'text': subtitle['text']
-            })
+        # Create processed file dictionary and copy data from source file
+        self.subtitles_data[self.transformed_file] = {
+            'metadata': self.subtitles_data[self.source_file]['metadata'].copy(),
+            'subtitles': {index: subtitle.copy() for index, subtitle in parsed_subtitles.items()},
+            'engine_eta': 0,
+            'duck_eta': 0
+        }
+        transformed_subtitles = self.subtitles_data[self.transformed_file]['subtitles']
+
+        # Compose framerate ratio, scaling and offset into a single affine transform
+        fps_ratio = source_fps / target_fps if source_fps and target_fps else 1.0
+        timeline = Timeline(transformed_subtitles)
+        timeline.apply(
+            scale=fps_ratio * scale,
+            offset=round(anchor_ms * (1 - scale)) + offset,
+            mask=timeline.select(subtitle_indices)
+        )
+        timeline.write(transformed_subtitles)
 
         # Create output subtitle file and store path for reference
-        self._create_file(self.shifted_file)
-        self.processed_file = os.path.basename(self.shifted_file)
+        self._create_file(self.transformed_file)
+        self.processed_file = os.path.basename(self.transformed_file)
 
-        # Update statistics file
-        props.update_statitics('shift')
+        # Update statistics counters
+        StatisticsManager.record('transform')
 
     def align_timing(
         self,
         source_slice: Optional[List[int]] = None,
         example_slice: Optional[List[int]] = None,
         trim_start: bool = True,
-        trim_end: bool = True
+        trim_end: bool = True,
+        source_range: Optional[TimeRange] = None,
+        example_range: Optional[TimeRange] = None,
+        anchors: Optional[List[List[int]]] = None,
+        auto_sync: bool = False,
+        match_text: bool = False
     ) -> None:
         """Aligns source subtitles timing to match example subtitles timing for the specified slices.
 
@@ -210,10 +350,51 @@ class SubEdit:
             example_slice (list[int] or None): Indices of first and last subtitle to align by. Defaults to None (aligned by all example subtitles)
             trim_start (bool): Flag to indicate if aligned file should include subtitles before source slice. Defaults to True (subtitles removed)
             trim_end (bool): Flag to indicate if aligned file should include subtitles after source slice. Defaults to True (subtitles removed)
+            source_range (list or None): Time range used instead of source slice, subtitles starting within it are aligned. Defaults to None
+            example_range (list or None): Time range used instead of example slice, subtitles starting within it are aligned by. Defaults to None
+            anchors (list[list[int]] or None): Pairs of source and example subtitle indices used instead of slices
+                for piecewise-linear alignment, see `_align_by_anchors`. Defaults to None
+            auto_sync (bool): Flag to detect offset and drift from timing of both files instead of using slices,
+                see `_align_automatically`. Defaults to False
+            match_text (bool): Flag to use cues with matching text as anchors, for files with the same text
+                and different timing, see `matching.match_cues`. Defaults to False
         """
         if self.example_file is None:
             raise ValueError('Example file is required for alignment')
 
+        if auto_sync:
+            if anchors is not None or source_slice or example_slice or source_range is not None or example_range is not None:
+                raise ValueError('auto_sync parameter can\'t be used together with anchors, slices or ranges.')
+            self._align_automatically()
+            return
+
+        if match_text:
+            if anchors is not None or source_slice or example_slice or source_range is not None or example_range is not None:
+                raise ValueError('match_text parameter can\'t be used together with anchors, slices or ranges.')
+            parsed_source = self.subtitles_data[self.source_file]['subtitles']
+            parsed_example = self.subtitles_data[self.example_file]['subtitles']
+            anchors = anchor_pairs(match_cues(parsed_source, parsed_example), parsed_source, parsed_example)
+            if not anchors:
+                raise ValueError('No subtitles with matching text found.')
+
+        if anchors is not None:
+            if source_slice or example_slice or source_range is not None or example_range is not None:
+                raise ValueError('anchors parameter can\'t be used together with slices or ranges.')
+            self._align_by_anchors(anchors)
+            return
+
+        # Convert time ranges into slices of first and last subtitle starting within range
+        if source_range is not None:
+            if source_slice:
+                raise ValueError('source_slice and source_range parameters can\'t be used together.')
+            source_indices = self._indices_in_time_range(self.source_file, source_range)
+            source_slice = [source_indices[0], source_indices[-1]]
+        if example_range is not None:
+            if example_slice:
+                raise ValueError('example_slice and example_range parameters can\'t be used together.')
+            example_indices = self._indices_in_time_range(self.example_file, example_range)
+            example_slice = [example_indices[0], example_indices[-1]]
+
         # Set filename for processed subtitles
         source_name, source_ext = os.path.splitext(self.source_file)
         filename_modifier = ''
@@ -253,59 +434,40 @@ class SubEdit:
                       source_slice[1] == example_slice[1])
 
         # Get source and example timing points
-        time_format = '%H:%M:%S,%f'
-        source_start_time = datetime.strptime(parsed_source[source_slice[0]]['start'], time_format)
-        source_end_time = datetime.strptime(parsed_source[source_slice[1]]['end'], time_format)
-        example_start_time = datetime.strptime(parsed_example[example_slice[0]]['start'], time_format)
-        example_end_time = datetime.strptime(parsed_example[example_slice[1]]['end'], time_format)
+        source_start_time = props.timecode_to_ms(parsed_source[source_slice[0]]['start'])
+        source_end_time = props.timecode_to_ms(parsed_source[source_slice[1]]['end'])
+        example_start_time = props.timecode_to_ms(parsed_example[example_slice[0]]['start'])
+        example_end_time = props.timecode_to_ms(parsed_example[example_slice[1]]['end'])
 
         # Calculate total durations
-        source_duration = (source_end_time - source_start_time).total_seconds()
-        example_duration = (example_end_time - example_start_time).total_seconds()
+        source_duration = source_end_time - source_start_time
+        example_duration = example_end_time - example_start_time
 
         if source_duration == 0:
             raise ValueError('Source duration is zero, cannot calculate scaling factor.')
 
+        # Copy source subtitles to aligned dictionary
+        aligned_subtitles.update({index: subtitle.copy() for index, subtitle in parsed_source.items()})
+        slice_indices = [index for index in aligned_subtitles if source_slice[0] <= index <= source_slice[1]]
+
         # Update processed file dictionary with aligned timing
-        subtitle_indices = sorted(parsed_source.keys())
-        for index in subtitle_indices:
-            # Copy source subtitles to aligned dictionary
-            subtitle = parsed_source[index]
-            aligned_subtitles[index] = subtitle
-
-            # Check if source and example timing are identical
-            if source_slice[0] <= index <= source_slice[1]:
-                if exact_match:
-                    aligned_subtitles[index].update({
-                        'start': parsed_example[index]['start'],
-                        'end': parsed_example[index]['end']
-                    })
-                else:
-                    # Get original timing
-                    original_start = datetime.strptime(subtitle['start'], time_format)
-                    original_end = datetime.strptime(subtitle['end'], time_format)
-
-                    # Calculate position within source duration (scaling factor 0 to 1)
-                    start_pos = (original_start - source_start_time).total_seconds() / source_duration
-                    end_pos = (original_end - source_start_time).total_seconds() / source_duration
-
-                    # Apply position to example duration
-                    new_start_seconds = example_start_time.timestamp() + (start_pos * example_duration)
-                    new_end_seconds = example_start_time.timestamp() + (end_pos * example_duration)
-
-                    # Convert to datetime and format
-                    new_start = datetime.fromtimestamp(new_start_seconds).strftime(time_format)[:-3]
-                    new_end = datetime.fromtimestamp(new_end_seconds).strftime(time_format)[:-3]
-
-                    aligned_subtitles[index].update({
-                        'start': new_start,
-                        'end': new_end,
-                    })
-            else:
+        if exact_match:
+            # Source and example slices are identical, copy example timing
+            for index in slice_indices:
                 aligned_subtitles[index].update({
-                    'start': subtitle['start'],
-                    'end': subtitle['end']
+                    'start': parsed_example[index]['start'],
+                    'end': parsed_example[index]['end']
                 })
+        else:
+            # Map position within source duration onto example duration
+            timeline = Timeline(aligned_subtitles)
+            timeline.apply(
+                scale=example_duration / source_duration,
+                anchor=source_start_time,
+                offset=example_start_time - source_start_time,
+                mask=timeline.select(slice_indices)
+            )
+            timeline.write(aligned_subtitles)
 
         # Trim subtitles outside source slice if needed
         start_index = source_slice[0] if trim_start else sorted(parsed_source.keys())[0]
@@ -320,8 +482,101 @@ class SubEdit:
         self._create_file(self.aligned_file)
         self.processed_file = os.path.basename(self.aligned_file)
 
-        # Update statistics file
-        props.update_statitics('align')
+        # Update statistics counters
+        StatisticsManager.record('align')
+
+    def _align_by_anchors(self, anchors: List[List[int]]) -> None:
+        """Aligns source subtitles to example subtitles by several anchor pairs at once.
+
+        Start of every anchored source subtitle is moved to start of its
+        example subtitle and timing between anchors is interpolated linearly,
+        so cuts and differing intros are fixed in a single pass. Subtitles
+        outside of anchored part are shifted by offset of the nearest anchor.
+        Offset, scale and drift of every segment are saved in self.report.
+
+        Args:
+            anchors (list[list[int]]): Pairs of source and example subtitle indices ordered by time.
+
+        Raises:
+            ValueError: If anchor is not a pair of existing indices or anchor times aren't strictly increasing.
+        """
+        assert self.example_file is not None
+        parsed_source = self.subtitles_data[self.source_file]['subtitles']
+        parsed_example = self.subtitles_data[self.example_file]['subtitles']
+
+        # Anchor subtitles are matched by their start time
+        source_points: List[int] = []
+        example_points: List[int] = []
+        for anchor in anchors:
+            if len(anchor) != 2 or anchor[0] not in parsed_source or anchor[1] not in parsed_example:
+                raise ValueError(f'Anchor must be a pair of existing source and example subtitle indices ({anchor} provided).')
+            source_points.append(props.timecode_to_ms(parsed_source[anchor[0]]['start']))
+            example_points.append(props.timecode_to_ms(parsed_example[anchor[1]]['start']))
+
+        # Set filename for processed subtitles
+        source_name, source_ext = os.path.splitext(self.source_file)
+        self.aligned_file = f'{source_name}-aligned-by-{len(anchors)}-anchors{source_ext}'
+
+        # Create processed file dictionary and copy data from source file
+        self.subtitles_data[self.aligned_file] = {
+            'metadata': self.subtitles_data[self.source_file]['metadata'].copy(),
+            'subtitles': {index: subtitle.copy() for index, subtitle in parsed_source.items()},
+            'engine_eta': 0,
+            'duck_eta': 0
+        }
+        aligned_subtitles = self.subtitles_data[self.aligned_file]['subtitles']
+
+        # Remap all subtitles in one pass
+        timeline = Timeline(aligned_subtitles)
+        timeline.interpolate(source_points, example_points)
+        timeline.write(aligned_subtitles)
+        self.report = {'segments': segment_drift(source_points, example_points)}
+
+        # Create output subtitle file and store path for reference
+        self._create_file(self.aligned_file)
+        self.processed_file = os.path.basename(self.aligned_file)
+
+        # Update statistics counters
+        StatisticsManager.record('align')
+
+    def _align_automatically(self) -> None:
+        """Aligns source subtitles to example subtitles without any indices provided.
+
+        Offset and speed difference are estimated by cross-correlation of
+        speech activity of both files, see `timeline.estimate_sync`, and
+        applied to all source subtitles. Estimation with its confidence is
+        saved in self.report, low confidence means files probably don't match.
+        """
+        assert self.example_file is not None
+        parsed_source = self.subtitles_data[self.source_file]['subtitles']
+        parsed_example = self.subtitles_data[self.example_file]['subtitles']
+        sync = estimate_sync(parsed_source, parsed_example)
+
+        # Set filename for processed subtitles
+        source_name, source_ext = os.path.splitext(self.source_file)
+        self.aligned_file = f'{source_name}-aligned-auto{source_ext}'
+
+        # Create processed file dictionary and copy data from source file
+        self.subtitles_data[self.aligned_file] = {
+            'metadata': self.subtitles_data[self.source_file]['metadata'].copy(),
+            'subtitles': {index: subtitle.copy() for index, subtitle in parsed_source.items()},
+            'engine_eta': 0,
+            'duck_eta': 0
+        }
+        aligned_subtitles = self.subtitles_data[self.aligned_file]['subtitles']
+
+        # Apply estimated transform in one pass
+        timeline = Timeline(aligned_subtitles)
+        timeline.apply(scale=sync['scale'], offset=sync['offset_ms'])
+        timeline.write(aligned_subtitles)
+        self.report = {'sync': sync}
+
+        # Create output subtitle file and store path for reference
+        self._create_file(self.aligned_file)
+        self.processed_file = os.path.basename(self.aligned_file)
+
+        # Update statistics counters
+        StatisticsManager.record('align')
 
     def clean_markup(
         self,
@@ -331,7 +586,9 @@ class SubEdit:
         underline: bool = False,
         strikethrough: bool = False,
         color: bool = False,
-        font: bool = False
+        font: bool = False,
+        items: Optional[List[int]] = None,
+        time_range: Optional[TimeRange] = None
         ) -> None:
         """Removes user-defined markup tags from subtitles.
 
@@ -343,10 +600,27 @@ class SubEdit:
             strikethrough (bool): Removes <s></s> tags. Defaults to False.
             color (bool): Removes <font color="color name or #hex"></font> tags. Defaults to False.
             font (bool): Removes <font face="font-family-name"></font> tags. Defaults to False.
+            items (list[int]): Indices of first and last subtitle to clean. Defaults to None (all subtitles are cleaned).
+            time_range (list or None): Beginning and end of time range as milliseconds or HH:MM:SS,mmm,
+                None for an open end. Only subtitles starting within range are cleaned. Defaults to None.
         """
-        # Set filename for processed subtitles
+        parsed_subtitles = self.subtitles_data[self.source_file]['subtitles']
+
+        # Set filename for processed subtitles and select subtitles to clean
         source_name, source_ext = os.path.splitext(self.source_file)
-        self.cleaned_file = f'{source_name}-cleaned{source_ext}'
+        if items is not None and time_range is not None:
+            raise ValueError('items and time_range parameters can\'t be used together.')
+        elif time_range is not None:
+            selected_indices = set(self._indices_in_time_range(self.source_file, time_range))
+            self.cleaned_file = f'{source_name}-cleaned{props.time_range_label(*props.parse_time_range(time_range))}{source_ext}'
+        elif items is not None:
+            if len(items) != 2:
+                raise ValueError(f'items parameter must be a list with 2 items ({len(items)} provided).')
+            selected_indices = set(range(items[0], items[1] + 1))
+            self.cleaned_file = f'{source_name}-cleaned-from-{items[0]}-to-{items[1]}{source_ext}'
+        else:
+            selected_indices = set(parsed_subtitles.keys())
+            self.cleaned_file = f'{source_name}-cleaned{source_ext}'
 
         # Create processed file dictionary and copy metadata from source file
         self.subtitles_data[self.cleaned_file] = {
@@ -356,44 +630,132 @@ class SubEdit:
             'duck_eta': 0
         }
 
-        parsed_subtitles = self.subtitles_data[self.source_file]['subtitles']
         cleaned_subtitles = self.subtitles_data[self.cleaned_file]['subtitles']
 
+        # Select cleaner for requested tags, all markup is removed if none is specified
+        tag_flags = {'b': bold, 'i': italic, 'u': underline, 's': strikethrough, 'color': color, 'face': font}
+        cleaner = markup_cleaner(frozenset(tag for tag, flag in tag_flags.items() if flag))
+        removed_tags: Dict[str, int] = {}
+
         # Update processed file dictionary with cleaned text
         subtitle_indices = sorted(parsed_subtitles.keys())
         for index in subtitle_indices:
             subtitle = parsed_subtitles[index]
             new_text = subtitle['text']
 
-            # Check if any markup tag is specified
-            if bold or italic or underline or strikethrough or color or font:
-                if bold:
-                    new_text = re.sub(r'<b>|</b>', '', new_text)
-                if italic:
-                    new_text = re.sub(r'<i>|</i>', '', new_text)
-                if underline:
-                    new_text = re.sub(r'<u>|</u>', '', new_text)
-                if strikethrough:
-                    new_text = re.sub(r'<s>|</s>', '', new_text)
-                if color and '<font color=' in new_text:
-                    new_text = re.sub(r'<font\s+color=["\'].*?["\'].*?>|</font>', '', new_text)
-                if font and '<font face=' in new_text:
-                    new_text = re.sub(r'<font\s+face=["\'].*?["\'].*?>|</font>', '', new_text)
-            else: # Remove all markup
-                new_text = re.sub(r'<.*?>', '', new_text)
+            # Copy subtitles outside of selected range as is
+            if index in selected_indices:
+                new_text, removed = cleaner.clean(new_text)
+                for tag, count in removed.items():
+                    removed_tags[tag] = removed_tags.get(tag, 0) + count
 
             cleaned_subtitles[index] = {
                 'start': subtitle['start'],
                 'end': subtitle['end'],
                 'text': new_text
             }
+        self.report = {'removed_tags': removed_tags}
 
         # Create output subtitle file and store path for reference
         self._create_file(self.cleaned_file)
         self.processed_file = os.path.basename(self.cleaned_file)
 
-        # Update statistics file
-        props.update_statitics('clean')
+        # Update statistics counters
+        StatisticsManager.record('clean')
+
+    def validate_timing(self, min_gap_ms: int = 0, fix: Optional[List[str]] = None) -> None:
+        """Checks subtitles timing and optionally fixes found problems.
+
+        Overlaps, cues without positive duration, gaps shorter than min_gap_ms,
+        cues out of start time order and gaps in numbering are reported in
+        self.report. Fixes are applied in order merge, trim, renumber, see
+        `validation.fix_timeline`, and the fixed file is validated again.
+
+        Args:
+            min_gap_ms (int): Shortest allowed gap between cues in milliseconds. Defaults to 0.
+            fix (list[str] or None): Fix modes from 'merge', 'trim' and 'renumber'. Defaults to None (file is only validated).
+        """
+        parsed_subtitles = self.subtitles_data[self.source_file]['subtitles']
+        if min_gap_ms < 0:
+            raise ValueError(f'min_gap_ms parameter can\'t be negative ({min_gap_ms} provided).')
+        fix = fix or []
+
+        # Set filename for processed subtitles
+        source_name, source_ext = os.path.splitext(self.source_file)
+        filename_modifier = f'-fixed-{"-".join(fix)}' if fix else '-validated'
+        self.validated_file = f'{source_name}{filename_modifier}{source_ext}'
+
+        # Fix copy of source subtitles if requested
+        findings = validate_timeline(parsed_subtitles, min_gap_ms)
+        if fix:
+            validated_subtitles, changes = fix_timeline(parsed_subtitles, fix, min_gap_ms)
+            remaining = validate_timeline(validated_subtitles, min_gap_ms)
+        else:
+            validated_subtitles = {index: subtitle.copy() for index, subtitle in parsed_subtitles.items()}
+            changes, remaining = {}, findings
+
+        # Create processed file dictionary and copy metadata from source file
+        self.subtitles_data[self.validated_file] = {
+            'metadata': self.subtitles_data[self.source_file]['metadata'].copy(),
+            'subtitles': validated_subtitles,
+            'engine_eta': 0,
+            'duck_eta': 0
+        }
+        self.report = {
+            'validation': summarize_findings(findings),
+            'fixed': changes,
+            'remaining': summarize_findings(remaining)['counts'],
+        }
+
+        # Create output subtitle file and store path for reference
+        self._create_file(self.validated_file)
+        self.processed_file = os.path.basename(self.validated_file)
+
+        # Update statistics counters
+        StatisticsManager.record('validate')
+
+    def _prepare_translation(self, file_path: str, clean_markup: bool) -> Tuple[List[str], List[int]]:
+        """Returns lines to translate, prepared once per file and shared by all target languages.
+
+        Markup is removed if requested, line breaks are replaced with spaces
+        and every distinct non-empty line is kept once.
+
+        Args:
+            file_path (str): Path to subtitle file to translate.
+            clean_markup (bool): Remove all markup before translation.
+
+        Returns:
+            Tuple[List[str], List[int]]: Distinct lines and position of every subtitle text among them,
+                -1 for empty texts that aren't sent to engine.
+        """
+        key = (file_path, clean_markup)
+        if key not in self._translation_inputs:
+            if clean_markup:
+                # Remove all markup from subtitles using props helper
+                prepared_subtitles = props.remove_all_markup(self.subtitles_data[file_path])
+            else:
+                # Keep original subtitle formatting
+                source = self.subtitles_data[file_path]['subtitles']
+                prepared_subtitles = [source[i]['text'] for i in sorted(source)]
+
+            # Replace line breaks with spaces to increase translation accuracy
+            prepared_subtitles = props.process_newlines(prepared_subtitles)
+
+            # Translate repeated lines once, empty lines would break splitting of translated chunks
+            lines: List[str] = []
+            line_positions: Dict[str, int] = {}
+            positions: List[int] = []
+            for line in prepared_subtitles:
+                if not line.strip():
+                    positions.append(-1)
+                    continue
+                if line not in line_positions:
+                    line_positions[line] = len(lines)
+                    lines.append(line)
+                positions.append(line_positions[line])
+            self._translation_inputs[key] = (lines, positions)
+
+        return self._translation_inputs[key]
 
     async def engine_translate(
             self,
@@ -401,33 +763,27 @@ class SubEdit:
             original_language: Optional[str] = None,
             file_path: Optional[str] = None,
             engine: str = 'Google',
-            clean_markup: bool = True
+            clean_markup: bool = True,
+            failover: bool = True
         ) -> None:
         """
         Translates subtitles using the selected translation engine.
 
+        Lines are prepared and split into chunks once per file, see
+        `_prepare_translation`, so forks translating the same file into
+        other languages reuse them. Chunks are sent concurrently within
+        engine limits of `backends.translate_chunk`. Chunk that still fails
+        after retries is translated by fallback engines from engines.json,
+        number of chunks translated by every engine is saved in self.report.
+
         Args:
             target_language (str): Language to translate to.
             original_language (str): Language to translate from (autodetected if not provided).
             file_path (str): Path to subtitle file to translate (defaults to current source file).
             engine (str): Translation engine to use. Defaults to 'Google'.
-            chunk_size (int): Number of subtitles to send in each translation request. Defaults to 100.
+            clean_markup (bool): Remove all markup before translation. Defaults to True.
+            failover (bool): Use fallback engines for chunks the selected engine fails to translate. Defaults to True.
         """
-        from deep_translator import ( # type: ignore
-            LingueeTranslator,
-            MyMemoryTranslator,
-            GoogleTranslator,
-        )
-
-        # Mapping of engine name to corresponding class
-        TRANSLATOR_ENGINES = {
-            'Linguee': LingueeTranslator,
-            'MyMemory': MyMemoryTranslator,
-            'Google': GoogleTranslator,  # Default engine
-        }
-
-        TranslateEngine = TRANSLATOR_ENGINES.get(engine, GoogleTranslator)
-
         # Determine which file to translate and source language to use
         file_path = self.source_file if file_path is None else file_path
         original_language = (
@@ -443,78 +799,76 @@ class SubEdit:
         # Initialize translated file structure by copying source metadata and subtitle content
         self.subtitles_data[self.engine_translated_file] = {
             'metadata': self.subtitles_data[self.source_file]['metadata'].copy(),
-            'subtitles': self.subtitles_data[self.source_file]['subtitles'].copy(),
+            'subtitles': {index: subtitle.copy() for index, subtitle in self.subtitles_data[self.source_file]['subtitles'].items()},
             'engine_eta': 0,
             'duck_eta': 0
         }
 
-        # Load formatted language codes from engines.json for selected engine
-        with open(Path(__file__).parent / '../shared/engines.json', 'r') as file:
-            data = json.load(file)
-            langdetect_source = data['codes'][original_language]
-            langdetect_target = data['codes'][target_language]
-            engine_source = data['engines'][engine]['languages'][langdetect_source]
-            engine_target = data['engines'][engine]['languages'][langdetect_target]
-            engine_limit = data['engines'][engine]['limit']
-
-        # Make a list of subtitles to translate
-        if clean_markup:
-            # Remove all markup from subtitles using props helper
-            prepared_subtitles = props.remove_all_markup(self.subtitles_data[file_path])
-        else:
-            # Keep original subtitle formatting
-            source = self.subtitles_data[self.source_file]['subtitles']
-            prepared_subtitles = [source[i]['text'] for i in sorted(source)]
-
-        # Replace line breaks with spaces to increase translation accuracy
-        prepared_subtitles: List[str] = props.process_newlines(prepared_subtitles)
-
-        # Lists with translated subtitles and indices of translation errors
-        translated_subtitles: List[str] = []
+        # Get formatted language codes from engines.json for selected engine
+        engines_data = engines_config.get()
+        engine_source, engine_target, engine_limit = engines_data.resolve(engine, original_language, target_language)
+        failover_engines = engines_data.failover_chain(engine) if failover else [engine]
+        used_engines: Dict[str, int] = {}
+
+        # Make a list of subtitles to translate and split it into chunks
+        lines, positions = self._prepare_translation(file_path, clean_markup)
+        chunk_key = (file_path, clean_markup, engine_limit)
+        if chunk_key not in self._translation_inputs:
+            self._translation_inputs[chunk_key] = props.plan_chunks(lines, engine_limit)
+        chunks: List[Tuple[int, int]] = self._translation_inputs[chunk_key]
+
+        async def translate_with(engine_name: str, chunk_lines: List[str]) -> List[str]:
+            # Fallback engine may have lower limit, chunk is split again for it
+            if engine_name == engine:
+                source_code, target_code, parts = engine_source, engine_target, [(0, len(chunk_lines))]
+            else:
+                source_code, target_code, limit = engines_data.resolve(engine_name, original_language, target_language)
+                parts = props.plan_chunks(chunk_lines, limit)
+
+            translated_lines: List[str] = []
+            for part_start, part_end in parts:
+                part_lines = chunk_lines[part_start:part_end]
+                translated_text = await translate_chunk(engine_name, source_code, target_code, "\n\n".join(part_lines))
+
+                # Try splitting back the same number of segments
+                translated_list = translated_text.strip().split("\n\n")
+
+                # If translation output doesn't match input size, raise warning or fallback
+                if len(translated_list) != len(part_lines):
+                    raise ValueError("Mismatch in translated segment count. Check translation formatting.")
+                translated_lines.extend(translated_list)
+            return translated_lines
+
+        async def translate(chunk_start: int, chunk_end: int) -> List[str]:
+            chunk_lines = lines[chunk_start:chunk_end]
+            errors: List[str] = []
+            for engine_name in failover_engines:
+                try:
+                    translated_lines = await translate_with(engine_name, chunk_lines)
+                except Exception as e:
+                    errors.append(f'{engine_name}: {str(e)}')
+                    continue
+                used_engines[engine_name] = used_engines.get(engine_name, 0) + 1
+                return translated_lines
+            raise ValueError(f'Translation failed ({"; ".join(errors)})')
 
         # Translate subtitles
-        index_current = 0
-        index_total = len(prepared_subtitles)
-        while index_current < index_total:
-            chunk_lines: List[str] = []
-            chunk_length = 0
-
-            # Collect lines into a chunk without exceeding engine limit and prepared subtitles length
-            while chunk_length < engine_limit and index_current < index_total:
-                line = prepared_subtitles[index_current]
-                line_length = len(line) + 2  # add 2 for the "\n\n" that will be inserted
-                chunk_length += line_length
-                chunk_lines.append(line)
-                chunk_length += line_length
-                index_current += 1
-
-            # Join the chunk and translate
-            chunk = "\n\n".join(chunk_lines)
-            engine_instance = TranslateEngine(source=engine_source, target=engine_target)
-            typed_engine = cast(TranslatorProtocol, engine_instance)
-            translated_text = typed_engine.translate(chunk)
-
-            # Try splitting back the same number of segments
-            translated_list = translated_text.strip().split("\n\n")
-
-            # If translation output doesn't match input size, raise warning or fallback
-            if len(translated_list) != len(chunk_lines):
-                raise ValueError("Mismatch in translated segment count. Check translation formatting.")
-
-            translated_subtitles.extend(translated_list)
+        translated_lines: List[str] = []
+        for translated_list in await asyncio.gather(*(translate(*chunk) for chunk in chunks)):
+            translated_lines.extend(translated_list)
+        self.report = {'engines': used_engines}
 
         # Assign each translated text back to corresponding subtitle object
         translated = self.subtitles_data[self.engine_translated_file]['subtitles']
-        for key, subtitle in zip(translated.keys(), translated_subtitles):
-            translated[key]['text'] = subtitle
-
+        for key, position in zip(sorted(translated), positions):
+            translated[key]['text'] = translated_lines[position] if position >= 0 else ''
 
         # Create output subtitle file and store path for reference
         self._create_file(self.engine_translated_file)
         self.processed_file = os.path.basename(self.engine_translated_file)
 
-        # Update statistics file
-        props.update_statitics('translate')
+        # Update statistics counters
+        StatisticsManager.record('translate')
 
     # Method accesible only on localhost
     if DEBUG:
@@ -524,24 +878,30 @@ class SubEdit:
             original_language: Optional[str] = None,
             file_path: Optional[str] = None,
             model_name: str = 'gpt-4o-mini',
-            model_throttle: float = 0.5,
+            model_throttle: Optional[float] = None,
             request_timeout: int = 15,
             response_timeout: int = 45
             ) -> None:
             """Translates subtitles using LLM provided by DuckDuckGo.
 
+            Without model_throttle prompt size is adapted by `throttle.ThrottleController`:
+            every prompt is filled up to the learned share of the model's tokens window,
+            which grows after valid responses and shrinks after responses with a wrong
+            number of lines or close to response timeout. Such prompt is sent again
+            with the smaller window up to MISMATCH_RETRIES times.
+            With CASSETTE_MODE set throttle defaults to THROTTLE_INITIAL instead, so
+            recorded and replayed translations send the same prompts.
+
             Args:
                 target_language (str): Target language.
                 original_language (str): Original file language.
                 file_path (str): String with relative path to file.
                 model_name (str): Translator LLM. Defaults to GPT-4o-mini by OpenAI.
                 model_throttle (float): Coefficient by which the model's token window is reduced.
-                    Slows translation time, increases accuracy. Must be between 0 and 1. Defaults to 0.5.
+                    Slows translation time, increases accuracy. Must be between 0 and 1. Defaults to adaptive throttle.
                 request_timeout (int): Seconds between sending requests to Duck.ai. Defaults to 10.
                 response_timeout (int): Seconds after which Duck.ai response considered lost. Defaults to 45.
             """
-            from duckai import DuckAI
-
             file_path = self.source_file if file_path is None else file_path
             original_language = self.subtitles_data[file_path]['metadata']['language'] if original_language is None else original_language
 
@@ -553,18 +913,21 @@ class SubEdit:
             # Create processed file dictionary and copy metadata and subtitles from source file
             self.subtitles_data[self.duck_translated_file] = {
                 'metadata': self.subtitles_data[self.source_file]['metadata'].copy(),
-                'subtitles': self.subtitles_data[self.source_file]['subtitles'].copy(),
+                'subtitles': {index: subtitle.copy() for index, subtitle in self.subtitles_data[self.source_file]['subtitles'].items()},
                 'engine_eta': 0,
                 'duck_eta': 0
             }
 
             # Get formated values from shared Duck.ai JSON
-            with open(Path(__file__).parent / '../shared/duck.json', 'r') as file:
-                data: DuckData = json.load(file)
-                translate_from: str = data['codes'][original_language]
-                translate_to: str = data['codes'][target_language]
-                translator_model: str = data['models'][model_name]['name']
-                tokens_limit: float = data['models'][model_name]['tokens'] * model_throttle
+            translate_from, translate_to, translator_model, model_tokens = duck_config.get().resolve(model_name, original_language, target_language)
+            controller: Optional[ThrottleController] = None
+            if model_throttle is None and CASSETTE_MODE:
+                # Learned throttle changes between runs, recorded prompts are only found if cut the same way
+                model_throttle = THROTTLE_INITIAL
+            if model_throttle is None:
+                controller = ThrottleController(model_name, response_timeout)
+                model_throttle = controller.throttle
+            tokens_limit = model_tokens * model_throttle
 
             # Set operational variables
             clean_subtitles = props.remove_all_markup(self.subtitles_data[file_path])
@@ -572,6 +935,7 @@ class SubEdit:
             prompt_subtitles = props.inject_prompt_symbols(clean_subtitles)
             prompts_count = props.calculate_prompts_count(prompt_task, prompt_subtitles, tokens_limit)
             subtitles_per_prompt = props.calculate_prompt_length(prompts_count, clean_subtitles)
+            mismatch_retries = 0
 
             # Debug variables
             prompt_number, tanslation_start_timestamp = 1, time.time()
@@ -581,6 +945,9 @@ class SubEdit:
             translated_text, current_index = '', 0
             while current_index < len(clean_subtitles):
                 loop_start_timestamp = time.time()
+                if controller:
+                    # Fill prompt up to the current learned window
+                    subtitles_per_prompt = props.fit_prompt_length(prompt_task, clean_subtitles, current_index, model_tokens * controller.throttle)
                 indices_limit = current_index + subtitles_per_prompt
                 indices_subtitles = clean_subtitles[current_index:indices_limit]
                 indices_prompt = f' Your response MUST contain exactly {len(indices_subtitles)} lines.\n\n'
@@ -592,16 +959,28 @@ class SubEdit:
                 # Send request to Duck.ai and save response
                 request_timestamp = time.time()
 
-                # Temporaly disable Duck.ai translation
-                translated_chunk = DuckAI().chat(current_prompt, translator_model, timeout=response_timeout)
+                # Client records or replays conversations when CASSETTE_MODE is set
+                translated_chunk = await DuckClient().chat(current_prompt, translator_model, timeout=response_timeout)
 
                 response_timestamp = time.time()
                 translation_time.append(response_timestamp - request_timestamp)
+                if CASSETTE_MODE != 'replay':  # Replayed latency would skew estimates of live translations
+                    latency_model.record('duck', model_name, response_timestamp - request_timestamp, props.estimate_token_count(current_prompt))
                 main_logger.info(f"prompt {prompt_number}/{prompts_count}: response received in {response_timestamp - request_timestamp:.2f}s")
-                translated_text += translated_chunk
 
-                # Reset current subtitle index and make delay to reduce abuse of Duck.ai API
-                current_index = indices_limit
+                # Check number of returned lines and send prompt again with smaller window if it doesn't match
+                received_lines = len(re.findall(r'%\d+@\s', translated_chunk))
+                if controller and not controller.observe(len(indices_subtitles), received_lines, response_timestamp - request_timestamp) \
+                        and len(indices_subtitles) > 1 and mismatch_retries < MISMATCH_RETRIES:
+                    mismatch_retries += 1
+                    main_logger.info(f"prompt {prompt_number}/{prompts_count}: {received_lines}/{len(indices_subtitles)} lines received, "
+                                     f"retrying with throttle {controller.throttle:.2f}")
+                else:
+                    # Reset current subtitle index
+                    translated_text += translated_chunk
+                    current_index, mismatch_retries = indices_limit, 0
+
+                # Make delay to reduce abuse of Duck.ai API
                 main_logger.info(f"prompt {prompt_number}/{prompts_count}: waiting for {request_timeout}s timeout")
                 await asyncio.sleep(request_timeout) # Use async sleep instead of blocking sleep
                 loop_end_timestamp = time.time()
@@ -614,7 +993,8 @@ class SubEdit:
                 f"dif: {self.subtitles_data[file_path]['duck_eta'] - (translation_end_timestamp - tanslation_start_timestamp):.2f}) "\
                 f"with avg {sum(translation_time)/len(translation_time):.2f}s response ")
 
-            props.update_estimated_response_time(sum(translation_time)/len(translation_time))
+            if CASSETTE_MODE != 'replay':  # Average response is the fallback of duck estimates
+                StatisticsManager.record_duck_response(sum(translation_time)/len(translation_time))
 
             # Parse translated text from response and save it to file dictionary
             response_pattern = re.split(r'(%\d+@\s)', translated_text)[1:]  # Split `%number@ ` and `text`
@@ -633,5 +1013,118 @@ class SubEdit:
             self._create_file(self.duck_translated_file)
             self.processed_file = os.path.basename(self.duck_translated_file)
 
-            # Update statistics file
-            props.update_statitics('translate')
+            # Update statistics counters
+            StatisticsManager.record('translate')
+
+        OPERATIONS['duck'] = 'duck_translate'
+
+    @classmethod
+    def check_operation(cls, operation: str, parameters: Dict[str, Any], with_example: bool = False) -> None:
+        """Checks that operation exists and accepts parameters.
+
+        Args:
+            operation (str): Operation name from SubEdit.OPERATIONS.
+            parameters (Dict[str, Any]): Keyword arguments for operation method.
+            with_example (bool): Example file is loaded besides source file. Defaults to False,
+                batches and pipelines process a single file.
+
+        Raises:
+            ValueError: If operation is unknown, needs missing example file or parameters don't match its signature.
+        """
+        if operation not in cls.OPERATIONS:
+            raise ValueError(f'Unsupported operation: {operation}')
+        if operation in cls.EXAMPLE_OPERATIONS and not with_example:
+            raise ValueError(f'Operation {operation} requires example file and is not available here')
+
+        reserved = cls.RESERVED_PARAMETERS & parameters.keys()
+        if reserved:
+            raise ValueError(f'Parameters not allowed for {operation}: {sorted(reserved)}')
+
+        method = getattr(cls, cls.OPERATIONS[operation])
+        try:
+            inspect.signature(method).bind(None, **parameters)
+        except TypeError as e:
+            raise ValueError(f'Invalid parameters for {operation}: {str(e)}')
+
+    def get_operation(self, operation: str, parameters: Dict[str, Any]) -> Callable[[], Any]:
+        """Returns operation method with parameters applied.
+
+        Args:
+            operation (str): Operation name from SubEdit.OPERATIONS.
+            parameters (Dict[str, Any]): Keyword arguments for operation method.
+
+        Returns:
+            Callable[[], Any]: Method that runs operation when called.
+        """
+        self.check_operation(operation, parameters, self.example_file is not None)
+        return functools.partial(getattr(self, self.OPERATIONS[operation]), **parameters)
+
+    def fork(self) -> 'SubEdit':
+        """Returns SubEdit sharing parsed files and prepared translation input, with its own outputs.
+
+        Forks run the same operation with different parameters concurrently,
+        e.g. translation into several languages, without parsing files again.
+        """
+        forked = copy.copy(self)
+        forked.subtitles_data = dict(self.subtitles_data)
+        forked.processed_file = ''
+        forked.stage_timings = []
+        forked.report = {}
+        return forked
+
+    async def run_operation(self, operation: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        """Runs operation by name on source file.
+
+        Args:
+            operation (str): Operation name from SubEdit.OPERATIONS.
+            parameters (Dict[str, Any] or None): Keyword arguments for operation method. Defaults to None.
+
+        Returns:
+            str: Path to processed file.
+        """
+        self.report = {}
+        result = self.get_operation(operation, parameters or {})()
+        if inspect.isawaitable(result):
+            await result
+
+        return os.path.join(os.path.dirname(self.source_file), self.processed_file)
+
+    async def run_pipeline(self, stages: List[OperationSpec], keep_intermediate: bool = False) -> str:
+        """Applies operations one after another to in-memory subtitles.
+
+        Every stage takes the output of the previous one as its source, so the
+        file is parsed once and only the final result is written to disk.
+
+        Args:
+            stages (List[OperationSpec]): Operations with parameters in order of application.
+            keep_intermediate (bool): Write result of every stage to disk. Defaults to False.
+
+        Returns:
+            str: Path to processed file of the last stage.
+        """
+        for stage in stages:
+            self.check_operation(stage.operation, stage.parameters, self.example_file is not None)
+
+        self.stage_timings = []
+        processed_path = self.source_file
+        try:
+            for stage_number, stage in enumerate(stages, start=1):
+                self._internal_call = not keep_intermediate and stage_number < len(stages)
+
+                stage_start_timestamp = time.perf_counter()
+                processed_path = await self.run_operation(stage.operation, stage.parameters)
+                stage_duration = time.perf_counter() - stage_start_timestamp
+
+                self.stage_timings.append({
+                    'operation': stage.operation,
+                    'processed_file': self.processed_file,
+                    'duration': stage_duration
+                })
+                main_logger.info(f"stage {stage_number}/{len(stages)}: {stage.operation} completed in {stage_duration:.3f}s")
+
+                # Next stage processes output of current stage
+                self.source_file = processed_path
+        finally:
+            self._internal_call = False
+
+        return processed_path
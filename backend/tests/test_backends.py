@@ -0,0 +1,68 @@
+import time
+import asyncio
+import threading
+import backends
+
+class SlowEngine:
+    """Translator counting requests in flight."""
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def __init__(self, source: str, target: str) -> None:
+        pass
+
+    def translate(self, text: str) -> str:
+        with SlowEngine.lock:
+            SlowEngine.active += 1
+            SlowEngine.peak = max(SlowEngine.peak, SlowEngine.active)
+        time.sleep(0.02)
+        with SlowEngine.lock:
+            SlowEngine.active -= 1
+        return text.upper()
+
+def test_engine_slots_are_shared_by_event_loops_of_threads(monkeypatch):
+    monkeypatch.setattr(backends, 'engine_class', lambda engine: SlowEngine)
+    monkeypatch.setattr(backends.latency_model, 'record', lambda *args: None)
+    monkeypatch.setattr(backends, 'ENGINE_CONCURRENCY', 2)
+    monkeypatch.setattr(backends, '_engine_slots', {})
+    monkeypatch.setattr(backends, '_breakers', {})
+
+    async def job():
+        return await asyncio.gather(*(backends.translate_chunk('Test', 'en', 'de', f'chunk {i}') for i in range(8)))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(job()))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 2
+    assert all(result == [f'CHUNK {i}' for i in range(8)] for result in results)
+    assert SlowEngine.peak <= 2
+    assert backends.engine_health()['Test']['failures'] == 0
+
+def test_cancelled_trial_lets_next_trial_through(monkeypatch):
+    class HangingEngine(SlowEngine):
+        def translate(self, text: str) -> str:
+            time.sleep(0.2)
+            return text
+
+    monkeypatch.setattr(backends, 'engine_class', lambda engine: HangingEngine)
+    monkeypatch.setattr(backends, '_engine_slots', {})
+    monkeypatch.setattr(backends, '_breakers', {})
+    engine_breaker = backends.breaker('Test')
+    for _ in range(engine_breaker.threshold):
+        engine_breaker.record_failure()
+    engine_breaker.opened_at -= engine_breaker.reset_timeout
+
+    async def cancel_trial():
+        task = asyncio.create_task(backends.translate_chunk('Test', 'en', 'de', 'chunk'))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel_trial())
+    assert engine_breaker.state == 'half_open'
+    assert engine_breaker.allow()
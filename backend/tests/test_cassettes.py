@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+import cassettes
+
+@pytest.fixture
+def cassette_mode(tmp_path, monkeypatch):
+    """Isolates cassettes in a temporary directory, returns function switching mode."""
+    monkeypatch.setattr(cassettes, 'CASSETTE_DIR', tmp_path)
+    monkeypatch.setattr(cassettes, 'CASSETTE_LATENCY', 'recorded')
+    monkeypatch.setattr(cassettes, '_cassettes', {})
+
+    def switch(mode: str) -> None:
+        monkeypatch.setattr(cassettes, 'CASSETTE_MODE', mode)
+        cassettes._cassettes.clear()
+    return switch
+
+def test_duck_replay_returns_recorded_responses_in_order(cassette_mode):
+    cassette_mode('record')
+    key = cassettes._request_key('model', 'prompt')
+    cassettes.cassette('duck', 'model').record(key, {}, 'first', 0.0)
+    cassettes.cassette('duck', 'model').record(key, {}, 'second', 0.0)
+
+    cassette_mode('replay')
+    client = cassettes.DuckClient()
+
+    async def replay():
+        return [await client.chat('prompt', 'model'), await client.chat('prompt', 'model')]
+
+    assert asyncio.run(replay()) == ['first', 'second']
+
+def test_duck_replay_waits_without_blocking_event_loop(cassette_mode):
+    cassette_mode('record')
+    cassettes.cassette('duck', 'model').record(cassettes._request_key('model', 'prompt'), {}, 'response', 0.2)
+    cassette_mode('replay')
+
+    async def replay_with_ticks():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        response = await cassettes.DuckClient().chat('prompt', 'model')
+        ticker.cancel()
+        return response, ticks
+
+    response, ticks = asyncio.run(replay_with_ticks())
+    assert response == 'response'
+    assert ticks > 5
+
+def test_duck_replay_miss_raises(cassette_mode):
+    cassette_mode('replay')
+    with pytest.raises(cassettes.CassetteMissError):
+        asyncio.run(cassettes.DuckClient().chat('unknown', 'model'))
+    assert cassettes.cassette_metrics()['duck:model']['missed'] == 1
@@ -0,0 +1,33 @@
+import matching
+
+def words(texts):
+    return [frozenset(text.split()) for text in texts]
+
+def test_gap_much_wider_than_band_is_aligned_along_diagonal():
+    source = words(['first line here', 'middle line here', 'last line here'])
+    example = words([f'filler {column}' for column in range(300)])
+    example[0], example[150], example[299] = source
+
+    matches = matching.align_gap(source, example, (0, 3), (0, 300), 2, 0.5)
+
+    assert [(row, column) for row, column, _ in matches] == [(0, 0), (1, 150), (2, 299)]
+
+def test_gap_much_taller_than_band_is_aligned_along_diagonal():
+    source = words([f'filler {row}' for row in range(300)])
+    example = words(['first line here', 'middle line here', 'last line here'])
+    source[0], source[150], source[299] = example
+
+    matches = matching.align_gap(source, example, (0, 300), (0, 3), 2, 0.5)
+
+    assert [(row, column) for row, column, _ in matches] == [(0, 0), (150, 1), (299, 2)]
+
+def test_band_limits_visited_cells(monkeypatch):
+    calls = []
+    original = matching.similarity
+    monkeypatch.setattr(matching, 'similarity', lambda *words: calls.append(words) or original(*words))
+    source = words([f'line {row}' for row in range(1000)])
+    example = words([f'line {column}' for column in range(2000)])
+
+    matching.align_gap(source, example, (0, 1000), (0, 2000), 4, 0.5)
+
+    assert len(calls) < 1000 * (2 * 4 + 3) + 2 * 2000
@@ -0,0 +1,38 @@
+import threading
+import pytest
+from outputs import OutputBuffer, OutputWriteError
+
+def test_failed_write_releases_waiters_and_reports_error(tmp_path):
+    buffer = OutputBuffer(1024)
+    file_path = str(tmp_path / 'missing' / 'out.srt')
+    failures = []
+    written = []
+    blocker = threading.Event()
+    original_write = buffer._write
+    buffer._write = lambda path, data: (blocker.wait(5), original_write(path, data))  # type: ignore[method-assign]
+    buffer.put(file_path, b'data')
+    # Callbacks are registered while output is pending
+    buffer.when_written(file_path, lambda *args: written.append(args), lambda path, error: failures.append(path))
+    blocker.set()
+    buffer.flush()
+
+    with pytest.raises(OutputWriteError):
+        buffer.wait(file_path, timeout=1)
+    with pytest.raises(OutputWriteError):
+        buffer.when_written(file_path, lambda *args: written.append(args))
+    assert failures == [file_path]
+    assert written == []
+    assert buffer.get(file_path) is None
+
+def test_successful_put_after_failure_clears_error(tmp_path):
+    buffer = OutputBuffer(1024)
+    directory = tmp_path / 'session'
+    file_path = str(directory / 'out.srt')
+    buffer.put(file_path, b'first')
+    buffer.flush()
+
+    directory.mkdir()
+    buffer.put(file_path, b'second')
+    buffer.flush()
+    buffer.wait(file_path, timeout=1)
+    assert (directory / 'out.srt').read_bytes() == b'second'
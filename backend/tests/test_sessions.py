@@ -0,0 +1,100 @@
+import os
+import uuid
+import json
+import pytest
+import sessions
+from storage import BlobStore
+from structures import check_session_id
+
+@pytest.fixture
+def user_files(tmp_path, monkeypatch):
+    root = tmp_path / 'user_files'
+    (root / '.blobs').mkdir(parents=True)
+    monkeypatch.setattr(sessions, 'blob_store', BlobStore(str(root / '.blobs')))
+    return root
+
+def add(index: sessions.SessionIndex, session_path, filename: str, data: bytes) -> str:
+    file_path = str(session_path / filename)
+    with open(file_path, 'wb') as file:
+        file.write(data)
+    sessions.blob_store.add_file(file_path, uuid.uuid4().hex)
+    index.add_file(session_path.name, file_path)
+    return file_path
+
+@pytest.mark.parametrize('session_id', ['..', '.blobs', '../user_files', '', 'a/../..', str(uuid.uuid4()).upper()])
+def test_session_id_must_be_uuid(session_id):
+    with pytest.raises(ValueError):
+        check_session_id(session_id)
+
+def test_session_id_accepts_issued_ids():
+    session_id = str(uuid.uuid4())
+    assert check_session_id(session_id) == session_id
+
+@pytest.mark.parametrize('session_id', ['..', '.blobs', '.', '', str(uuid.uuid4())])
+def test_only_existing_session_directories_are_indexed(user_files, session_id):
+    index = sessions.SessionIndex(str(user_files))
+    index.touch(session_id)
+    index.add_file(session_id, os.path.join(str(user_files), session_id, 'a.srt'))
+    assert index._collect() == [] and not index._last_access
+
+def test_paths_outside_sessions_are_never_removed(user_files, monkeypatch):
+    monkeypatch.setattr(sessions, 'SESSION_LIFETIME', -1)
+    session_path = user_files / str(uuid.uuid4())
+    session_path.mkdir()
+    index = sessions.SessionIndex(str(user_files))
+    index.touch(session_path.name)
+
+    for path in ('..', '.blobs', os.path.join(session_path.name, '..'), ''):
+        index._remove_path(os.path.join(str(user_files), path))
+    assert (user_files / '.blobs').is_dir() and session_path.is_dir()
+
+    # Expired session itself is deleted
+    for session_id in index._collect():
+        index._remove_path(os.path.join(str(user_files), session_id))
+    assert not session_path.exists() and (user_files / '.blobs').is_dir()
+
+def test_quota_eviction_keeps_pinned_files_and_updates_manifest(user_files, monkeypatch):
+    monkeypatch.setattr(sessions, 'SESSION_QUOTA', 250)
+    session_path = user_files / str(uuid.uuid4())
+    session_path.mkdir()
+    index = sessions.SessionIndex(str(user_files))
+
+    source = add(index, session_path, 'a.srt', b'x' * 100)
+    index.pin(session_path.name, [source])
+    first = add(index, session_path, 'a-shifted.srt', b'y' * 100)
+    add(index, session_path, 'a-cleaned.srt', b'z' * 100)
+
+    assert os.path.exists(source) and not os.path.exists(first)
+    with open(session_path / '.manifest.json') as file:
+        manifest = json.load(file)
+    assert sorted(manifest) == ['a-cleaned.srt', 'a.srt']
+
+    # Unpinned source is evicted like any other file
+    index.unpin(session_path.name, [source])
+    add(index, session_path, 'a-fixed.srt', b'w' * 100)
+    assert not os.path.exists(source)
+
+def test_sessions_with_pinned_files_are_kept_until_tasks_end(user_files, monkeypatch):
+    monkeypatch.setattr(sessions, 'SESSION_LIFETIME', 10)
+    monkeypatch.setattr(sessions, 'STORAGE_QUOTA', 150)
+    index = sessions.SessionIndex(str(user_files))
+    busy_path, idle_path = user_files / str(uuid.uuid4()), user_files / str(uuid.uuid4())
+    busy_path.mkdir()
+    idle_path.mkdir()
+    source = add(index, busy_path, 'a.srt', b'x' * 100)
+    add(index, idle_path, 'b.srt', b'y' * 100)
+    index.pin(busy_path.name, [source])
+
+    # Busy session is older and over quota, idle one is removed instead
+    index._last_access[busy_path.name] -= 100
+    index._heap.append((index._last_access[busy_path.name], busy_path.name))
+    index._heap.sort()
+    assert index._collect() == [idle_path.name]
+
+    # Expired busy session stays while pinned, finished task starts its lifetime again
+    index._last_access[busy_path.name] -= 100
+    index._heap.append((index._last_access[busy_path.name], busy_path.name))
+    index._heap.sort()
+    assert index._collect() == []
+    index.unpin(busy_path.name, [source])
+    assert index._collect() == []
@@ -0,0 +1,66 @@
+import os
+import hashlib
+import tempfile
+from cache import ResultCache
+from storage import BlobStore, link_or_copy
+
+def write_output(file_path: str, data: bytes) -> str:
+    """Writes file the way output writer does and returns its digest."""
+    with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(file_path), prefix='.output-', delete=False) as file:
+        file.write(data)
+    os.replace(file.name, file_path)
+    return hashlib.sha256(data).hexdigest()
+
+def read(file_path: str) -> bytes:
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+def leftovers(directory: str) -> list:
+    return [name for name in os.listdir(directory) if name.startswith(('.link-', '.copy-'))]
+
+def test_link_over_same_file_leaves_no_temporary_link(tmp_path):
+    source = tmp_path / 'a.srt'
+    source.write_bytes(b'one')
+    destination = str(tmp_path / 'b.srt')
+
+    link_or_copy(str(source), destination)
+    link_or_copy(str(source), destination)
+    link_or_copy(destination, str(source))
+
+    assert os.path.samefile(source, destination)
+    assert leftovers(str(tmp_path)) == []
+
+def test_repeated_cache_restore_keeps_stored_content(tmp_path):
+    session = tmp_path / 'session'
+    session.mkdir()
+    blobs = BlobStore(str(tmp_path / '.blobs'))
+    cache = ResultCache(str(tmp_path / 'cache'), 1024 * 1024, 3600)
+
+    source_file = str(session / 'a.srt')
+    output_file = str(session / 'a-shifted-by--2000-ms.srt')
+    shifted = b'1\n00:00:01,000 --> 00:00:02,000\nshifted\n'
+    shifted_digest = write_output(output_file, shifted)
+    blobs.add_file(output_file, shifted_digest)
+    cache.store('shift', source_file, output_file, shifted_digest)
+
+    # The same operation requested twice restores over already linked output
+    for _ in range(2):
+        restored = cache.restore('shift', source_file)
+        assert restored is not None
+        restored_file, restored_digest, _ = restored
+        blobs.add_file(restored_file, restored_digest)
+
+    # A different output of the session is stored and restored afterwards
+    fixed_file = str(session / 'a-fixed-trim.srt')
+    fixed_digest = write_output(fixed_file, b'1\n00:00:03,000 --> 00:00:04,000\nfixed\n')
+    blobs.add_file(fixed_file, fixed_digest)
+    cache.store('validate', source_file, fixed_file, fixed_digest)
+    restored = cache.restore('shift', source_file)
+    assert restored is not None
+    blobs.add_file(restored[0], restored[1])
+
+    assert read(output_file) == shifted
+    assert read(blobs.blob_path(shifted_digest)) == shifted
+    assert read(os.path.join(cache.cache_dir, 'shift.srt')) == shifted
+    assert blobs.digest_of(output_file) == shifted_digest
+    assert leftovers(str(session)) == [] and leftovers(cache.cache_dir) == []
@@ -0,0 +1,31 @@
+import timeline
+
+def cue(start: str, end: str) -> dict:
+    return {'start': start, 'end': end, 'text': 'text'}
+
+EXAMPLE = {
+    1: cue('00:00:01,000', '00:00:02,000'),
+    2: cue('00:00:04,000', '00:00:05,500'),
+    3: cue('00:00:09,000', '00:00:10,000'),
+}
+
+def test_sync_of_source_without_pauses_has_zero_confidence():
+    single = {1: cue('00:00:00,000', '00:00:03,000')}
+    back_to_back = {1: cue('00:00:00,000', '00:00:02,000'), 2: cue('00:00:02,000', '00:00:05,000')}
+
+    for source in (single, back_to_back):
+        sync = timeline.estimate_sync(source, EXAMPLE)
+        assert sync['confidence'] == 0.0
+        assert sync['windows'] == []
+
+def test_sync_finds_offset_of_shifted_source():
+    source = {
+        1: cue('00:00:00,500', '00:00:01,500'),
+        2: cue('00:00:03,500', '00:00:05,000'),
+        3: cue('00:00:08,500', '00:00:09,500'),
+    }
+
+    sync = timeline.estimate_sync(source, EXAMPLE)
+
+    assert abs(sync['offset_ms'] - 500) <= 2 * timeline.SYNC_RESOLUTION_MS
+    assert sync['confidence'] > 0.5
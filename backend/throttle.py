@@ -0,0 +1,101 @@
+import threading
+from typing import Any, Dict, Set
+from stats import StatisticsManager
+
+# Constants
+THROTTLE_INITIAL = 0.5  # Share of model tokens window used before anything is learned
+THROTTLE_MIN = 0.1
+THROTTLE_MAX = 1.0
+THROTTLE_STEP = 0.02  # Additive increase after a valid and fast response
+MISMATCH_BACKOFF = 0.75  # Multiplicative decrease after response with wrong number of lines
+SLOW_BACKOFF = 0.9  # Multiplicative decrease after response close to response timeout
+SLOW_RESPONSE_RATIO = 0.5  # Share of response timeout after which response is slow
+MISMATCH_RETRIES = 2  # Times a prompt is sent again with smaller window before its response is kept
+
+# Models adapted by this process, listed in metrics
+_models: Set[str] = set()
+_models_lock = threading.Lock()
+
+def _counter(model_name: str, name: str) -> str:
+    """Returns name of persisted counter."""
+    return f'throttle:{model_name}:{name}'
+
+def _raw_throttle(model_name: str) -> float:
+    """Returns throttle of model before clamping, initial value plus all persisted adjustments."""
+    return THROTTLE_INITIAL + StatisticsManager.get(_counter(model_name, 'adjustment'))
+
+def learned_throttle(model_name: str) -> float:
+    """Returns share of model tokens window learned from previous translations."""
+    return min(THROTTLE_MAX, max(THROTTLE_MIN, _raw_throttle(model_name)))
+
+class ThrottleController:
+    """Adapts share of model tokens window used by a single prompt.
+
+    Additive increase, multiplicative decrease: every valid response lets
+    the next prompt grow by THROTTLE_STEP, a response with a different
+    number of lines than requested shrinks it by MISMATCH_BACKOFF and a
+    slow response by SLOW_BACKOFF. Throttle is stored as an adjustment
+    counter of StatisticsManager, so it is persisted per model and worker
+    processes translating with the same model share it.
+    """
+
+    def __init__(self, model_name: str, response_timeout: float) -> None:
+        """Constructor for throttle controller.
+
+        Args:
+            model_name (str): Model name from duck.json.
+            response_timeout (float): Seconds after which response is considered lost.
+        """
+        self.model_name = model_name
+        self.response_timeout = response_timeout
+        with _models_lock:
+            _models.add(model_name)
+
+    @property
+    def throttle(self) -> float:
+        """Returns current share of model tokens window."""
+        return learned_throttle(self.model_name)
+
+    def observe(self, expected_lines: int, received_lines: int, response_time: float) -> bool:
+        """Adjusts throttle after a response.
+
+        Args:
+            expected_lines (int): Subtitles sent in prompt.
+            received_lines (int): Numbered lines found in response.
+            response_time (float): Response duration in seconds.
+
+        Returns:
+            bool: True if response has the expected number of lines.
+        """
+        valid = expected_lines == received_lines
+        current = self.throttle
+        if not valid:
+            updated = current * MISMATCH_BACKOFF
+        elif response_time > self.response_timeout * SLOW_RESPONSE_RATIO:
+            updated = current * SLOW_BACKOFF
+        else:
+            updated = current + THROTTLE_STEP
+        updated = min(THROTTLE_MAX, max(THROTTLE_MIN, updated))
+
+        # Adjustment is relative to unclamped value, so the stored throttle becomes exactly updated
+        StatisticsManager.increment(_counter(self.model_name, 'adjustment'), updated - _raw_throttle(self.model_name))
+        StatisticsManager.increment(_counter(self.model_name, 'prompts'))
+        if not valid:
+            StatisticsManager.increment(_counter(self.model_name, 'mismatches'))
+        return valid
+
+def throttle_metrics() -> Dict[str, Dict[str, Any]]:
+    """Returns learned throttle and mismatch rate of every model adapted by this process."""
+    with _models_lock:
+        models = sorted(_models)
+
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for model_name in models:
+        prompts = StatisticsManager.get(_counter(model_name, 'prompts'))
+        mismatches = StatisticsManager.get(_counter(model_name, 'mismatches'))
+        metrics[model_name] = {
+            'throttle': round(learned_throttle(model_name), 3),
+            'prompts': int(prompts),
+            'mismatch_rate': round(mismatches / prompts, 3) if prompts else 0.0,
+        }
+    return metrics
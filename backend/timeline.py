@@ -0,0 +1,370 @@
+import props
+import bisect
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from structures import SubtitleEntry
+
+# Auto-sync parameters
+SYNC_RESOLUTION_MS = 100  # Width of speech activity bins
+SYNC_WINDOWS = 8  # Windows used to estimate remaining drift
+SYNC_MAX_DRIFT = 0.01  # Largest remaining speed difference after frame rate correction
+SYNC_FRAME_RATES = (23.976, 24.0, 25.0, 29.97, 30.0)  # Ratios of these frame rates are tried as speed differences
+
+class TimeIndex:
+    """Subtitle indices ordered by start time for binary search.
+
+    Start and end times are converted to milliseconds once. Running maximum
+    of end times keeps the first cue still visible at a given moment
+    searchable with bisect, even if cues overlap or a long cue covers
+    several short ones.
+    """
+
+    def __init__(self, subtitles: Dict[int, SubtitleEntry]) -> None:
+        """Constructor for time index.
+
+        Args:
+            subtitles (Dict[int, SubtitleEntry]): Subtitles keyed by index.
+        """
+        timings = sorted(
+            (props.timecode_to_ms(entry['start']), props.timecode_to_ms(entry['end']), index)
+            for index, entry in subtitles.items()
+        )
+        self.indices: List[int] = [index for _, _, index in timings]
+        self.starts: List[int] = [start for start, _, _ in timings]
+        self.ends: List[int] = [end for _, end, _ in timings]
+        self.max_ends: List[int] = []
+        for end in self.ends:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+    def starting_between(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[int]:
+        """Returns indices of subtitles starting within time range.
+
+        Args:
+            start_ms (Optional[int]): Beginning of range, None for the start of file.
+            end_ms (Optional[int]): Inclusive end of range, None for the end of file.
+
+        Returns:
+            List[int]: Subtitle indices in start time order.
+        """
+        first = 0 if start_ms is None else bisect.bisect_left(self.starts, start_ms)
+        last = len(self.starts) if end_ms is None else bisect.bisect_right(self.starts, end_ms)
+        return self.indices[first:last]
+
+    def visible_between(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[int]:
+        """Returns indices of subtitles shown at any moment of time range.
+
+        Args:
+            start_ms (Optional[int]): Beginning of range, None for the start of file.
+            end_ms (Optional[int]): Inclusive end of range, None for the end of file.
+
+        Returns:
+            List[int]: Subtitle indices in start time order.
+        """
+        first = 0 if start_ms is None else bisect.bisect_right(self.max_ends, start_ms)
+        last = len(self.starts) if end_ms is None else bisect.bisect_right(self.starts, end_ms)
+        return [
+            self.indices[position] for position in range(first, last)
+            if start_ms is None or self.ends[position] > start_ms
+        ]
+
+    def at(self, time_ms: int) -> List[int]:
+        """Returns indices of subtitles shown at a moment of time."""
+        return self.visible_between(time_ms, time_ms)
+
+class Timeline:
+    """Start and end times of subtitles in one contiguous array.
+
+    Times are kept in milliseconds in an (n, 2) int64 array in index order.
+    Every transform is a single affine map applied to all selected cues at
+    once, results are rounded to milliseconds and clamped at zero. Time
+    codes are parsed on construction and formatted only when written back.
+    """
+
+    indices: np.ndarray  # (n,) int64 subtitle indices in ascending order
+    times: np.ndarray  # (n, 2) int64 start and end times in milliseconds
+
+    def __init__(self, subtitles: Dict[int, SubtitleEntry]) -> None:
+        """Constructor for timeline.
+
+        Args:
+            subtitles (Dict[int, SubtitleEntry]): Subtitles keyed by index.
+        """
+        indices = sorted(subtitles)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.times = np.array(
+            [
+                (props.timecode_to_ms(subtitles[index]['start']), props.timecode_to_ms(subtitles[index]['end']))
+                for index in indices
+            ],
+            dtype=np.int64
+        ).reshape(-1, 2)
+
+    @classmethod
+    def from_times(cls, indices: Sequence[int], times: Sequence[Tuple[int, int]]) -> 'Timeline':
+        """Creates timeline from indices and start and end times in milliseconds without parsing time codes."""
+        timeline = cls.__new__(cls)
+        timeline.indices = np.array(indices, dtype=np.int64)
+        timeline.times = np.array(times, dtype=np.int64).reshape(-1, 2)
+        return timeline
+
+    def select(self, indices: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Returns mask of rows with given subtitle indices, all rows if indices are None."""
+        if indices is None:
+            return np.ones(len(self.indices), dtype=bool)
+        return np.isin(self.indices, np.fromiter(indices, dtype=np.int64))
+
+    def apply(self, scale: float = 1.0, offset: int = 0, anchor: int = 0, mask: Optional[np.ndarray] = None) -> 'Timeline':
+        """Maps every selected time t to anchor + (t - anchor) * scale + offset.
+
+        Args:
+            scale (float): Scaling factor. Defaults to 1.0.
+            offset (int): Milliseconds added after scaling. Defaults to 0.
+            anchor (int): Time in milliseconds that is not moved by scaling. Defaults to 0.
+            mask (np.ndarray or None): Rows to transform. Defaults to None (all rows).
+
+        Returns:
+            Timeline: The same timeline for chaining.
+        """
+        selected = self.times if mask is None else self.times[mask]
+        if scale == 1.0:
+            transformed = selected + offset  # Integer arithmetic, no rounding needed
+        else:
+            transformed = np.rint((selected - anchor) * scale + (anchor + offset)).astype(np.int64)
+        np.maximum(transformed, 0, out=transformed)
+
+        if mask is None:
+            self.times = transformed
+        else:
+            self.times[mask] = transformed
+        return self
+
+    def offset(self, delay: int, mask: Optional[np.ndarray] = None) -> 'Timeline':
+        """Shifts selected times by delay in milliseconds."""
+        return self.apply(offset=delay, mask=mask)
+
+    def scale(self, factor: float, anchor: int = 0, mask: Optional[np.ndarray] = None) -> 'Timeline':
+        """Stretches selected times around anchor in milliseconds."""
+        return self.apply(scale=factor, anchor=anchor, mask=mask)
+
+    def convert_fps(self, source_fps: float, target_fps: float, mask: Optional[np.ndarray] = None) -> 'Timeline':
+        """Retimes selected times made for video with source framerate to video with target framerate."""
+        if source_fps <= 0 or target_fps <= 0:
+            raise ValueError(f'Framerates must be positive ({source_fps} and {target_fps} provided).')
+        return self.apply(scale=source_fps / target_fps, mask=mask)
+
+    def interpolate(self, source_points: Sequence[int], target_points: Sequence[int]) -> 'Timeline':
+        """Maps all times piecewise linearly so every source point lands on its target point.
+
+        Times before the first or after the last point are only shifted by
+        the offset of that point, so cues outside anchored part keep their
+        duration. Results are rounded to milliseconds and clamped at zero.
+
+        Args:
+            source_points (Sequence[int]): Strictly increasing times in milliseconds.
+            target_points (Sequence[int]): Strictly increasing times the source points are moved to.
+
+        Returns:
+            Timeline: The same timeline for chaining.
+
+        Raises:
+            ValueError: If points are empty, differ in number or aren't strictly increasing.
+        """
+        check_points(source_points, target_points)
+        source = np.asarray(source_points, dtype=np.float64)
+        target = np.asarray(target_points, dtype=np.float64)
+
+        times = self.times.astype(np.float64)
+        mapped = np.interp(times, source, target)
+
+        # np.interp clamps outside of points, shift these times instead
+        before = times < source[0]
+        after = times > source[-1]
+        mapped[before] = times[before] + (target[0] - source[0])
+        mapped[after] = times[after] + (target[-1] - source[-1])
+
+        self.times = np.maximum(np.rint(mapped).astype(np.int64), 0)
+        return self
+
+    def write(self, subtitles: Dict[int, SubtitleEntry]) -> None:
+        """Writes times back into subtitles as SubRip time codes.
+
+        Args:
+            subtitles (Dict[int, SubtitleEntry]): Subtitles keyed by the same indices as timeline.
+        """
+        # Split all times into time code fields at once
+        hours, remainder = np.divmod(self.times, 3_600_000)
+        minutes, remainder = np.divmod(remainder, 60_000)
+        seconds, milliseconds = np.divmod(remainder, 1000)
+
+        indices = [int(index) for index in self.indices]
+        fields = zip(indices, hours.tolist(), minutes.tolist(), seconds.tolist(), milliseconds.tolist())
+        for index, (start_h, end_h), (start_m, end_m), (start_s, end_s), (start_ms, end_ms) in fields:
+            subtitles[index]['start'] = f'{start_h:02d}:{start_m:02d}:{start_s:02d},{start_ms:03d}'
+            subtitles[index]['end'] = f'{end_h:02d}:{end_m:02d}:{end_s:02d},{end_ms:03d}'
+
+def check_points(source_points: Sequence[int], target_points: Sequence[int]) -> None:
+    """Checks that anchor points can define a piecewise-linear mapping.
+
+    Raises:
+        ValueError: If points are empty, differ in number or aren't strictly increasing.
+    """
+    if len(source_points) == 0 or len(source_points) != len(target_points):
+        raise ValueError(f'Anchors must include equal non-zero number of source and target points ({len(source_points)} and {len(target_points)} provided).')
+    for points, name in ((source_points, 'source'), (target_points, 'target')):
+        for previous, current in zip(points, points[1:]):
+            if current <= previous:
+                raise ValueError(f'Anchor {name} times must be strictly increasing ({previous} >= {current} ms).')
+
+def segment_drift(source_points: Sequence[int], target_points: Sequence[int]) -> List[Dict[str, Any]]:
+    """Describes every segment between neighbouring anchor points.
+
+    Args:
+        source_points (Sequence[int]): Strictly increasing times in milliseconds.
+        target_points (Sequence[int]): Strictly increasing times the source points are moved to.
+
+    Returns:
+        List[Dict[str, Any]]: Segment bounds, offset at its start, scale and drift accumulated
+            over segment, i.e. change of offset between its ends, in milliseconds.
+    """
+    check_points(source_points, target_points)
+    segments: List[Dict[str, Any]] = []
+    for position in range(len(source_points) - 1):
+        source_start, source_end = source_points[position], source_points[position + 1]
+        target_start, target_end = target_points[position], target_points[position + 1]
+        segments.append({
+            'source_start_ms': source_start,
+            'source_end_ms': source_end,
+            'target_start_ms': target_start,
+            'target_end_ms': target_end,
+            'offset_ms': target_start - source_start,
+            'scale': (target_end - target_start) / (source_end - source_start),
+            'drift_ms': (target_end - source_end) - (target_start - source_start),
+        })
+    return segments
+
+def speech_activity(times: np.ndarray, resolution: int = SYNC_RESOLUTION_MS) -> np.ndarray:
+    """Rasterizes subtitle times into bins with 1 where any subtitle is shown and 0 elsewhere.
+
+    Args:
+        times (np.ndarray): Start and end times in milliseconds, shape (n, 2).
+        resolution (int): Bin width in milliseconds. Defaults to SYNC_RESOLUTION_MS.
+
+    Returns:
+        np.ndarray: Activity of every bin as float.
+    """
+    bins = (times // resolution).astype(np.int64)
+    bins[:, 1] = np.maximum(bins[:, 1], bins[:, 0] + 1)  # Every subtitle covers at least one bin
+
+    # Mark starts and ends, running sum is number of subtitles shown in bin
+    changes = np.zeros(int(bins[:, 1].max()) + 1, dtype=np.int64)
+    np.add.at(changes, bins[:, 0], 1)
+    np.add.at(changes, bins[:, 1], -1)
+    activity = (np.cumsum(changes)[:-1] > 0).astype(np.float64)
+    return activity - activity.mean()
+
+def cross_correlate(source: np.ndarray, example: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns lags and cross-correlation c[lag] = sum(example[t + lag] * source[t]) computed with FFT."""
+    size = 1 << (len(source) + len(example)).bit_length()
+    correlation = np.fft.irfft(np.fft.rfft(example, size) * np.conj(np.fft.rfft(source, size)), size)
+    lags = np.arange(size)
+    lags[lags > size // 2] -= size
+    return lags, correlation
+
+def normalized_peak(source: np.ndarray, example: np.ndarray, lags: np.ndarray, correlation: np.ndarray, candidates: np.ndarray) -> Tuple[int, float]:
+    """Returns lag of highest correlation among candidate positions and its correlation coefficient.
+
+    Coefficient is computed against part of example overlapped by source at
+    that lag, so short windows matched with a long example aren't penalized.
+    Constant source, e.g. subtitles shown without a pause, has no activity
+    to match and gets coefficient 0.
+    """
+    best = int(candidates[np.argmax(correlation[candidates])])
+    lag = int(lags[best])
+    active = np.flatnonzero(source)
+    if not len(active):
+        return lag, 0.0
+    first, last = int(active[0]), int(active[-1]) + 1
+    matched = example[max(0, first + lag):max(0, last + lag)]
+    norm = float(np.linalg.norm(source) * np.linalg.norm(matched))
+    return lag, max(0.0, min(1.0, float(correlation[best]) / norm)) if norm else 0.0
+
+def estimate_sync(
+    source_subtitles: Dict[int, SubtitleEntry],
+    example_subtitles: Dict[int, SubtitleEntry],
+    resolution: int = SYNC_RESOLUTION_MS,
+    windows: int = SYNC_WINDOWS
+) -> Dict[str, Any]:
+    """Estimates offset and drift of source subtitles against example subtitles.
+
+    Both files are rasterized into speech activity signals. Source is scaled
+    by every ratio of common frame rates and the scale with the highest
+    cross-correlation peak gives speed difference and global offset. Scaled
+    source is then split into windows correlated near global offset, and a
+    weighted linear fit of their offsets corrects remaining drift. Source
+    time t matches example time t * scale + offset_ms.
+
+    Args:
+        source_subtitles (Dict[int, SubtitleEntry]): Subtitles to be synced.
+        example_subtitles (Dict[int, SubtitleEntry]): Subtitles with correct timing.
+        resolution (int): Bin width in milliseconds. Defaults to SYNC_RESOLUTION_MS.
+        windows (int): Number of windows used to estimate remaining drift. Defaults to SYNC_WINDOWS.
+
+    Returns:
+        Dict[str, Any]: Offset in milliseconds, scale, confidence from 0 to 1 and offsets found in every window.
+
+    Raises:
+        ValueError: If any file has no subtitles.
+    """
+    if not source_subtitles or not example_subtitles:
+        raise ValueError('Both files must include subtitles to be synced.')
+
+    source_times = Timeline(source_subtitles).times
+    example = speech_activity(Timeline(example_subtitles).times, resolution)
+
+    # Global offset for every frame rate ratio
+    best: Optional[Tuple[float, int, float, np.ndarray]] = None
+    for frame_rate_scale in sorted({round(target / source, 6) for source in SYNC_FRAME_RATES for target in SYNC_FRAME_RATES}):
+        source = speech_activity(np.rint(source_times * frame_rate_scale), resolution)
+        lags, correlation = cross_correlate(source, example)
+        lag, confidence = normalized_peak(source, example, lags, correlation, np.arange(len(lags)))
+        if best is None or confidence > best[2]:
+            best = (frame_rate_scale, lag, confidence, source)
+    assert best is not None
+    frame_rate_scale, global_lag, global_confidence, source = best
+
+    # Local offsets near global one, remaining drift can't move them further than SYNC_MAX_DRIFT of duration
+    max_lag_change = max(1, int(len(source) * SYNC_MAX_DRIFT))
+    window_size = max(1, -(-len(source) // windows))
+    window_results: List[Dict[str, Any]] = []
+    for first in range(0, len(source), window_size):
+        window = np.zeros_like(source)
+        window[first:first + window_size] = source[first:first + window_size]
+        if not window.any():
+            continue
+
+        lags, correlation = cross_correlate(window, example)
+        lag, confidence = normalized_peak(window, example, lags, correlation, np.flatnonzero(np.abs(lags - global_lag) <= max_lag_change))
+        window_results.append({
+            'center_ms': round((first + min(window_size, len(source) - first) / 2) * resolution / frame_rate_scale),
+            'offset_ms': lag * resolution,
+            'confidence': confidence,
+        })
+
+    # Fit offset = intercept + slope * scaled time, fall back to global offset if drift can't be estimated
+    offset_ms, drift, confidence = float(global_lag * resolution), 0.0, global_confidence
+    weighted = [result for result in window_results if result['confidence'] > 0]
+    if len(weighted) >= 2:
+        centers = np.array([result['center_ms'] * frame_rate_scale for result in weighted])
+        offsets = np.array([result['offset_ms'] for result in weighted])
+        weights = np.array([result['confidence'] for result in weighted])
+        slope, intercept = np.polyfit(centers, offsets, 1, w=weights)
+        if abs(slope) <= SYNC_MAX_DRIFT:
+            offset_ms, drift = float(intercept), float(slope)
+            confidence = float(np.average(weights))
+
+    return {
+        'offset_ms': round(offset_ms),
+        'scale': frame_rate_scale * (1.0 + drift),
+        'confidence': confidence,
+        'windows': window_results,
+    }
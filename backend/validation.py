@@ -0,0 +1,152 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from structures import SubtitleEntry, TimelineFinding
+from timeline import Timeline
+
+# Constants
+VALIDATION_MAX_FINDINGS = 1000  # Findings listed in report, all of them are counted
+MIN_CUE_DURATION_MS = 1000  # Duration given to cues without one when fixed
+FIX_MODES = ('merge', 'trim', 'renumber')
+
+def validate_timeline(subtitles: Dict[int, SubtitleEntry], min_gap_ms: int = 0) -> List[TimelineFinding]:
+    """Finds timing problems in one sweep over cues sorted by start time.
+
+    Every check is vectorized over the whole file: durations, gaps to the
+    latest end of all previous cues and order of indices.
+
+    Args:
+        subtitles (Dict[int, SubtitleEntry]): Subtitles keyed by index.
+        min_gap_ms (int): Gaps shorter than this are reported, 0 disables the check. Defaults to 0.
+
+    Returns:
+        List[TimelineFinding]: Findings ordered by start time of cue.
+    """
+    if not subtitles:
+        return []
+
+    timeline = Timeline(subtitles)
+    order = np.lexsort((timeline.indices, timeline.times[:, 0]))
+    indices = timeline.indices[order]
+    starts, ends = timeline.times[order, 0], timeline.times[order, 1]
+
+    # Latest end of previous cues catches overlaps with long cues as well
+    latest_ends = np.maximum.accumulate(ends)
+    latest_positions = np.maximum.accumulate(np.where(ends == latest_ends, np.arange(len(ends)), 0))
+    previous_cues = indices[latest_positions][:-1]
+    gaps = starts[1:] - latest_ends[:-1]
+
+    checks: List[Tuple[str, np.ndarray, np.ndarray, Optional[np.ndarray]]] = [
+        ('non_positive_duration', np.flatnonzero(ends <= starts), ends - starts, None),
+        ('out_of_order', np.flatnonzero(np.diff(indices) < 0) + 1, np.zeros_like(starts), indices[:-1]),
+        ('overlap', np.flatnonzero(gaps < 0) + 1, np.concatenate(([0], -gaps)), previous_cues),
+        ('short_gap', np.flatnonzero((gaps >= 0) & (gaps < min_gap_ms)) + 1, np.concatenate(([0], gaps)), previous_cues),
+    ]
+
+    # Index discontinuities are checked in index order
+    sorted_indices = np.sort(timeline.indices)
+    index_gaps = np.flatnonzero(np.diff(sorted_indices) != 1) + 1
+    position_of_index = {int(index): position for position, index in enumerate(indices.tolist())}
+
+    findings: List[Tuple[int, TimelineFinding]] = []
+    for kind, positions, values, others in checks:
+        for position in map(int, positions):
+            finding: TimelineFinding = {'type': kind, 'index': int(indices[position]), 'value_ms': int(values[position])}
+            if others is not None:
+                finding['previous'] = int(others[position - 1])
+            findings.append((position, finding))
+    for gap_position in map(int, index_gaps):
+        index = int(sorted_indices[gap_position])
+        findings.append((position_of_index[index], {
+            'type': 'index_gap',
+            'index': index,
+            'previous': int(sorted_indices[gap_position - 1]),
+            'value_ms': 0,
+        }))
+
+    findings.sort(key=lambda item: item[0])
+    return [finding for _, finding in findings]
+
+def summarize_findings(findings: List[TimelineFinding]) -> Dict[str, Any]:
+    """Returns number of findings of every type and the first findings of file."""
+    counts: Dict[str, int] = {}
+    for finding in findings:
+        counts[finding['type']] = counts.get(finding['type'], 0) + 1
+    return {
+        'valid': not findings,
+        'counts': counts,
+        'findings': findings[:VALIDATION_MAX_FINDINGS],
+        'truncated': len(findings) > VALIDATION_MAX_FINDINGS,
+    }
+
+def fix_timeline(
+    subtitles: Dict[int, SubtitleEntry],
+    modes: List[str],
+    min_gap_ms: int = 0
+) -> Tuple[Dict[int, SubtitleEntry], Dict[str, int]]:
+    """Fixes timing problems in one pass over cues sorted by start time.
+
+    Modes are applied in a fixed order:
+        merge - overlapping cues are joined into one with texts on separate lines.
+        trim - cue ends are moved before the next start keeping min_gap_ms when
+            possible, cues without duration get MIN_CUE_DURATION_MS or time until the next cue.
+        renumber - cues are numbered from 1 in start time order.
+
+    Args:
+        subtitles (Dict[int, SubtitleEntry]): Subtitles keyed by index.
+        modes (List[str]): Fix modes from FIX_MODES.
+        min_gap_ms (int): Gap kept between cues by trim. Defaults to 0.
+
+    Returns:
+        Tuple[Dict[int, SubtitleEntry], Dict[str, int]]: Fixed subtitles and number of changes by mode.
+
+    Raises:
+        ValueError: If mode is unknown.
+    """
+    unknown = set(modes) - set(FIX_MODES)
+    if unknown:
+        raise ValueError(f'Unknown fix modes: {sorted(unknown)}, supported modes: {list(FIX_MODES)}.')
+
+    changes = {mode: 0 for mode in modes}
+    if not subtitles:
+        return {}, changes
+
+    timeline = Timeline(subtitles)
+    order = np.lexsort((timeline.indices, timeline.times[:, 0])).tolist()
+    cues: List[List[Any]] = [
+        [int(timeline.indices[position]), int(timeline.times[position, 0]), int(timeline.times[position, 1]), subtitles[int(timeline.indices[position])]['text']]
+        for position in order
+    ]
+
+    if 'merge' in modes:
+        merged: List[List[Any]] = []
+        for cue in cues:
+            if merged and cue[1] < merged[-1][2]:
+                merged[-1][2] = max(merged[-1][2], cue[2])
+                merged[-1][3] = f'{merged[-1][3]}\n{cue[3]}'
+                changes['merge'] += 1
+            else:
+                merged.append(cue)
+        cues = merged
+
+    if 'trim' in modes:
+        for position, cue in enumerate(cues):
+            next_start = cues[position + 1][1] if position + 1 < len(cues) else None
+            end = cue[2]
+            if end <= cue[1]:
+                end = cue[1] + MIN_CUE_DURATION_MS
+            if next_start is not None and end > next_start - min_gap_ms:
+                # Keep the gap if cue stays longer than zero, otherwise end right at next start
+                end = next_start - min_gap_ms if next_start - min_gap_ms > cue[1] else max(next_start, cue[1])
+            if end != cue[2]:
+                cue[2] = end
+                changes['trim'] += 1
+
+    if 'renumber' in modes:
+        changes['renumber'] = sum(cue[0] != number for number, cue in enumerate(cues, start=1))
+        for number, cue in enumerate(cues, start=1):
+            cue[0] = number
+
+    # Rebuild subtitles, times are formatted by Timeline in one pass
+    fixed: Dict[int, SubtitleEntry] = {cue[0]: {'start': '', 'end': '', 'text': cue[3]} for cue in cues}
+    Timeline.from_times([cue[0] for cue in cues], [(cue[1], cue[2]) for cue in cues]).write(fixed)
+    return fixed, changes
@@ -1,9 +1,18 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef, useCallback, memo } from "react";
 import { apiService } from "../services/apiService";
-import { SubtitlePreview, SubtitleFile, SubtitleMetadata } from "../types";
+import { SubtitleCue, SubtitleFile, SubtitleMetadata } from "../types";
 import { useLanguage } from "../hooks/useLanguage";
 import "../styles/SubtitlePreview.css";
 
+// Number of subtitles fetched at once
+const PAGE_SIZE = 100;
+
+// Height of .subtitle-entry including padding and margin, in pixels
+const ROW_HEIGHT = 108;
+
+// Rows rendered above and below the visible part of preview
+const OVERSCAN = 10;
+
 interface SubtitlePreviewProps {
     sessionId: string | null;
     subtitleFile: SubtitleFile | null;
@@ -24,17 +33,15 @@ const UniversalSubtitlePreview: React.FC<SubtitlePreviewProps> = ({
     const { t } = useLanguage();
 
     const [subtitleMeta, setSubtitleMeta] = useState<SubtitleMetadata | null>(null);
-    const [subtitlePreview, setSubtitlePreview] = useState<SubtitlePreview | null>(null);
+    const [subtitlePages, setSubtitlePages] = useState<Record<number, SubtitleCue[]>>({});
     const [subtitleCount, setSubtitleCount] = useState<number>(0);
+    const [visibleRange, setVisibleRange] = useState<[number, number]>([0, 0]);
 
-    // Get all subtitles set
-    const allSubtitles = new Set<number>();
-    if (subtitlePreview) {
-        Object.keys(subtitlePreview).forEach((key) => allSubtitles.add(Number(key)));
-    }
-
-    // Convert subtitles set to array and sort
-    const sortedSubtitles = Array.from(allSubtitles).sort((a, b) => a - b);
+    // List element used to measure scroll position, pages already requested
+    // and sanitized markup of rendered subtitles keyed by their text
+    const listRef = useRef<HTMLDivElement | null>(null);
+    const requestedPages = useRef<Set<number>>(new Set());
+    const sanitizedTexts = useRef<Map<string, string>>(new Map());
 
     // Helper function to sanitize subtitle text and only allow SRT-compatible tags
     const sanitizeSubtitleText = (text: string): string => {
@@ -90,16 +97,48 @@ const UniversalSubtitlePreview: React.FC<SubtitlePreviewProps> = ({
 
     // Helper function to safely render sanitized HTML markup in subtitles
     const renderSubtitleWithMarkup = (text: string) => {
-        // Sanitize the text before rendering
-        const sanitizedText = sanitizeSubtitleText(text);
+        // Sanitize the text once and reuse it on following renders
+        let sanitizedText = sanitizedTexts.current.get(text);
+        if (sanitizedText === undefined) {
+            sanitizedText = sanitizeSubtitleText(text);
+            sanitizedTexts.current.set(text, sanitizedText);
+        }
         return { __html: sanitizedText };
     };
 
-    // Fetch preview of source file
+    // Fetch page of subtitles unless it was already requested
+    const fetchPage = useCallback(async (page: number) => {
+        if (!subtitleFile || !sessionId || requestedPages.current.has(page)) return;
+
+        const pages = requestedPages.current;
+        pages.add(page);
+        try {
+            const result = await apiService.fetchSubtitleCues(
+                sessionId,
+                subtitleFile.filename,
+                page * PAGE_SIZE,
+                PAGE_SIZE,
+            );
+
+            // Ignore page of a file that is no longer previewed
+            if (pages !== requestedPages.current) return;
+            setSubtitlePages((previous) => ({ ...previous, [page]: result.cues }));
+        } catch {
+            // Allow page to be requested again
+            pages.delete(page);
+        }
+    }, [sessionId, subtitleFile]);
+
+    // Fetch metadata of source file
     useEffect(() => {
         const fetchFilePreview = async () => {
             if (!subtitleFile || !sessionId) return;
 
+            // Forget subtitles of previous file
+            requestedPages.current = new Set();
+            sanitizedTexts.current = new Map();
+            setSubtitlePages({});
+
             try {
                 const result = await apiService.fetchSubtitlesInfo(
                     sessionId,
@@ -122,17 +161,8 @@ const UniversalSubtitlePreview: React.FC<SubtitlePreviewProps> = ({
                     onMetadataLoaded(meta);
                 }
 
-                // Extract subtitle entries
-                const subtitles: SubtitlePreview = {};
-                for (const [key, value] of Object.entries(result.preview)) {
-                    if (!isNaN(Number(key))) {
-                        subtitles[Number(key)] = value;
-                    }
-                }
-                setSubtitlePreview(subtitles);
-
-                // Calculate the number of subtitles in the file
-                const count = Object.keys(subtitles).length;
+                // Number of subtitles in the file
+                const count = result.count;
                 setSubtitleCount(count);
 
                 // Call the callback with the count if provided
@@ -147,6 +177,48 @@ const UniversalSubtitlePreview: React.FC<SubtitlePreviewProps> = ({
         fetchFilePreview();
     }, [sessionId, subtitleFile, onSubtitleCountChange, onMetadataLoaded]);
 
+    // Find rows of the list that are inside the viewport
+    const updateVisibleRange = useCallback(() => {
+        const list = listRef.current;
+        if (!list) return;
+
+        const listTop = list.getBoundingClientRect().top;
+        const first = Math.max(0, Math.floor(-listTop / ROW_HEIGHT) - OVERSCAN);
+        const last = Math.max(first, Math.min(subtitleCount, Math.ceil((window.innerHeight - listTop) / ROW_HEIGHT) + OVERSCAN));
+
+        // Skip re-render if visible rows didn't change
+        setVisibleRange((previous) => (previous[0] === first && previous[1] === last ? previous : [first, last]));
+    }, [subtitleCount]);
+
+    // Track scrolling of the page and any scrollable parent
+    useEffect(() => {
+        updateVisibleRange();
+        document.addEventListener("scroll", updateVisibleRange, { passive: true, capture: true });
+        window.addEventListener("resize", updateVisibleRange);
+
+        return () => {
+            document.removeEventListener("scroll", updateVisibleRange, { capture: true });
+            window.removeEventListener("resize", updateVisibleRange);
+        };
+    }, [updateVisibleRange]);
+
+    // Fetch pages covering visible rows
+    useEffect(() => {
+        const [first, last] = visibleRange;
+        if (last <= first) return;
+
+        for (let page = Math.floor(first / PAGE_SIZE); page <= Math.floor((last - 1) / PAGE_SIZE); page++) {
+            fetchPage(page);
+        }
+    }, [visibleRange, fetchPage]);
+
+    // Only visible rows are rendered, the rest of the list is empty space
+    const [firstVisible, lastVisible] = visibleRange;
+    const visibleRows: number[] = [];
+    for (let row = firstVisible; row < lastVisible; row++) {
+        visibleRows.push(row);
+    }
+
     return (
         <>
             {/* Metadata content rendered only if file uploaded and metadata fetched */}
@@ -173,28 +245,35 @@ const UniversalSubtitlePreview: React.FC<SubtitlePreviewProps> = ({
                 {/* Container for file subtitles */}
                 <div className="subtitle-preview-container">
                     {/* Subtitle content rendered only if file uploaded and subtitles fetched */}
-                    {subtitleFile && subtitlePreview && (
+                    {subtitleFile && subtitleCount > 0 && (
                         <div className="subtitle-content">
-                            {/* Subtitle entries rendered one-by-one in ascending order */}
-                            {sortedSubtitles.map((key) => (
-                                <div key={`source-${key}`} className="subtitle-entry">
-                                    {/* Subtitle rendered only if it's found in subtitlePreview by key index */}
-                                    {subtitlePreview[key] ? (
-                                        <>
-                                            <div>{key}</div>
-                                            <div>
-                                                {subtitlePreview[key].start}{" --> "}
-                                                {subtitlePreview[key].end}
+                            {/* List has full height, visible entries are moved to their position */}
+                            <div ref={listRef} style={{ height: subtitleCount * ROW_HEIGHT }}>
+                                <div style={{ transform: `translateY(${firstVisible * ROW_HEIGHT}px)` }}>
+                                    {visibleRows.map((row) => {
+                                        const subtitle = subtitlePages[Math.floor(row / PAGE_SIZE)]?.[row % PAGE_SIZE];
+                                        return (
+                                            <div key={`source-${row}`} className={`subtitle-entry${row % 2 === 0 ? " odd" : ""}`}>
+                                                {/* Subtitle rendered only if its page is fetched */}
+                                                {subtitle ? (
+                                                    <>
+                                                        <div>{subtitle.index}</div>
+                                                        <div>
+                                                            {subtitle.start}{" --> "}
+                                                            {subtitle.end}
+                                                        </div>
+                                                        <div
+                                                            dangerouslySetInnerHTML={renderSubtitleWithMarkup(subtitle.text)}
+                                                        />
+                                                    </>
+                                                ) : (
+                                                    <div>-</div>
+                                                )}
                                             </div>
-                                            <div
-                                                dangerouslySetInnerHTML={renderSubtitleWithMarkup(subtitlePreview[key].text)}
-                                            />
-                                        </>
-                                    ) : (
-                                        <div>-</div>
-                                    )}
+                                        );
+                                    })}
                                 </div>
-                            ))}
+                            </div>
                         </div>
                     )}
                 </div>
@@ -204,4 +283,4 @@ const UniversalSubtitlePreview: React.FC<SubtitlePreviewProps> = ({
     )
 };
 
-export default UniversalSubtitlePreview;
+export default memo(UniversalSubtitlePreview);
@@ -1,4 +1,4 @@
-import { SubtitleFile, SubtitlePreview } from "../types";
+import { SubtitleFile, SubtitleCue } from "../types";
 
 let API_BASE_URL = import.meta.env.VITE_API_BASE_URL.replace(/\/+$/, "");
 const DEBUG: boolean = import.meta.env.VITE_DEBUG === "true";
@@ -83,7 +83,7 @@ export const apiService = {
         filename: string,
     ): Promise<{
         filename: string;
-        preview: SubtitlePreview;
+        count: number;
         encoding: string;
         confidence: number;
         language: string;
@@ -107,7 +107,7 @@ export const apiService = {
 
         return {
             filename: data.filename,
-            preview: data.preview,
+            count: data.count,
             encoding: data.encoding,
             confidence: data.confidence,
             language: data.language,
@@ -116,6 +116,38 @@ export const apiService = {
         };
     },
 
+    fetchSubtitleCues: async (
+        sessionId: string,
+        filename: string,
+        offset: number,
+        limit: number,
+    ): Promise<{
+        total: number;
+        cues: SubtitleCue[];
+    }> => {
+        const response = await fetch(`${API_BASE_URL}/cues`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+                session_id: sessionId,
+                filename: filename,
+                offset: offset,
+                limit: limit,
+            }),
+        });
+
+        const data = await response.json();
+
+        if (!response.ok) {
+            throw new Error(data.detail || "Fetch Cues operation failed");
+        }
+
+        return {
+            total: data.total,
+            cues: data.cues,
+        };
+    },
+
     getStatistics: async (): Promise<{
         uploaded: number;
         downloaded: number;
@@ -170,6 +202,11 @@ export const apiService = {
             throw new Error(data.detail || "Status check failed");
         }
 
+        // Background task stopped with error, polling callers show it and stop
+        if (data.status === "failed") {
+            throw new Error(data.error || "Processing failed");
+        }
+
         return {
             status: data.status,
             processed_filename: data.processed_filename,
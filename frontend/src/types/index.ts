@@ -19,6 +19,10 @@ export interface SubtitleEntry {
     text: string;
 }
 
+export interface SubtitleCue extends SubtitleEntry {
+    index: number;
+}
+
 export interface SubtitlePreview {
     [key: number]: SubtitleEntry;
 }